@@ -0,0 +1,342 @@
+"""
+Plugin result cache
+===================
+
+Running a plugin on exactly the same files with exactly the same settings gives
+the same results. When a commit is attempted again, after a plugin stopped it
+or to amend it, the results from last time are re-used instead of running the
+plugins again.
+
+Results are stored in :file:`.jig/cache`, one file for each result named after
+a key made from:
+
+    1. The contents of the plugin's directory
+    2. The plugin's config
+    3. The names and blob SHA's of the files the plugin receives
+
+The least recently used results are removed when the cache grows larger than
+``[jig] cache_size`` bytes.
+
+The staged changes, plugins and settings of the last run that passed are also
+recorded, so a run that would check the same things again can be skipped
+entirely.
+"""
+import json
+from os import (
+    fdopen, listdir, makedirs, rename, stat, unlink, utime, walk)
+from os.path import getsize, isdir, join
+from hashlib import sha1
+from collections import namedtuple
+from tempfile import mkstemp
+
+from git import Repo
+from git.exc import GitCommandError
+
+from jig.conf import (
+    CODEC, JIG_DIR_NAME, JIG_CACHE_DIR, JIG_DEFAULT_CACHE_SIZE,
+    JIG_LAST_RUN_FILENAME)
+from jig.output import MessageRecords
+from jig.plugins.manager import PluginManager
+from jig.plugins.tools import jig_setting
+
+CacheStats = namedtuple('CacheStats', 'entries size max_size')
+
+
+def cache_size_for(config):
+    """
+    Determine how many bytes of plugin results can be cached.
+
+    This is the ``[jig] cache_size`` option from ``config``, or
+    :py:data:`jig.conf.JIG_DEFAULT_CACHE_SIZE` if it's missing or not a
+    number. A size of ``0`` turns the cache off.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: int
+    """
+    try:
+        size = int(jig_setting(config, 'cache_size', JIG_DEFAULT_CACHE_SIZE))
+    except ValueError:
+        return JIG_DEFAULT_CACHE_SIZE
+
+    return max(0, size)
+
+
+def plugin_fingerprint(plugin):
+    """
+    A SHA-1 of the contents of the plugin's directory and its config.
+
+    :param Plugin plugin: the plugin
+    :rtype: string
+    """
+    fingerprint = sha1()
+
+    for root, dirs, files in walk(plugin.path):
+        # Walk in a predictable order, ignore any Git repository and compiled
+        # Python
+        dirs[:] = sorted([i for i in dirs if i not in ('.git', '__pycache__')])
+
+        for filename in sorted(files):
+            if filename.endswith(('.pyc', '.pyo')):
+                # Compiled when in-process plugins are imported
+                continue
+
+            path = join(root, filename)
+
+            relative = path[len(plugin.path):]
+            if isinstance(relative, unicode):
+                relative = relative.encode(CODEC)
+
+            fingerprint.update(relative + '\0')
+
+            with open(path, 'rb') as fh:
+                fingerprint.update(sha1(fh.read()).hexdigest())
+
+    options = {
+        'config': plugin.config,
+        'diff_context': plugin.diff_context,
+        'include': plugin.include and plugin.include.pattern,
+        'exclude': plugin.exclude and plugin.exclude.pattern,
+        # Messages written one per line are aggregated as they're read
+        'aggregate': plugin.output == 'ndjson' and plugin.aggregate}
+
+    fingerprint.update(json.dumps(options, sort_keys=True))
+
+    return fingerprint.hexdigest()
+
+
+def run_fingerprint(gitrepo, config, plugins=None, repo=None):
+    """
+    A SHA-1 of the staged changes along with the plugins and their settings.
+
+    The staged changes are identified by the tree ``git write-tree`` creates
+    from the index and the commit they'll be made on top of. Returns ``None``
+    if there is no tree, which happens when the index has unmerged files.
+
+    :param string gitrepo: path to the Git repository
+    :param SafeConfigParser config: the main jig config
+    :param list plugins: the plugins in ``config`` if they're already loaded
+    :param git.Repo repo: the repository if it's already open
+    :rtype: string
+    """
+    if repo is None:
+        repo = Repo(gitrepo)
+
+    try:
+        tree = repo.git.write_tree()
+    except GitCommandError:
+        return None
+
+    try:
+        head = repo.head.commit.hexsha
+    except ValueError:
+        # Nothing has been committed yet
+        head = ''
+
+    fingerprint = sha1('{0}:{1}'.format(tree, head))
+
+    if config.has_section('jig'):
+        # Everything but the bookkeeping jig does for itself
+        settings = sorted([i for i in config.items('jig')
+                           if i[0] != 'last_checked_for_updates'])
+        fingerprint.update(json.dumps(settings))
+
+    if plugins is None:
+        plugins = PluginManager(config).plugins
+
+    for plugin in plugins:
+        fingerprint.update('{0}:{1}:{2}'.format(
+            plugin.bundle, plugin.name, plugin_fingerprint(plugin)))
+
+    return fingerprint.hexdigest()
+
+
+def last_successful_run(gitrepo):
+    """
+    The :py:func:`run_fingerprint` of the last run that passed.
+
+    Returns ``None`` if no run has been recorded.
+
+    :param string gitrepo: path to the Git repository
+    :rtype: string
+    """
+    try:
+        with open(join(gitrepo, JIG_DIR_NAME, JIG_LAST_RUN_FILENAME)) as fh:
+            return fh.read().strip() or None
+    except IOError:
+        return None
+
+
+def set_last_successful_run(gitrepo, fingerprint):
+    """
+    Record the :py:func:`run_fingerprint` of a run that passed.
+
+    :param string gitrepo: path to the Git repository
+    :param string fingerprint: from :py:func:`run_fingerprint`
+    """
+    with open(join(gitrepo, JIG_DIR_NAME, JIG_LAST_RUN_FILENAME), 'w') as fh:
+        fh.write(fingerprint)
+
+
+def clear_last_successful_run(gitrepo):
+    """
+    Forget the last run that passed, the next one checks everything.
+
+    :param string gitrepo: path to the Git repository
+    """
+    try:
+        unlink(join(gitrepo, JIG_DIR_NAME, JIG_LAST_RUN_FILENAME))
+    except OSError:
+        # Nothing was recorded
+        pass
+
+
+class ResultCache(object):
+
+    """
+    Stores the results of running plugins.
+
+    """
+    def __init__(self, gitrepo, max_size=JIG_DEFAULT_CACHE_SIZE):
+        """
+        Where ``gitrepo`` is the path to the root of the Git repository.
+
+        Nothing is cached if ``max_size`` is ``0``.
+        """
+        self.directory = join(gitrepo, JIG_DIR_NAME, JIG_CACHE_DIR)
+        self.max_size = max_size
+
+    def key(self, plugin, git_diff_index):
+        """
+        The key for the results of ``plugin`` checking ``git_diff_index``.
+
+        :param Plugin plugin: the plugin
+        :param GitDiffIndex git_diff_index: the changes being checked
+        :rtype: string
+        """
+        select = plugin.wants if plugin.filtered else None
+
+        return sha1('{0}:{1}'.format(
+            plugin_fingerprint(plugin),
+            git_diff_index.fingerprint(select))).hexdigest()
+
+    def _entries(self):
+        """
+        List the filenames of the cached results.
+        """
+        if not isdir(self.directory):
+            return []
+
+        return [join(self.directory, i) for i in listdir(self.directory)
+                if i.endswith('.json')]
+
+    def get(self, key):
+        """
+        Get the cached ``(retcode, stdout, stderr)`` for ``key``.
+
+        Returns ``None`` if nothing is cached for it.
+
+        :param string key: from :py:meth:`key`
+        """
+        if not self.max_size:
+            return None
+
+        filename = join(self.directory, '{0}.json'.format(key))
+
+        try:
+            with open(filename, 'r') as fh:
+                result = json.load(fh)
+
+            # Keep track of when this was last used
+            utime(filename, None)
+        except (IOError, OSError, ValueError):
+            return None
+
+        stdout = result['stdout']
+
+        if 'truncated' in result:
+            # The messages of a plugin that writes them one per line
+            stdout = MessageRecords(
+                stdout, result['truncated'], result.get('repeated'))
+
+        return result['retcode'], stdout, result['stderr']
+
+    def set(self, key, result):
+        """
+        Cache the ``(retcode, stdout, stderr)`` ``result`` for ``key``.
+
+        Only results from plugins that exited successfully are cached.
+
+        :param string key: from :py:meth:`key`
+        :param tuple result: what :py:meth:`Plugin.pre_commit` returned
+        """
+        retcode, stdout, stderr = result
+
+        if not self.max_size or retcode != 0:
+            return
+
+        if not isdir(self.directory):
+            try:
+                makedirs(self.directory)
+            except OSError:
+                # Another plugin may have created it
+                pass
+
+        # Written to a temporary file first, nobody will read half a result
+        fd, temp = mkstemp(dir=self.directory)
+
+        cached = {'retcode': retcode, 'stdout': stdout, 'stderr': stderr}
+
+        if isinstance(stdout, MessageRecords):
+            cached['truncated'] = stdout.truncated
+            # As a list, JSON would turn the indexes into strings
+            cached['repeated'] = stdout.repeated.items()
+
+        try:
+            with fdopen(fd, 'w') as fh:
+                json.dump(cached, fh)
+        except (TypeError, ValueError):
+            # In-process plugins can return data JSON can't store
+            unlink(temp)
+            return
+
+        rename(temp, join(self.directory, '{0}.json'.format(key)))
+
+    def evict(self):
+        """
+        Remove the least recently used results until the cache fits.
+        """
+        entries = sorted(
+            [(stat(i).st_mtime, getsize(i), i) for i in self._entries()])
+
+        size = sum([i[1] for i in entries])
+
+        for mtime, entry_size, filename in entries:
+            if size <= self.max_size:
+                break
+
+            unlink(filename)
+            size -= entry_size
+
+    def clear(self):
+        """
+        Remove all of the cached results.
+
+        :returns: how many results were removed
+        """
+        entries = self._entries()
+
+        for filename in entries:
+            unlink(filename)
+
+        return len(entries)
+
+    def stats(self):
+        """
+        How many results are cached and how much room they take up.
+
+        :rtype: CacheStats
+        """
+        entries = self._entries()
+
+        return CacheStats(
+            len(entries), sum([getsize(i) for i in entries]), self.max_size)
@@ -0,0 +1,233 @@
+"""
+Talks to the jig daemon from the pre-commit hook.
+
+Nothing but the standard library is imported here. When the daemon is running
+the hook never has to load GitPython or the rest of jig at all.
+"""
+import sys
+import json
+import socket
+from os import chdir, environ, getcwd
+from os.path import abspath, basename, dirname, join, realpath
+
+from jig.exc import DaemonUnavailable
+from jig.conf import JIG_DIR_NAME, JIG_DAEMON_SOCKET
+
+# Variables Git sets for hooks that name a path, relative to where the hook
+# was started
+GIT_PATH_VARIABLES = (
+    'GIT_DIR', 'GIT_INDEX_FILE', 'GIT_WORK_TREE', 'GIT_OBJECT_DIRECTORY')
+
+
+def socket_path(gitrepo):
+    """
+    The Unix socket the daemon for ``gitrepo`` listens on.
+
+    :param string gitrepo: path to the Git repository
+    :rtype: string
+    """
+    return join(realpath(gitrepo), JIG_DIR_NAME, JIG_DAEMON_SOCKET)
+
+
+def git_environ():
+    """
+    The ``GIT_`` environment variables of this process.
+
+    The daemon uses them while it checks the changes, so it sees the same
+    index the hook would have. Paths are made absolute because the daemon was
+    started somewhere else.
+
+    :rtype: dict
+    """
+    variables = {}
+    for name, value in environ.items():
+        if not name.startswith('GIT_'):
+            continue
+
+        if name in GIT_PATH_VARIABLES:
+            value = abspath(value)
+
+        variables[name] = value
+
+    return variables
+
+
+class DaemonClient(object):
+
+    """
+    A connection to the jig daemon of a Git repository.
+
+    Requests and responses are JSON objects, one on each line.
+
+    """
+    def __init__(self, gitrepo):
+        """
+        Where ``gitrepo`` is the path to the root of the Git repository.
+        """
+        self.gitrepo = gitrepo
+        self.socket = None
+        self._file = None
+
+    def connect(self):
+        """
+        Connect to the daemon.
+
+        :raises jig.exc.DaemonUnavailable: if no daemon is listening
+        """
+        path = socket_path(self.gitrepo)
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        original_dir = getcwd()
+        try:
+            # Socket names are limited to around 100 characters, connecting
+            # from the same directory keeps long repository paths working
+            chdir(dirname(path))
+
+            self.socket.connect(basename(path))
+        except (OSError, socket.error) as e:
+            self.close()
+            raise DaemonUnavailable(unicode(e))
+        finally:
+            chdir(original_dir)
+
+        self._file = self.socket.makefile('rw')
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
+
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+    def send(self, message):
+        """
+        Send ``message`` to the daemon.
+
+        :param dict message: the request
+        """
+        try:
+            self._file.write(json.dumps(message) + '\n')
+            self._file.flush()
+        except (IOError, socket.error) as e:
+            raise DaemonUnavailable(unicode(e))
+
+    def receive(self):
+        """
+        Wait for the daemon's response.
+
+        :rtype: dict
+        """
+        try:
+            line = self._file.readline()
+        except (IOError, socket.error) as e:
+            raise DaemonUnavailable(unicode(e))
+
+        if not line:
+            raise DaemonUnavailable('The jig daemon closed the connection.')
+
+        return json.loads(line)
+
+    def request(self, message):
+        """
+        Send ``message`` and return the response.
+
+        :param dict message: the request
+        :rtype: dict
+        """
+        self.send(message)
+
+        return self.receive()
+
+
+def _ask_to_commit():
+    """
+    Ask the user if they want to commit even though there are messages.
+
+    Mirrors the question :py:meth:`jig.runner.Runner.main` asks.
+    """
+    # Git will run a pre-commit hook with stdin pointed at /dev/null.
+    # We will reconnect to the tty so that raw_input works.
+    sys.stdin = open('/dev/tty')
+
+    while True:
+        try:
+            answer = raw_input(
+                '\nCommit anyway (hit "c"), or stop (hit "s"): ')
+        except KeyboardInterrupt:
+            return False
+        if answer and answer[0].lower() == 's':
+            return False
+        elif answer and answer[0].lower() == 'c':
+            return True
+
+
+def _relay(message):
+    """
+    Write the output in ``message`` from the daemon.
+
+    Returns ``True`` if there was nothing else in it.
+
+    :param dict message: a response from the daemon
+    """
+    for name, stream in (('stdout', sys.stdout), ('stderr', sys.stderr)):
+        if name in message:
+            stream.write(message[name].encode('utf-8'))
+            stream.flush()
+
+    return set(message) <= set(['stdout', 'stderr'])
+
+
+def fromhook(gitrepo):
+    """
+    Check the staged changes with the daemon for the pre-commit hook.
+
+    Exits like :py:meth:`jig.runner.Runner.main` would once the changes have
+    been checked. Returns ``False`` without checking anything if there is no
+    daemon, or it wants the hook to run jig itself, so the hook can fall back
+    to doing that.
+
+    :param string gitrepo: path to the Git repository
+    """
+    client = DaemonClient(gitrepo)
+
+    try:
+        client.connect()
+
+        response = client.request(
+            {'command': 'check', 'environ': git_environ()})
+
+        while _relay(response):
+            # Printed as the daemon checks the changes
+            response = client.receive()
+    except DaemonUnavailable:
+        client.close()
+        return False
+
+    if response.get('fallback'):
+        # Like when the user needs to be asked about plugin updates
+        client.close()
+        return False
+
+    retcode = response['retcode']
+
+    try:
+        if not retcode:
+            commit = _ask_to_commit() if response['prompt'] else True
+
+            retcode = 0 if commit else 1
+
+            # So the daemon knows if these changes passed
+            client.request({'commit': commit})
+    except DaemonUnavailable:
+        # The changes will be checked again next time
+        pass
+    finally:
+        client.close()
+
+    sys.exit(retcode)
@@ -0,0 +1,80 @@
+from jig.commands.base import BaseCommand
+from jig.plugins import get_jigconfig
+from jig.cache import (
+    ResultCache, cache_size_for, clear_last_successful_run)
+
+try:
+    import argparse
+except ImportError:   # pragma: no cover
+    from backports import argparse
+
+_parser = argparse.ArgumentParser(
+    description='Manage the cached results of running plugins',
+    usage='jig cache [-h] ACTION')
+
+_subparsers = _parser.add_subparsers(
+    title='actions',
+    description='available commands to manage the cache')
+
+_clearparser = _subparsers.add_parser(
+    'clear', help='remove all cached results',
+    usage='jig cache clear [-h] [-r GITREPO]')
+_clearparser.add_argument(
+    '--gitrepo', '-r', default='.', dest='path',
+    help='Path to the Git repository, default current directory')
+_clearparser.set_defaults(subcommand='clear')
+
+_statsparser = _subparsers.add_parser(
+    'stats', help='show how much is cached',
+    usage='jig cache stats [-h] [-r GITREPO]')
+_statsparser.add_argument(
+    '--gitrepo', '-r', default='.', dest='path',
+    help='Path to the Git repository, default current directory')
+_statsparser.set_defaults(subcommand='stats')
+
+
+class Command(BaseCommand):
+    parser = _parser
+
+    def process(self, argv):
+        subcommand = argv.subcommand
+
+        # Handle the actions
+        getattr(self, subcommand)(argv)
+
+    def _cache(self, path):
+        """
+        The result cache for the Git repository at ``path``.
+        """
+        config = get_jigconfig(path)
+
+        return ResultCache(path, cache_size_for(config))
+
+    def clear(self, argv):
+        """
+        Remove all cached results.
+
+        The last run that passed is forgotten too, so the next run will check
+        the staged changes even if they haven't changed.
+        """
+        with self.out() as printer:
+            removed = self._cache(argv.path).clear()
+
+            clear_last_successful_run(argv.path)
+
+            printer(u'Removed {0} cached results.'.format(removed))
+
+    def stats(self, argv):
+        """
+        Show how many results are cached and how much room they take up.
+        """
+        with self.out() as printer:
+            cache = self._cache(argv.path)
+
+            if not cache.max_size:
+                printer(u'The cache is turned off.')
+
+            stats = cache.stats()
+
+            printer(u'{0} cached results using {1} of {2} bytes.'.format(
+                stats.entries, stats.size, stats.max_size))
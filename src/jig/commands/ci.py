@@ -15,7 +15,8 @@ except ImportError:   # pragma: no cover
 _parser = argparse.ArgumentParser(
     description='Run in continuous integration (CI) mode',
     usage='jig ci [-h] [--tracking-branch TRACKING_BRANCH] '
-    '[--format FORMAT] PLUGINSFILE [PATH]')
+    '[--format FORMAT] [-j JOBS] [--fail-fast] [--stream] '
+    '[--profile] [--trace FILE] PLUGINSFILE [PATH]')
 
 _parser.add_argument(
     'pluginsfile',
@@ -27,6 +28,21 @@ _parser.add_argument(
 _parser.add_argument(
     '--tracking-branch', dest='tracking_branch', default='jig-ci-last-run',
     help='Branch name Jig will use to keep its place')
+_parser.add_argument(
+    '--jobs', '-j', type=int, default=None,
+    help='Number of plugins to run at the same time')
+_parser.add_argument(
+    '--fail-fast', dest='fail_fast', action='store_true', default=None,
+    help='Stop the rest of the plugins once one of them stops the commit')
+_parser.add_argument(
+    '--stream', dest='stream', action='store_true', default=None,
+    help='Show the results of each plugin as soon as it finishes')
+_parser.add_argument(
+    '--profile', dest='profile', action='store_true', default=False,
+    help='Show how long each plugin took and what it used')
+_parser.add_argument(
+    '--trace', dest='trace', metavar='FILE', default=None,
+    help='Write a trace of where the time went to this file')
 _parser.add_argument(
     'path', nargs='?', default='.',
     help='Path to the Git repository')
@@ -87,5 +103,10 @@ class Command(BaseCommand, InstallCommandMixin):
             runner.main(
                 path,
                 rev_range='{0}..HEAD'.format(tracking_branch),
-                interactive=False
+                interactive=False,
+                jobs=argv.jobs,
+                fail_fast=argv.fail_fast,
+                stream=argv.stream,
+                profile=argv.profile,
+                trace=argv.trace
             )
@@ -0,0 +1,114 @@
+from jig.commands.base import BaseCommand
+from jig.exc import DaemonUnavailable, GitRepoNotInitialized
+from jig.gitutils.checks import repo_jiginitialized
+from jig.client import DaemonClient
+from jig.daemon import JigDaemon
+
+try:
+    import argparse
+except ImportError:   # pragma: no cover
+    from backports import argparse
+
+_parser = argparse.ArgumentParser(
+    description='Keep jig running to check commits faster',
+    usage='jig daemon [-h] ACTION')
+
+_subparsers = _parser.add_subparsers(
+    title='actions',
+    description='available commands to manage the daemon')
+
+_startparser = _subparsers.add_parser(
+    'start', help='check commits until stopped',
+    usage='jig daemon start [-h] [-r GITREPO]')
+_startparser.add_argument(
+    '--gitrepo', '-r', default='.', dest='path',
+    help='Path to the Git repository, default current directory')
+_startparser.set_defaults(subcommand='start')
+
+_stopparser = _subparsers.add_parser(
+    'stop', help='stop the running daemon',
+    usage='jig daemon stop [-h] [-r GITREPO]')
+_stopparser.add_argument(
+    '--gitrepo', '-r', default='.', dest='path',
+    help='Path to the Git repository, default current directory')
+_stopparser.set_defaults(subcommand='stop')
+
+_statusparser = _subparsers.add_parser(
+    'status', help='show if the daemon is running',
+    usage='jig daemon status [-h] [-r GITREPO]')
+_statusparser.add_argument(
+    '--gitrepo', '-r', default='.', dest='path',
+    help='Path to the Git repository, default current directory')
+_statusparser.set_defaults(subcommand='status')
+
+
+class Command(BaseCommand):
+    parser = _parser
+
+    def process(self, argv):
+        subcommand = argv.subcommand
+
+        # Handle the actions
+        getattr(self, subcommand)(argv)
+
+    def _request(self, path, message):
+        """
+        Send ``message`` to the daemon for ``path`` and return the response.
+
+        Returns ``None`` if the daemon is not running.
+        """
+        client = DaemonClient(path)
+
+        try:
+            client.connect()
+
+            return client.request(message)
+        except DaemonUnavailable:
+            return None
+        finally:
+            client.close()
+
+    def start(self, argv):
+        """
+        Check commits for the pre-commit hook until stopped.
+        """
+        daemon = JigDaemon(argv.path)
+
+        with self.out() as printer:
+            if not repo_jiginitialized(argv.path):
+                raise GitRepoNotInitialized(
+                    'This repository has not been initialized.')
+
+            daemon.start()
+
+            printer(u'The jig daemon is listening on {0}.'.format(
+                daemon.socket))
+
+        try:
+            daemon.serve()
+        except KeyboardInterrupt:
+            # Stopped by the user, the socket has been removed
+            pass
+
+    def stop(self, argv):
+        """
+        Stop the daemon if it's running.
+        """
+        with self.out() as printer:
+            if self._request(argv.path, {'command': 'stop'}) is None:
+                printer(u'The jig daemon is not running.')
+            else:
+                printer(u'The jig daemon has been stopped.')
+
+    def status(self, argv):
+        """
+        Show if the daemon is running.
+        """
+        with self.out() as printer:
+            response = self._request(argv.path, {'command': 'ping'})
+
+            if response is None:
+                printer(u'The jig daemon is not running.')
+            else:
+                printer(u'The jig daemon is running, process {0}.'.format(
+                    response['pid']))
@@ -8,11 +8,28 @@ except ImportError:   # pragma: no cover
 
 _parser = argparse.ArgumentParser(
     description='Run plugins on a revision range',
-    usage='jig report [-h] [-p PLUGIN] [--rev-range REVISION_RANGE] [PATH]')
+    usage='jig report [-h] [-p PLUGIN] [-j JOBS] '
+    '[--fail-fast] [--stream] [--profile] [--trace FILE] '
+    '[--rev-range REVISION_RANGE] [PATH]')
 
 _parser.add_argument(
     '--plugin', '-p',
     help='Only run this specific named plugin')
+_parser.add_argument(
+    '--jobs', '-j', type=int, default=None,
+    help='Number of plugins to run at the same time')
+_parser.add_argument(
+    '--fail-fast', dest='fail_fast', action='store_true', default=None,
+    help='Stop the rest of the plugins once one of them stops the commit')
+_parser.add_argument(
+    '--stream', dest='stream', action='store_true', default=None,
+    help='Show the results of each plugin as soon as it finishes')
+_parser.add_argument(
+    '--profile', dest='profile', action='store_true', default=False,
+    help='Show how long each plugin took and what it used')
+_parser.add_argument(
+    '--trace', dest='trace', metavar='FILE', default=None,
+    help='Write a trace of where the time went to this file')
 _parser.add_argument(
     '--rev-range', dest='rev_range', default='HEAD^1..HEAD',
     help='Git revision range to run the plugins against')
@@ -34,5 +51,10 @@ class Command(BaseCommand):
             path,
             plugin=argv.plugin,
             rev_range=rev_range,
-            interactive=False
+            interactive=False,
+            jobs=argv.jobs,
+            fail_fast=argv.fail_fast,
+            stream=argv.stream,
+            profile=argv.profile,
+            trace=argv.trace
         )
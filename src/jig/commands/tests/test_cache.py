@@ -0,0 +1,71 @@
+from jig.tests.testcase import CommandTestCase, PluginTestCase, cd_gitrepo
+from jig.commands import cache
+from jig.plugins import set_jigconfig
+from jig.cache import (
+    ResultCache, last_successful_run, set_last_successful_run)
+
+
+class TestCacheCommand(CommandTestCase, PluginTestCase):
+
+    """
+    Test the cache command.
+
+    """
+    command = cache.Command
+
+    def setUp(self):
+        super(TestCacheCommand, self).setUp()
+
+        self.cache = ResultCache(self.gitrepodir)
+
+    @cd_gitrepo
+    def test_stats_empty(self):
+        """
+        Nothing has been cached yet.
+        """
+        self.run_command('stats')
+
+        self.assertResults(
+            u'0 cached results using 0 of 10485760 bytes.', self.output)
+
+    def test_stats(self):
+        """
+        Shows how much room the cached results use.
+        """
+        self.cache.set('a', (0, u'', u''))
+
+        self.run_command('stats -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(
+            u'1 cached results using {0} of 10485760 bytes.'.format(
+                self.cache.stats().size),
+            self.output)
+
+    def test_stats_turned_off(self):
+        """
+        Mentions when the cache is turned off.
+        """
+        self.jigconfig.set('jig', 'cache_size', '0')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.run_command('stats -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(
+            u'''
+            The cache is turned off.
+            0 cached results using 0 of 0 bytes.''',
+            self.output)
+
+    def test_clear(self):
+        """
+        Removes the cached results.
+        """
+        self.cache.set('a', (0, u'', u''))
+        self.cache.set('b', (0, u'', u''))
+        set_last_successful_run(self.gitrepodir, 'abc')
+
+        self.run_command('clear -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(u'Removed 2 cached results.', self.output)
+        self.assertEqual(0, self.cache.stats().entries)
+        self.assertIsNone(last_successful_run(self.gitrepodir))
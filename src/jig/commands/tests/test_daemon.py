@@ -0,0 +1,74 @@
+from os import getpid
+from threading import Thread
+
+from mock import patch
+
+from jig.tests.testcase import CommandTestCase, PluginTestCase
+from jig.exc import ForcedExit
+from jig.commands import daemon
+from jig.daemon import JigDaemon
+
+
+class TestDaemonCommand(CommandTestCase, PluginTestCase):
+
+    """
+    Test the daemon command.
+
+    """
+    command = daemon.Command
+
+    def test_start(self):
+        """
+        Starts listening on the socket.
+        """
+        with patch.object(JigDaemon, 'serve') as serve:
+            self.run_command('start -r {0}'.format(self.gitrepodir))
+
+        self.assertTrue(serve.called)
+        self.assertIn(u'The jig daemon is listening on', self.output)
+
+    def test_start_not_initialized(self):
+        """
+        The Git repository has to be initialized first.
+        """
+        del self.gitrepodir
+
+        with self.assertRaises(ForcedExit):
+            self.run_command('start -r {0}'.format(self.gitrepodir))
+
+        self.assertIn(
+            u'This repository has not been initialized.', self.error)
+
+    def test_not_running(self):
+        """
+        Reports that there isn't a daemon to stop.
+        """
+        self.run_command('status -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(u'The jig daemon is not running.', self.output)
+
+        self.run_command('stop -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(u'The jig daemon is not running.', self.output)
+
+    def test_status_and_stop(self):
+        """
+        Shows the running daemon and stops it.
+        """
+        running = JigDaemon(self.gitrepodir)
+        running.start()
+
+        serving = Thread(target=running.serve)
+        serving.start()
+
+        self.run_command('status -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(
+            u'The jig daemon is running, process {0}.'.format(getpid()),
+            self.output)
+
+        self.run_command('stop -r {0}'.format(self.gitrepodir))
+
+        serving.join()
+
+        self.assertResults(u'The jig daemon has been stopped.', self.output)
@@ -102,6 +102,86 @@ class TestRunNowCommand(CommandTestCase, PluginTestCase):
                 Info 0 Warn 1 Stop 0
             """.format(ATTENTION), self.output)
 
+    def test_jobs(self):
+        """
+        Plugins can be ran concurrently with the --jobs option.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin07/plugin02')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        # Create staged
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        with nested(
+            patch('jig.runner.sys'),
+            self.assertRaises(SystemExit)
+        ) as (r_sys, ec):
+            # Raise the error to halt execution like the real sys.exit would
+            r_sys.exit.side_effect = SystemExit
+
+            self.run_command('--jobs 2 {0}'.format(self.gitrepodir))
+
+        self.assertResults(u"""
+            ▾  plugin01
+
+            ⚠  line 1: b.txt
+                b is +
+
+            ▾  plugin07/plugin02
+
+            ⚠  line 1: b.txt
+                b is +
+
+            {0}  Jig ran 2 plugins
+                Info 0 Warn 2 Stop 0
+            """.format(ATTENTION), self.output)
+
+    def test_fail_fast(self):
+        """
+        The --fail-fast option is given to the runner.
+        """
+        with patch('jig.commands.runnow.Runner') as runner:
+            self.run_command('--fail-fast {0}'.format(self.gitrepodir))
+
+        self.assertTrue(runner.return_value.main.call_args[1]['fail_fast'])
+
+        with patch('jig.commands.runnow.Runner') as runner:
+            self.run_command(self.gitrepodir)
+
+        # Left to the [jig] fail_fast setting
+        self.assertIsNone(runner.return_value.main.call_args[1]['fail_fast'])
+
+    def test_stream(self):
+        """
+        The --stream option is given to the runner.
+        """
+        with patch('jig.commands.runnow.Runner') as runner:
+            self.run_command('--stream {0}'.format(self.gitrepodir))
+
+        self.assertTrue(runner.return_value.main.call_args[1]['stream'])
+
+    def test_profile(self):
+        """
+        The --profile option is given to the runner.
+        """
+        with patch('jig.commands.runnow.Runner') as runner:
+            self.run_command('--profile {0}'.format(self.gitrepodir))
+
+        self.assertTrue(runner.return_value.main.call_args[1]['profile'])
+
+    def test_trace(self):
+        """
+        The --trace option is given to the runner.
+        """
+        with patch('jig.commands.runnow.Runner') as runner:
+            self.run_command('--trace /tmp/a.json {0}'.format(
+                self.gitrepodir))
+
+        self.assertEqual(
+            '/tmp/a.json', runner.return_value.main.call_args[1]['trace'])
+
     def test_specific_plugin_not_installed(self):
         """
         A specific plugin can be ran but it's not installed.
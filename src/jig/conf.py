@@ -18,6 +18,45 @@ JIG_DIR_NAME = '.jig'
 JIG_PLUGIN_CONFIG_FILENAME = 'plugins.cfg'
 JIG_PLUGIN_DIR = 'plugins'
 
+# How many plugins can run at the same time if ``[jig] jobs`` is not set
+JIG_DEFAULT_JOBS = 1
+
+# Algorithms that can describe the changes made to a file with the
+# ``[jig] diff_algorithm`` setting. All but ``difflib`` are handed to
+# ``git diff --diff-algorithm``, ``difflib`` uses Python's SequenceMatcher
+JIG_DIFF_ALGORITHMS = ('myers', 'minimal', 'patience', 'histogram', 'difflib')
+JIG_DEFAULT_DIFF_ALGORITHM = 'myers'
+
+# How the staged changes are prepared for the plugins with the
+# ``[jig] prepare`` setting. ``stash`` stashes anything that isn't staged in
+# the working directory, ``export`` copies the staged files to a temporary
+# directory and leaves the working directory alone
+JIG_PREPARE_STRATEGIES = ('stash', 'export')
+JIG_DEFAULT_PREPARE_STRATEGY = 'stash'
+
+# Name of the directory inside of JIG_DIR_NAME that holds the results of
+# previous plugin runs
+JIG_CACHE_DIR = 'cache'
+
+# Name of the file inside of JIG_DIR_NAME that records the staged changes,
+# plugins and settings of the last run that passed
+JIG_LAST_RUN_FILENAME = 'last-run'
+
+# How many bytes of results can be cached if ``[jig] cache_size`` is not set
+JIG_DEFAULT_CACHE_SIZE = 10 * 1024 * 1024
+
+# Name of the file inside of JIG_DIR_NAME that records how long each plugin
+# took to run, and how many of its runs are remembered
+JIG_STATS_FILENAME = 'stats'
+JIG_STATS_HISTORY = 10
+
+# Name of the Unix socket inside of JIG_DIR_NAME that ``jig daemon`` listens
+# on for the pre-commit hook
+JIG_DAEMON_SOCKET = 'daemon.sock'
+
+# How many bytes of blobs ``jig daemon`` keeps in memory between checks
+JIG_DAEMON_BLOB_CACHE_SIZE = 64 * 1024 * 1024
+
 
 ## Plugin specific settings
 
@@ -28,6 +67,22 @@ PLUGIN_CONFIG_FILENAME = 'config.cfg'
 # the pre-commit script
 PLUGIN_PRE_COMMIT_SCRIPT = 'pre-commit'
 
+# How a plugin's pre-commit script is ran with the ``protocol`` option in the
+# ``[plugin]`` section of its config. ``process`` starts it for every run and
+# sends the data on stdin, ``worker`` starts it once and sends it one line of
+# JSON for every run, ``python`` imports the function named by the
+# ``entry_point`` option and calls it inside of jig
+PLUGIN_PROTOCOLS = ('process', 'worker', 'python')
+PLUGIN_DEFAULT_PROTOCOL = 'process'
+
+# What a plugin writes to stdout with the ``output`` option in the
+# ``[plugin]`` section of its config. ``json`` is a single JSON document,
+# ``ndjson`` is one ``[file, line, type, body]`` message per line which is
+# read as it's written. Only the first ``max_messages`` of those are kept
+PLUGIN_OUTPUTS = ('json', 'ndjson')
+PLUGIN_DEFAULT_OUTPUT = 'json'
+PLUGIN_DEFAULT_MAX_MESSAGES = 1000
+
 # Where can plugin pre-commit examples be found
 PLUGIN_PRE_COMMIT_TEMPLATE_DIR = \
     join(dirname(__file__), 'data', 'pre-commits')
@@ -0,0 +1,270 @@
+"""
+Jig daemon
+==========
+
+Every commit starts a new Python interpreter for the pre-commit hook, which
+imports GitPython and all of jig before it can check anything. ``jig daemon``
+does that once and keeps running, along with any plugin workers and in-process
+plugins it loads, and the hook asks it to check the changes instead. The jig
+config, the plugins, the Git repository and the blobs that were read are kept
+for the next check too, see :py:class:`jig.runner.Preloaded`.
+
+The daemon listens on :file:`.jig/daemon.sock` in the Git repository. Each
+request is a JSON object on one line:
+
+``{"command": "ping"}``
+    Answered with the daemon's ``pid``.
+
+``{"command": "stop"}``
+    Stops the daemon.
+
+``{"command": "check", "environ": {...}}``
+    Checks the staged changes with the ``GIT_`` environment variables of the
+    hook. Each line of output is sent as soon as it's printed, as
+    ``{"stdout": "..."}`` or ``{"stderr": "..."}``, followed by the
+    ``retcode``. If the user has to be asked whether to commit anyway the hook
+    asks and sends back ``{"commit": true}`` or ``{"commit": false}``.
+
+The hook runs jig itself when the daemon answers with ``{"fallback": true}``,
+which happens when the plugins need to be checked for updates.
+"""
+import sys
+import json
+import socket
+import traceback
+from os import environ, getpid, unlink
+from os.path import basename, dirname, exists, realpath
+from threading import Lock, Thread
+from contextlib import contextmanager
+from SocketServer import (
+    ThreadingMixIn, UnixStreamServer, StreamRequestHandler)
+
+from jig.exc import DaemonError, DaemonUnavailable, ForcedExit
+from jig.client import DaemonClient, socket_path
+from jig.cache import set_last_successful_run
+from jig.output import ConsoleView
+from jig.runner import Runner, Preloaded
+from jig.tools import cwd_bounce
+
+
+@contextmanager
+def _git_environ(variables):
+    """
+    Replace the ``GIT_`` environment variables with ``variables``.
+    """
+    def remove():
+        for name in [i for i in environ if i.startswith('GIT_')]:
+            del environ[name]
+
+    original = dict([i for i in environ.items() if i[0].startswith('GIT_')])
+
+    remove()
+    environ.update(variables)
+
+    try:
+        yield
+    finally:
+        remove()
+        environ.update(original)
+
+
+class _Output(object):
+
+    """
+    A file that sends everything written to it to the hook straight away.
+
+    """
+    def __init__(self, name, respond, lock):
+        """
+        :param string name: ``stdout`` or ``stderr``
+        :param function respond: sends a message to the hook
+        :param Lock lock: shared by all of the outputs of a request
+        """
+        self.name = name
+        self._respond = respond
+        self._lock = lock
+
+    def write(self, text):
+        with self._lock:
+            self._respond({self.name: text})
+
+
+class _Server(ThreadingMixIn, UnixStreamServer):
+
+    """
+    Handles each connection in its own thread.
+
+    """
+    daemon_threads = True
+
+
+class _Handler(StreamRequestHandler):
+
+    """
+    Hands each connection to the :py:class:`JigDaemon`.
+
+    """
+    def handle(self):
+        self.server.jig_daemon.handle(self.rfile, self.wfile)
+
+
+class JigDaemon(object):
+
+    """
+    Checks staged changes for the pre-commit hook of a Git repository.
+
+    """
+    def __init__(self, gitrepo):
+        """
+        Where ``gitrepo`` is the path to the root of the Git repository.
+        """
+        self.gitrepo = realpath(gitrepo)
+        self.socket = socket_path(self.gitrepo)
+        self.server = None
+
+        # Loaded by the first check and kept for the ones after it
+        self.preloaded = Preloaded(self.gitrepo)
+
+        # Checks stash changes and set environment variables, one at a time
+        self._check_lock = Lock()
+
+    def start(self):
+        """
+        Start listening on the socket.
+
+        :raises jig.exc.DaemonError: if a daemon is already running
+        """
+        client = DaemonClient(self.gitrepo)
+
+        try:
+            client.connect()
+        except DaemonUnavailable:
+            pass
+        else:
+            client.close()
+            raise DaemonError(
+                'The jig daemon is already running for {0}.'.format(
+                    self.gitrepo))
+
+        if exists(self.socket):
+            # Left behind by a daemon that didn't stop cleanly
+            unlink(self.socket)
+
+        # Keep the socket name short, see DaemonClient.connect
+        with cwd_bounce(dirname(self.socket)):
+            self.server = _Server(basename(self.socket), _Handler)
+
+        self.server.jig_daemon = self
+
+    def serve(self):
+        """
+        Handle requests until :py:meth:`stop` is called.
+        """
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+            try:
+                unlink(self.socket)
+            except OSError:
+                pass
+
+    def stop(self):
+        """
+        Stop handling requests.
+
+        Must be called from another thread than :py:meth:`serve`.
+        """
+        self.server.shutdown()
+
+    def handle(self, rfile, wfile):
+        """
+        Handle one connection.
+
+        :param file rfile: requests from the client
+        :param file wfile: responses to the client
+        """
+        def receive():
+            line = rfile.readline()
+
+            return json.loads(line) if line else {}
+
+        def respond(message):
+            try:
+                wfile.write(json.dumps(message) + '\n')
+                wfile.flush()
+            except (IOError, socket.error):
+                # The hook went away, like when the commit was interrupted
+                pass
+
+        try:
+            request = receive()
+        except ValueError:
+            return
+
+        command = request.get('command')
+
+        if command == 'ping':
+            respond({'pid': getpid()})
+        elif command == 'stop':
+            respond({'stopping': True})
+
+            # Waiting for the server here would keep this request open
+            Thread(target=self.stop).start()
+        elif command == 'check':
+            self.check(request.get('environ', {}), receive, respond)
+
+    def check(self, variables, receive, respond):
+        """
+        Check the staged changes like the pre-commit hook would.
+
+        :param dict variables: the hook's ``GIT_`` environment variables
+        :param function receive: reads the next message from the hook
+        :param function respond: sends a message to the hook
+        """
+        lock = Lock()
+        view = ConsoleView(
+            collect_output=True, exit_on_exception=False,
+            stdout=_Output('stdout', respond, lock),
+            stderr=_Output('stderr', respond, lock))
+        runner = Runner(view=view, preloaded=self.preloaded)
+
+        try:
+            if runner.update_check_due(self.gitrepo):
+                # Only the hook can ask the user about them
+                respond({'fallback': True})
+                return
+
+            with self._check_lock, _git_environ(variables):
+                report_counts, fingerprint = runner.check(self.gitrepo)
+
+            retcode = 0
+        except ForcedExit as fe:
+            report_counts, fingerprint = None, None
+            retcode = fe.args[0]
+        except Exception:
+            # Something went wrong in the daemon, the hook can still check
+            # the changes itself
+            sys.stderr.write(traceback.format_exc())
+            respond({'fallback': True})
+            return
+
+        respond({
+            'retcode': retcode,
+            'prompt': bool(report_counts and sum(report_counts))})
+
+        if retcode:
+            return
+
+        try:
+            answer = receive()
+        except ValueError:
+            answer = {}
+
+        recorded = bool(answer.get('commit') and fingerprint)
+
+        if recorded:
+            set_last_successful_run(self.gitrepo, fingerprint)
+
+        respond({'recorded': recorded})
@@ -14,13 +14,24 @@ What is useful to a jig plugin author is the following:
 This module manipulates :py:class:`git.DiffIndex` objects and provides other
 utilities for discovering differences between two strings.
 
+Git itself is used to find the differences between two versions of a file,
+with Python's :py:class:`difflib.SequenceMatcher` as a fallback.
+
 .. _GitPython: https://github.com/gitpython-developers/GitPython
 """
-from os.path import islink
+import re
+import json
+from hashlib import sha1
+from os.path import islink, join
 from difflib import SequenceMatcher
+from threading import Lock
+
+from jig.exc import GitDiffError
+from jig.conf import CODEC, JIG_DEFAULT_DIFF_ALGORITHM
+from jig.gitutils.blobs import BlobReader
 
-from git.exc import BadObject
-from jig.conf import CODEC
+# Hunk header of a unified diff, like "@@ -12,3 +12,0 @@"
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
 
 
 def _make_unicode(string):
@@ -72,6 +83,343 @@ def describe_diff(a, b):
                 yield (idx + j1 + 1, '+', _make_unicode(line))
 
 
+def _strip_cr(line):
+    """
+    Remove the carriage return from the end of a line.
+    """
+    return line[:-1] if line.endswith('\r') else line
+
+
+def _git_lines(string):
+    """
+    Split a string into lines the same way Git does.
+
+    Only a newline ends a line, a carriage return before it is dropped.
+
+    :param str string: contents of a file
+    :rtype: list
+    """
+    lines = string.split('\n')
+
+    if lines[-1] == '':
+        # Ended with a newline, this isn't another line
+        lines.pop()
+
+    return [_strip_cr(i) for i in lines]
+
+
+def describe_patch(patch, b):
+    """
+    Converts the output of ``git diff -U0`` to the format of describe_diff.
+
+    ``patch`` is the unified diff, without any context lines, between the two
+    versions of a single file. ``b`` is the contents of the newer version, it
+    provides the lines that did not change.
+
+    Output is the same list of ``(line_number, diff_type, line)`` that
+    :py:func:`describe_diff` provides.
+    """
+    b = _git_lines(b)
+
+    # Index of the next line in b that has not been described
+    b_next = 0
+    in_hunk = False
+
+    for line in patch.split('\n'):
+        header = _HUNK_HEADER_RE.match(line)
+
+        if header:
+            in_hunk = True
+
+            a_start, a_len, b_start, b_len = [
+                int(i) if i is not None else 1 for i in header.groups()]
+
+            # Without any lines added, b_start is the line before the change
+            unchanged_until = b_start - 1 if b_len else b_start
+
+            for idx in range(b_next, unchanged_until):
+                yield (idx + 1, ' ', _make_unicode(b[idx]))
+
+            a_line, b_line = a_start, b_start
+            b_next = unchanged_until + b_len
+            continue
+
+        if not in_hunk:
+            # Still in the diff header
+            continue
+
+        if line.startswith('-'):
+            yield (a_line, '-', _make_unicode(_strip_cr(line[1:])))
+            a_line += 1
+        elif line.startswith('+'):
+            yield (b_line, '+', _make_unicode(_strip_cr(line[1:])))
+            b_line += 1
+
+    for idx in range(b_next, len(b)):
+        yield (idx + 1, ' ', _make_unicode(b[idx]))
+
+
+def limit_context(linediff, context):
+    """
+    Reduce a described diff to the changed lines and some lines around them.
+
+    ``linediff`` is the output of :py:func:`describe_diff` or
+    :py:func:`describe_patch`. Only ``context`` unchanged lines before and
+    after each change are kept, the same as ``git diff -U<context>``.
+
+    Returns a tuple of the reduced diff and a list of hunks. Each hunk
+    is ``[a_start, a_length, b_start, b_length]``, the same numbers found in
+    the header of a hunk in a unified diff.
+
+    Example::
+
+        >>> limit_context(describe_diff('a\\nb\\nc\\nd', 'a\\nb\\nc\\nD'), 1)
+        ([(3, ' ', 'c'), (4, '-', 'd'), (4, '+', 'D')], [[3, 2, 3, 2]])
+    """
+    linediff = list(linediff)
+
+    # How many unchanged lines away from a change each line is, looking
+    # backwards and then forwards
+    distance = [None] * len(linediff)
+    for indexes in (range(len(linediff)), reversed(range(len(linediff)))):
+        since_change = None
+        for idx in indexes:
+            if linediff[idx][1] != ' ':
+                since_change = 0
+            elif since_change is not None:
+                since_change += 1
+
+            if since_change is not None and (
+                    distance[idx] is None or since_change < distance[idx]):
+                distance[idx] = since_change
+
+    limited = []
+    hunks = []
+    hunk = None
+    # Line numbers of the last line in a and b that has been seen
+    a_line, b_line = 0, 0
+
+    for idx, (number, diff_type, line) in enumerate(linediff):
+        keep = distance[idx] is not None and distance[idx] <= context
+
+        if keep and hunk is None:
+            hunk = [a_line + 1, 0, b_line + 1, 0]
+            hunks.append(hunk)
+        elif not keep:
+            hunk = None
+
+        if diff_type != '+':
+            a_line += 1
+            if hunk:
+                hunk[1] += 1
+        if diff_type != '-':
+            b_line += 1
+            if hunk:
+                hunk[3] += 1
+
+        if keep:
+            limited.append((number, diff_type, line))
+
+    for hunk in hunks:
+        # Like unified diffs, an empty side starts at the line before it
+        if hunk[1] == 0:
+            hunk[0] -= 1
+        if hunk[3] == 0:
+            hunk[2] -= 1
+
+    return limited, hunks
+
+
+def _with_context(record, context):
+    """
+    Limit the diff of a file record from :py:meth:`GitDiffIndex.files`.
+
+    If ``context`` is None the record is returned as it is. Otherwise a copy
+    is returned with the diff limited by :py:func:`limit_context` and the
+    hunks in a ``hunks`` key.
+    """
+    if context is None:
+        return record
+
+    limited = dict(record)
+    limited['diff'], limited['hunks'] = limit_context(record['diff'], context)
+
+    return limited
+
+
+def _serializable(record):
+    """
+    Convert a file record from :py:meth:`GitDiffIndex.files` so it can be
+    passed to ``json.dumps``.
+    """
+    serializable = {
+        'type': unicode(record['type']),
+        'name': unicode(record['name']),
+        'filename': unicode(record['filename']),
+        'diff': [tuple(i) for i in record['diff']]}
+    if 'hunks' in record:
+        serializable['hunks'] = record['hunks']
+
+    return serializable
+
+
+def _compact(value):
+    """
+    Encode ``value`` as JSON without any unneeded whitespace.
+    """
+    return json.dumps(value, separators=(',', ':'))
+
+
+class _SharedFile(object):
+
+    """
+    A file record from :py:meth:`GitDiffIndex.files` shared by every plugin.
+
+    The record is only encoded as JSON the first time a plugin needs it.
+
+    """
+    __slots__ = ('name', 'record', '_encoded')
+
+    def __init__(self, record):
+        self.name = record['name']
+        self.record = record
+        self._encoded = None
+
+    @property
+    def encoded(self):
+        """
+        The record as compact JSON.
+        """
+        if self._encoded is None:
+            # Two plugins can get here at once, they'd encode the same thing
+            self._encoded = _compact(self.record)
+
+        return self._encoded
+
+
+class _SharedIterator(object):
+
+    """
+    Lets any number of threads iterate over the same iterator.
+
+    Each item is taken from the iterator once, by whichever reader gets to
+    it first, and kept for the others. If every reader is declared with
+    :py:meth:`expect` before they start, items are let go as soon as all of
+    them have read past them. Otherwise everything is kept.
+
+    """
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._items = []
+        # How many items have been let go from the front of _items
+        self._offset = 0
+        self._error = None
+        self._lock = Lock()
+        # Set once every expected reader is done
+        self.closed = False
+
+        # Readers that haven't started yet, None if nobody said who they are
+        self._expected = None
+        # Where each reader that has started is up to
+        self._positions = {}
+
+    def expect(self, reader):
+        """
+        Declare that ``reader`` is going to :py:meth:`read` these items.
+
+        Nothing is let go until every expected reader has started.
+        """
+        with self._lock:
+            if self._expected is None:
+                self._expected = set()
+            self._expected.add(reader)
+
+    def release(self, reader):
+        """
+        ``reader`` isn't going to read any more, it may never have started.
+        """
+        with self._lock:
+            if self._expected is not None:
+                self._expected.discard(reader)
+            self._positions.pop(reader, None)
+            self._trim()
+
+    def _trim(self):
+        """
+        Let go of the items every reader has read past.
+
+        Must be called with the lock held.
+        """
+        if self._expected is None or self._expected:
+            return
+
+        end = self._offset + len(self._items)
+        keep = min(self._positions.values()) if self._positions else end
+
+        del self._items[:keep - self._offset]
+        self._offset = keep
+
+        if not self._positions and not self.closed:
+            # Nobody is left to read the rest
+            self.closed = True
+            if hasattr(self._iterator, 'close'):
+                self._iterator.close()
+
+    def read(self, reader=None):
+        """
+        Iterate over every item as ``reader``.
+
+        :param reader: the same object given to :py:meth:`expect`
+        """
+        if reader is None:
+            reader = object()
+
+        with self._lock:
+            if self._offset or self.closed:
+                raise RuntimeError(
+                    'The items have been let go by the expected readers')
+
+            if self._expected is not None:
+                self._expected.discard(reader)
+            self._positions[reader] = 0
+
+        try:
+            position = 0
+
+            while True:
+                with self._lock:
+                    if position - self._offset == len(self._items):
+                        if self._error:
+                            raise self._error
+
+                        try:
+                            self._items.append(next(self._iterator))
+                        except StopIteration:
+                            return
+                        except Exception as e:
+                            # Everyone else reading gets the same error
+                            self._error = e
+                            raise
+
+                    item = self._items[position - self._offset]
+
+                yield item
+                position += 1
+
+                with self._lock:
+                    if reader in self._positions:
+                        # Unless it was released while it was still reading
+                        self._positions[reader] = position
+                        self._trim()
+        finally:
+            with self._lock:
+                self._positions.pop(reader, None)
+                self._trim()
+
+    def __iter__(self):
+        return self.read()
+
+
 class DiffType(object):
 
     """
@@ -112,60 +460,198 @@ class GitDiffIndex(object):
     The following information is extracted from the list
 
     """
-    def __init__(self, gitrepo, difflist):
+    def __init__(self, gitrepo, difflist,
+                 diff_algorithm=JIG_DEFAULT_DIFF_ALGORITHM,
+                 max_blob_size=None, root=None, blob_cache=None):
         """
         Where ``gitrepo`` is the path to the root of the Git repository.
+
+        The ``diff_algorithm`` is given to ``git diff --diff-algorithm`` to
+        describe the changes to a file, unless it is ``difflib``.
+
+        Files with a version larger than ``max_blob_size`` bytes are not read
+        and have an empty diff, like binary files.
+
+        If the files have been exported somewhere other than the working
+        directory, ``root`` is the directory they can be found in.
+
+        Blobs are read from the :py:class:`jig.gitutils.blobs.BlobCache`
+        ``blob_cache`` if it's given and already has them.
         """
         self.gitrepo = gitrepo
         self.difflist = difflist
+        self.diff_algorithm = diff_algorithm
+        self.max_blob_size = max_blob_size
+        self.root = root
+        self.blob_cache = blob_cache
+
+        # The described files are shared by every plugin
+        self._names = None
+        self._shared = {}
+        self._shared_lock = Lock()
 
-    def files(self):
+    def serializable_files(self, context=None):
         """
-        A generator for returning human-readable information about the diffs.
+        A list of :py:meth:`files` that can be passed to ``json.dumps``.
 
-        Generator yields dictionaries that contain filename, name, diff, and
-        type.
+        Values are converted to unicode and the diff generators are expanded
+        into lists. See :py:meth:`files` for ``context``.
+        """
+        return [_serializable(f) for f in self.files(context)]
 
-        ``filename`` is the absolute path to the file that was modified.
+    def _shared_files(self, context):
+        """
+        A :py:class:`_SharedFile` for each file, shared by every plugin.
 
-        ``name`` is the path of the file relative to the Git repository.
+        Files are read and described as they are needed, the first plugin to
+        get to a file does the work for everyone else. The files limited to a
+        ``context`` are made from the whole files so nothing is described
+        more than once.
 
-        ``diff`` is a list of ``(line_number, '+'|'-'|' ', line)`` describing
-        the changes that occurred between the a_blob and b_blob from the
-        commit.
+        :rtype: :py:class:`_SharedIterator`
+        """
+        # Before locking, the whole files are shared the same way
+        wholes = self._shared_files(None) if context is not None else None
 
-        ``type`` is ``added``, ``deleted``, ``renamed``, ``modified`` and
-        describes the overall action that occurred on this file.
+        with self._shared_lock:
+            if context not in self._shared:
+                if context is None:
+                    shared = (
+                        _SharedFile(_serializable(f)) for f in self.files())
+                else:
+                    shared = (
+                        _SharedFile(_with_context(i.record, context))
+                        for i in wholes.read(('context', context)))
 
-        This will skip symlinks and will not provide the contens of binary
-        files.
+                self._shared[context] = _SharedIterator(shared)
+
+            return self._shared[context]
+
+    def expect(self, reader, context=None):
         """
-        for diff in self.difflist:
-            a_blob = diff.a_blob
-            b_blob = diff.b_blob
+        Declare that ``reader`` is going to read the files.
+
+        Once every reader has been declared, the shared files are let go as
+        soon as all of them have read past them instead of being kept until
+        the index is. Every reader that's expected must be given to
+        :py:meth:`release` when it's done, whether it read anything or not.
+
+        :param reader: given to :py:meth:`iter_files_json` or
+            :py:meth:`file_records` as ``reader``
+        :param int context: lines of context the reader wants
+        """
+        if context is not None:
+            # The files limited to a context are read from the whole ones
+            self._shared_files(None).expect(('context', context))
+
+        self._shared_files(context).expect(reader)
+
+    def release(self, reader):
+        """
+        ``reader`` is done with the files, see :py:meth:`expect`.
+        """
+        with self._shared_lock:
+            shared = self._shared.items()
+
+        for context, i in shared:
+            i.release(reader)
+
+            if context is not None and i.closed:
+                # Nothing more is needed from the whole files for this one
+                self._shared[None].release(('context', context))
+
+    def iter_files_json(self, context=None, select=None, reader=None):
+        """
+        The :py:meth:`files` encoded as a JSON array, a piece at a time.
+
+        Nothing is read until it's asked for, so the pieces can be written to
+        a plugin while it's reading them. Each file is encoded once for every
+        ``context`` and re-used no matter how many plugins are being sent the
+        files. See :py:meth:`files` for ``context``.
+
+        If ``select`` is given only the files whose ``name`` it returns
+        ``True`` for are included.
+
+        :param int context: lines of context around each change
+        :param function select: callable given each file's ``name``
+        :param reader: who is reading, see :py:meth:`expect`
+        :rtype: generator of str
+        """
+        yield '['
+
+        first = True
+        for shared in self._shared_files(context).read(reader):
+            if select and not select(shared.name):
+                continue
+
+            if not first:
+                yield ','
+            first = False
 
-            a_data = ''
-            b_data = ''
+            yield shared.encoded
 
-            try:
-                a_data = a_blob.data_stream.read()
-            except (AttributeError, BadObject):
-                pass
+        yield ']'
 
-            try:
-                b_data = b_blob.data_stream.read()
-            except (AttributeError, BadObject):
-                pass
+    def files_json(self, context=None, select=None):
+        """
+        All of :py:meth:`iter_files_json` as one string.
+
+        :param int context: lines of context around each change
+        :param function select: callable given each file's ``name``
+        :rtype: str
+        """
+        return ''.join(self.iter_files_json(context, select))
+
+    def file_records(self, context=None, select=None, reader=None):
+        """
+        The :py:meth:`serializable_files` for plugins that run in-process.
+
+        The records are the same ones the other plugins are sent as JSON, so
+        the files are only read and described once no matter how many plugins
+        they are given to. Each call gets its own dictionaries and lists, the
+        lines in the ``diff`` are tuples that are shared.
+
+        :param int context: lines of context around each change
+        :param function select: callable given each file's ``name``
+        :param reader: who is reading, see :py:meth:`expect`
+        :rtype: list
+        """
+        records = []
+        for shared in self._shared_files(context).read(reader):
+            if select and not select(shared.name):
+                continue
+
+            record = dict(shared.record)
+            record['diff'] = list(record['diff'])
+            if 'hunks' in record:
+                record['hunks'] = [list(i) for i in record['hunks']]
+
+            records.append(record)
+
+        return records
+
+    def _filename(self, blob):
+        """
+        The absolute path to the file ``blob`` is a version of.
+        """
+        if self.root:
+            return join(self.root, blob.path)
 
-            if '\0' in a_data or '\0' in b_data:
-                # This file is binary? Probably.
-                linediff = []
-            else:
-                linediff = describe_diff(a_data, b_data)
+        return blob.abspath
+
+    def _entries(self):
+        """
+        List the diffs that are described by :py:meth:`files`.
 
-            blob = a_blob or b_blob
+        This will skip symlinks and anything in the .jig directory.
+
+        :returns: list of ``(diff, a_blob, b_blob)`` tuples
+        """
+        entries = []
+        for diff in self.difflist:
+            blob = diff.a_blob or diff.b_blob
 
-            if islink(blob.abspath):
+            if islink(self._filename(blob)):
                 # Skip symlinks
                 continue
 
@@ -173,8 +659,181 @@ class GitDiffIndex(object):
                 # This is a file that is part of .jig, ignore it
                 continue
 
-            yield {
-                'filename': blob.abspath,
-                'name': blob.path,
-                'diff': linediff,
-                'type': DiffType.for_diff(diff)}
+            entries.append((diff, diff.a_blob, diff.b_blob))
+
+        return entries
+
+    def names(self):
+        """
+        The ``name`` of each of the :py:meth:`files` without reading them.
+
+        :rtype: list
+        """
+        if self._names is None:
+            self._names = [(i[1] or i[2]).path for i in self._entries()]
+
+        return self._names
+
+    def fingerprint(self, select=None):
+        """
+        A SHA-1 identifying what :py:meth:`files` will describe.
+
+        The name, type and blob SHA's of each file are included along with
+        anything else that changes how the files are described. The ``root``
+        is not, it's usually a different temporary directory every time.
+
+        If ``select`` is given only the files whose ``name`` it returns
+        ``True`` for are included, see :py:meth:`files_json`.
+
+        :param function select: callable given each file's ``name``
+        :rtype: string
+        """
+        def part(value):
+            if isinstance(value, basestring):
+                return _make_unicode(value).encode(CODEC)
+            return str(value or '')
+
+        fingerprint = sha1()
+        for value in (self.gitrepo, self.diff_algorithm, self.max_blob_size):
+            fingerprint.update(part(value) + '\0')
+
+        for diff, a_blob, b_blob in self._entries():
+            name = (a_blob or b_blob).path
+
+            if select and not select(name):
+                continue
+
+            for value in (name, DiffType.for_diff(diff),
+                          a_blob and a_blob.hexsha, b_blob and b_blob.hexsha):
+                fingerprint.update(part(value) + '\0')
+
+        return fingerprint.hexdigest()
+
+    def _oversized(self, sizes, blob):
+        """
+        Is the blob larger than ``max_blob_size``.
+
+        :param dict sizes: blob SHA to size from :py:meth:`BlobReader.sizes`
+        :param git.objects.blob.Blob blob: the blob
+        """
+        if not self.max_blob_size:
+            return False
+
+        return (sizes.get(blob.hexsha) or 0) > self.max_blob_size
+
+    def _patches(self, reader, pairs):
+        """
+        Ask Git for the differences between each pair of blobs at once.
+
+        Returns a dictionary of the ``git diff -U0`` output by the pair's
+        ``(a_sha, b_sha)``. It's empty if Git isn't used or can't be.
+
+        :param BlobReader reader: for the repository the blobs are in
+        :param list pairs: ``(a_blob, b_blob)`` tuples
+        :rtype: dict
+        """
+        if self.diff_algorithm == 'difflib' or not pairs:
+            return {}
+
+        shas = [(a_blob.hexsha, b_blob.hexsha) for a_blob, b_blob in pairs]
+
+        try:
+            return dict(zip(shas, reader.diff(shas, self.diff_algorithm)))
+        except GitDiffError:
+            return {}
+
+    def _describe(self, a_blob, b_blob, a_data, b_data, patches):
+        """
+        Describe the differences between two versions of a file.
+
+        The differences Git found are used if both blobs exist and they are
+        in ``patches``, see :py:meth:`_patches`. If they aren't
+        :py:func:`describe_diff` is used instead.
+        """
+        if not (a_blob and b_blob):
+            # Added and deleted files are simple enough for difflib
+            return describe_diff(a_data, b_data)
+
+        patch = patches.get((a_blob.hexsha, b_blob.hexsha))
+
+        if patch is None:
+            return describe_diff(a_data, b_data)
+
+        return describe_patch(patch, b_data)
+
+    def files(self, context=None):
+        """
+        A generator for returning human-readable information about the diffs.
+
+        Generator yields dictionaries that contain filename, name, diff, and
+        type.
+
+        ``filename`` is the absolute path to the file that was modified.
+
+        ``name`` is the path of the file relative to the Git repository.
+
+        ``diff`` is a list of ``(line_number, '+'|'-'|' ', line)`` describing
+        the changes that occurred between the a_blob and b_blob from the
+        commit.
+
+        ``type`` is ``added``, ``deleted``, ``renamed``, ``modified`` and
+        describes the overall action that occurred on this file.
+
+        If ``context`` is given the ``diff`` only has the changed lines and
+        ``context`` unchanged lines around them instead of the whole file.
+        There is also a ``hunks`` list, see :py:func:`limit_context`.
+
+        This will skip symlinks and will not provide the contens of binary
+        files or files larger than ``max_blob_size``.
+        """
+        entries = self._entries()
+
+        blobs = [j for i in entries for j in i[1:] if j]
+
+        if not blobs:
+            return
+
+        reader = BlobReader(blobs[0].repo.git_dir, self.blob_cache)
+
+        # Sizes are known before anything is read, oversized blobs never are
+        sizes = reader.sizes(set([i.hexsha for i in blobs]))
+        readable = [i.hexsha for i in blobs if not self._oversized(sizes, i)]
+        contents = reader.read(readable)
+
+        # A single git diff describes every file that was modified
+        patches = self._patches(reader, [
+            (a_blob, b_blob) for diff, a_blob, b_blob in entries
+            if a_blob and b_blob and not self._oversized(sizes, a_blob) and
+            not self._oversized(sizes, b_blob)])
+
+        def data_for(blob):
+            if not blob:
+                return ''
+            if self._oversized(sizes, blob):
+                return None
+            return next(contents)[1] or ''
+
+        try:
+            for diff, a_blob, b_blob in entries:
+                a_data = data_for(a_blob)
+                b_data = data_for(b_blob)
+
+                if a_data is None or b_data is None:
+                    # Too large to bother describing
+                    linediff = []
+                elif '\0' in a_data or '\0' in b_data:
+                    # This file is binary? Probably.
+                    linediff = []
+                else:
+                    linediff = self._describe(
+                        a_blob, b_blob, a_data, b_data, patches)
+
+                blob = a_blob or b_blob
+
+                yield _with_context({
+                    'filename': self._filename(blob),
+                    'name': blob.path,
+                    'diff': linediff,
+                    'type': DiffType.for_diff(diff)}, context)
+        finally:
+            contents.close()
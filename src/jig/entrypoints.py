@@ -60,3 +60,12 @@ def coverage():
 
     cov.report()
     cov.html_report(directory='../cover')
+
+
+def bench():
+    """
+    Measure how long jig takes on synthetic Git repositories.
+    """
+    from jig.tests.bench import main
+
+    return main(sys.argv[1:])
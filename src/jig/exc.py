@@ -67,6 +67,24 @@ class GitCloneError(JigException):
     pass
 
 
+class GitCatFileError(JigException):
+
+    """
+    Reading objects from the Git repository with cat-file failed.
+
+    """
+    pass
+
+
+class GitDiffError(JigException):
+
+    """
+    Describing the differences between blobs with Git failed.
+
+    """
+    pass
+
+
 class GitWorkingDirectoryDirty(JigException):
 
     """
@@ -268,3 +286,21 @@ class ExpectationParsingError(ExpectationError):
 
     """
     pass
+
+
+class DaemonUnavailable(JigException):
+
+    """
+    The jig daemon for a Git repository could not be reached.
+
+    """
+    pass
+
+
+class DaemonError(JigException):
+
+    """
+    The jig daemon could not be started.
+
+    """
+    pass
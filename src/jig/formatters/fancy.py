@@ -1,6 +1,7 @@
 # coding=utf-8
 from jig.output import INFO, WARN, STOP
-from jig.formatters.utils import green_bold, yellow_bold, red_bold
+from jig.formatters.utils import (
+    green_bold, yellow_bold, red_bold, format_lines)
 
 OK_SIGN = u'\U0001f44c'
 ATTENTION = u'\U0001f449'
@@ -23,15 +24,49 @@ class FancyFormatter(object):
         :param function printer: called to send output to the view
         :param ResultsCollator collator: access to the results
         """
+        if not self._has_output(collator):
+            return self.end_stream(printer, collator)
+
+        # Order them from least specific to most specific, put the errors last
+        self._print_messages(printer, collator.iter_messages())
+
+        return self.end_stream(printer, collator)
+
+    def start_stream(self, printer):
+        """
+        Start printing results one plugin at a time.
+
+        Nothing is printed until a plugin reports something.
+
+        :param function printer: called to send output to the view
+        """
+        pass
+
+    def print_plugin(self, printer, collator):
+        """
+        Print the results of a single plugin as soon as it has finished.
+
+        :param function printer: called to send output to the view
+        :param ResultsCollator collator: the results of only that plugin
+        """
+        self._print_messages(printer, collator.iter_messages())
+
+    def end_stream(self, printer, collator):
+        """
+        Print the summary of all of the results after the last plugin.
+
+        :param function printer: called to send output to the view
+        :param ResultsCollator collator: access to all of the results
+        :returns: the number of info, warn and stop messages
+        :rtype: tuple
+        """
         plugins = collator.plugins
         errors = collator.errors
-        reporters = collator.reporters
 
         form = u'plugin' if len(plugins) == 1 else u'plugins'
 
-        if len(reporters) == 0 and len(errors) == 0:
+        if not self._has_output(collator):
             # Nothing to report
-            form = u'plugin' if len(plugins) == 1 else u'plugins'
             printer(
                 u'{ok_sign}  Jig ran {plen} {form}, '
                 u'nothing to report'.format(
@@ -40,30 +75,6 @@ class FancyFormatter(object):
             )
             return
 
-        # Gather the distinct message types from the results
-        cm, fm, lm = collator.messages
-
-        # Order them from least specific to most specific, put the errors last
-        messages = cm + fm + lm + errors
-
-        # How do our message types map to a symbol
-        type_to_symbol = {
-            INFO: green_bold(u'\u2713'),
-            WARN: yellow_bold(u'\u26a0'),
-            STOP: red_bold(u'\u2715')}
-
-        ic, wc, sc = (0, 0, 0)
-        last_plugin = None
-        for msg in messages:
-            if last_plugin != msg.plugin:
-                printer(u'\u25be  {0}'.format(msg.plugin.name))
-                printer('')
-                last_plugin = msg.plugin
-            colorized = u'{0}  {1}'.format(
-                type_to_symbol[msg.type], self._format_message(msg))
-            printer(colorized)
-            printer('')
-
         ic, wc, sc = [i[1] for i in collator.counts.items()]
         info = green_bold(ic) if ic else ic
         warn = yellow_bold(wc) if wc else wc
@@ -80,9 +91,50 @@ class FancyFormatter(object):
             printer(u'    ({ec} {form} reported errors)'.format(
                 ec=len(errors), form=form))
 
+        truncated = sum(collator.truncated.values())
+
+        if truncated:
+            printer(u'    ({tc} more {form} not shown)'.format(
+                tc=truncated,
+                form=u'message' if truncated == 1 else u'messages'))
+
+        skipped = collator.skipped
+
+        if len(skipped):
+            printer(u'    ({sl} {form} skipped after a stop)'.format(
+                sl=len(skipped),
+                form=u'plugin' if len(skipped) == 1 else u'plugins'))
+
         # Return the counts for the different types of messages
         return (ic, wc, sc)
 
+    def _has_output(self, collator):
+        """
+        Did any of the plugins report messages or errors.
+        """
+        return len(collator.reporters) > 0 or len(collator.errors) > 0
+
+    def _print_messages(self, printer, messages):
+        """
+        Print ``messages`` under the name of the plugin they came from.
+        """
+        # How do our message types map to a symbol
+        type_to_symbol = {
+            INFO: green_bold(u'\u2713'),
+            WARN: yellow_bold(u'\u26a0'),
+            STOP: red_bold(u'\u2715')}
+
+        last_plugin = None
+        for msg in messages:
+            if last_plugin != msg.plugin:
+                printer(u'\u25be  {0}'.format(msg.plugin.name))
+                printer('')
+                last_plugin = msg.plugin
+            colorized = u'{0}  {1}'.format(
+                type_to_symbol[msg.type], self._format_message(msg))
+            printer(colorized)
+            printer('')
+
     def _format_message(self, msg):
         """
         Formats a single message to a string.
@@ -91,7 +143,9 @@ class FancyFormatter(object):
         header = u''
         body = u''
 
-        if msg.line:
+        if msg.lines:
+            header += u'lines {0}: '.format(format_lines(msg.lines))
+        elif msg.line:
             header += u'line {0}: '.format(msg.line)
 
         if msg.file:
@@ -102,6 +156,9 @@ class FancyFormatter(object):
         else:
             body = u'{0}'.format(msg.body)
 
+        if msg.count > 1:
+            body += u' ({0} times)'.format(msg.count)
+
         if header:
             out.append(header)
 
@@ -0,0 +1,90 @@
+HEADINGS = (u'Plugin', u'Wall', u'User', u'Sys', u'Max RSS', u'Input')
+
+
+def _seconds(value):
+    """
+    Format a number of seconds, ``-`` if it wasn't measured.
+    """
+    if value is None:
+        return u'-'
+
+    return u'{0:.2f} s'.format(value)
+
+
+def _size(value):
+    """
+    Format a number of bytes, ``-`` if it wasn't measured.
+    """
+    if value is None:
+        return u'-'
+
+    if value < 1024:
+        return u'{0} B'.format(value)
+
+    if value < 1024 * 1024:
+        return u'{0:.1f} KB'.format(value / 1024.0)
+
+    return u'{0:.1f} MB'.format(value / 1024.0 / 1024.0)
+
+
+def profile_rows(collator):
+    """
+    The cost of each plugin, the one that took the longest first.
+
+    Plugins without a :py:class:`jig.plugins.usage.Usage` are listed last
+    as ``cached``, or ``skipped`` if they never ran.
+
+    :param ResultsCollator collator: access to the results
+    :rtype: list
+    """
+    usage = collator.usage
+
+    timed = sorted(usage.items(), key=lambda i: (-i[1].wall, i[0].name))
+
+    rows = []
+    for plugin, used in timed:
+        rows.append((
+            plugin.name, _seconds(used.wall), _seconds(used.user),
+            _seconds(used.sys),
+            _size(used.maxrss),
+            _size(used.payload)))
+
+    cached = sorted(
+        [i.name for i in collator.plugins if i not in usage])
+
+    rows.extend([(i, u'cached') for i in cached])
+    rows.extend([(i.name, u'skipped') for i in collator.skipped])
+
+    return rows
+
+
+def print_profile(printer, collator):
+    """
+    Print a table of how long each plugin took and what it used.
+
+    :param function printer: called to send output to the view
+    :param ResultsCollator collator: access to the results
+    """
+    rows = profile_rows(collator)
+
+    if not rows:
+        return
+
+    name_width = max([len(i[0]) for i in rows] + [len(HEADINGS[0])])
+
+    def line(row):
+        name, columns = row[0], row[1:]
+
+        if len(columns) == 1:
+            # Only a note, nothing was measured
+            return u'{0}  {1}'.format(name.ljust(name_width), columns[0])
+
+        return u'{0}  {1}'.format(
+            name.ljust(name_width),
+            u'  '.join([i.rjust(9) for i in columns]))
+
+    printer(u'')
+    printer(line(HEADINGS).rstrip())
+
+    for row in rows:
+        printer(line(row).rstrip())
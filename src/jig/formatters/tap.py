@@ -1,5 +1,6 @@
 # coding=utf-8
 from jig.output import INFO
+from jig.formatters.utils import format_lines
 
 
 def _format_description(message):
@@ -15,7 +16,8 @@ def _format_description(message):
 
     if message.file and message.line:
         description = u'{file}:{line}'.format(
-            file=message.file, line=message.line
+            file=message.file,
+            line=format_lines(message.lines) if message.lines else message.line
         )
 
     if not description:
@@ -35,12 +37,37 @@ def _escape_for_yaml(body):
     return u'"{0}"'.format(escaped_body)
 
 
-def _format_message(test_number, message):
+def _format_usage(usage):
+    """
+    YAML diagnostics for what it cost to run the plugin.
+
+    :param jig.plugins.usage.Usage usage: from the results, can be None
+    :rtype: list
+    """
+    if not usage:
+        return []
+
+    diagnostics = [(u'duration_ms', usage.wall)]
+
+    if usage.cpu is not None:
+        diagnostics.append((u'cpu_ms', usage.cpu))
+
+    lines = [u'  {0}: {1:.0f}'.format(name, seconds * 1000)
+             for name, seconds in diagnostics]
+
+    if usage.maxrss is not None:
+        lines.append(u'  max_rss_kb: {0}'.format(usage.maxrss // 1024))
+
+    return lines
+
+
+def _format_message(test_number, message, usage=None):
     """
     Format a single message suitable for TAP output.
 
     :param int test_number: the number of the test
     :param jig.output.Message message: the message to format
+    :param jig.plugins.usage.Usage usage: what it cost to run the plugin
     :rtype: str
     :returns: the formatted message
     """
@@ -58,17 +85,23 @@ def _format_message(test_number, message):
 
     lines.append(u'  plugin: {plugin}')
     lines.append(u'  severity: {type}')
-    lines.append(u'  ...')
 
-    return u'\n'.join(lines).format(
+    if message.count > 1:
+        # The same message was reported more than once
+        lines.append(u'  count: {count}')
+
+    formatted = u'\n'.join(lines).format(
         preamble=preamble,
         test_number=test_number,
         description=description,
         body=_escape_for_yaml(body),
         plugin=plugin,
-        type=message.type
+        type=message.type,
+        count=message.count
     )
 
+    return u'\n'.join([formatted] + _format_usage(usage) + [u'  ...'])
+
 
 class TapFormatter(object):
 
@@ -86,20 +119,61 @@ class TapFormatter(object):
         :param function printer: called to send output to the view
         :param ResultsCollator collator: access to the results
         """
-        errors = collator.errors
+        printer('TAP version 13')
+
+        # Messages that weren't kept are in the counts but aren't tests
+        printer('1..{0}'.format(collator.message_count))
+
+        self._print_comments(printer, collator)
+
+        for index, message in enumerate(collator.iter_messages()):
+            printer(_format_message(
+                index + 1, message, collator.usage.get(message.plugin)))
+
+    def start_stream(self, printer):
+        """
+        Start printing results one plugin at a time.
+
+        The plan is printed last, once it's known how many tests there are.
+
+        :param function printer: called to send output to the view
+        """
+        self._tests = 0
 
         printer('TAP version 13')
 
-        plan_sum = sum(collator.counts.values()) + len(errors)
+    def print_plugin(self, printer, collator):
+        """
+        Print the results of a single plugin as soon as it has finished.
+
+        :param function printer: called to send output to the view
+        :param ResultsCollator collator: the results of only that plugin
+        """
+        for message in collator.iter_messages():
+            self._tests += 1
 
-        printer('1..{0}'.format(plan_sum))
+            printer(_format_message(
+                self._tests, message, collator.usage.get(message.plugin)))
+
+    def end_stream(self, printer, collator):
+        """
+        Print the plan after the last plugin.
 
-        if plan_sum == 0:
-            return
+        :param function printer: called to send output to the view
+        :param ResultsCollator collator: access to all of the results
+        """
+        printer('1..{0}'.format(self._tests))
 
-        cm, fm, lm = collator.messages
+        self._print_comments(printer, collator)
 
-        messages = cm + fm + lm + errors
+    def _print_comments(self, printer, collator):
+        """
+        Comments for the plugins that were skipped or had messages cut off.
+        """
+        for plugin in collator.skipped:
+            printer(u'# Skipped {0}'.format(plugin.name))
 
-        for index in range(plan_sum):
-            printer(_format_message(index + 1, messages[index]))
+        for plugin, truncated in sorted(
+                collator.truncated.items(), key=lambda i: i[0].name):
+            printer(u'# {0} more messages from {1} not shown'.format(
+                truncated, plugin.name))
@@ -1,8 +1,14 @@
 # coding=utf-8
 from jig.tests import factory
+from jig.tests.mocks import MockPlugin
 from jig.tests.testcase import FormatterTestCase
 from jig.formatters.fancy import FancyFormatter, OK_SIGN, ATTENTION, EXPLODE
 
+try:
+    from collections import OrderedDict
+except ImportError:   # pragma: no cover
+    from ordereddict import OrderedDict
+
 
 class TestFancyFormatter(FormatterTestCase):
 
@@ -144,6 +150,115 @@ class TestFancyFormatter(FormatterTestCase):
             printed
         )
 
+    def test_skipped(self):
+        """
+        Plugins skipped after a stop are counted.
+        """
+        printed = self.run_formatter(factory.skipped_after_stop())
+
+        self.assertResults(
+            u"""
+            ▾  stopper
+
+            ✕  S
+
+            {0}  Jig ran 1 plugin
+                Info 0 Warn 0 Stop 1
+                (2 plugins skipped after a stop)
+            """.format(EXPLODE),
+            printed
+        )
+
+    def test_stream(self):
+        """
+        Each plugin is printed on its own and the summary is printed last.
+        """
+        printed = self.stream_formatter(factory.streamed())
+
+        self.assertResults(
+            u"""
+            ▾  first
+
+            ✓  a.txt
+                F
+
+            ⚠  line 1: a.txt
+                W
+
+            ▾  second
+
+            ✕  line 2: a.txt
+                S
+
+            {0}  Jig ran 2 plugins
+                Info 1 Warn 1 Stop 1
+                (1 plugin skipped after a stop)
+            """.format(EXPLODE),
+            printed
+        )
+
+    def test_stream_nothing_to_report(self):
+        """
+        Only the summary is printed if nothing was reported.
+        """
+        printed = self.stream_formatter(OrderedDict([
+            (MockPlugin(), (0, {u'a.txt': []}, ''))]))
+
+        self.assertResults(
+            u"""
+            {0}  Jig ran 1 plugin, nothing to report
+            """.format(OK_SIGN),
+            printed
+        )
+
+    def test_aggregated(self):
+        """
+        Messages reported more than once show how often and on which lines.
+        """
+        printed = self.run_formatter(factory.repeated(), aggregate=True)
+
+        self.assertResults(
+            u"""
+            ▾  noisy
+
+            ✓  a.txt
+                F (2 times)
+
+            ⚠  lines 1-3, 7: a.txt
+                W (4 times)
+
+            {0}  Jig ran 1 plugin
+                Info 2 Warn 4 Stop 1
+                (1 more message not shown)
+            """.format(EXPLODE),
+            printed
+        )
+
+    def test_message_records(self):
+        """
+        Messages that weren't kept are counted.
+        """
+        printed = self.run_formatter(factory.message_records())
+
+        self.assertResults(
+            u"""
+            ▾  lines
+
+            ✓  C
+
+            ⚠  a.txt
+                F
+
+            ✕  line 1: a.txt
+                L
+
+            {0}  Jig ran 1 plugin
+                Info 1 Warn 1 Stop 3
+                (2 more messages not shown)
+            """.format(EXPLODE),
+            printed
+        )
+
     def test_commit_specific_error(self):
         """
         Commit-specific error.
@@ -0,0 +1,59 @@
+from StringIO import StringIO
+
+from jig.tests import factory
+from jig.tests.testcase import JigTestCase
+from jig.output import ResultsCollator
+from jig.formatters.profile import print_profile, profile_rows
+
+
+class TestProfile(JigTestCase):
+
+    """
+    What each plugin cost can be shown after the results.
+
+    """
+    def test_rows(self):
+        """
+        The slowest plugins come first, the ones that weren't timed last.
+        """
+        rows = profile_rows(ResultsCollator(factory.with_usage()))
+
+        self.assertEqual(
+            [u'slow', u'inprocess', u'fast', u'cached', u'skipped'],
+            [i[0] for i in rows])
+        self.assertEqual(
+            (u'fast', u'0.25 s', u'0.12 s', u'0.00 s', u'2.0 MB', u'512 B'),
+            rows[2])
+        self.assertEqual(
+            (u'inprocess', u'0.50 s', u'-', u'-', u'-', u'-'), rows[1])
+        self.assertEqual((u'cached', u'cached'), rows[3])
+        self.assertEqual((u'skipped', u'skipped'), rows[4])
+
+    def test_print(self):
+        """
+        The costs are printed as a table.
+        """
+        collector = StringIO()
+        printer = lambda line: collector.write(unicode(line) + u'\n')
+
+        print_profile(printer, ResultsCollator(factory.with_usage()))
+
+        self.assertResults(
+            u"""
+            Plugin          Wall       User        Sys    Max RSS      Input
+            slow          1.50 s     1.00 s     0.25 s    10.0 MB     2.0 KB
+            inprocess     0.50 s          -          -          -          -
+            fast          0.25 s     0.12 s     0.00 s     2.0 MB      512 B
+            cached     cached
+            skipped    skipped""",
+            collector.getvalue())
+
+    def test_nothing_ran(self):
+        """
+        Nothing is printed without any plugins.
+        """
+        printed = []
+
+        print_profile(printed.append, ResultsCollator({}))
+
+        self.assertEqual([], printed)
@@ -262,6 +262,152 @@ class TestTapFormatter(FormatterTestCase):
             printed
         )
 
+    def test_skipped(self):
+        """
+        Plugins skipped after a stop are listed as comments.
+        """
+        printed = self.run_formatter(factory.skipped_after_stop())
+
+        self.assertResults(
+            u"""
+            TAP version 13
+            1..1
+            # Skipped skipped1
+            # Skipped skipped2
+            not ok 1 - S
+              ---
+              plugin: stopper
+              severity: stop
+              ...
+            """,
+            printed
+        )
+
+    def test_stream(self):
+        """
+        Tests are printed as each plugin finishes and the plan last.
+        """
+        printed = self.stream_formatter(factory.streamed())
+
+        self.assertResults(
+            u"""
+            TAP version 13
+            ok 1 - a.txt
+              ---
+              message: "F"
+              plugin: first
+              severity: info
+              ...
+            not ok 2 - a.txt:1
+              ---
+              message: "W"
+              plugin: first
+              severity: warn
+              ...
+            not ok 3 - a.txt:2
+              ---
+              message: "S"
+              plugin: second
+              severity: stop
+              ...
+            1..3
+            # Skipped skipped
+            """,
+            printed
+        )
+
+    def test_aggregated(self):
+        """
+        Messages reported more than once include how often.
+        """
+        printed = self.run_formatter(factory.repeated(), aggregate=True)
+
+        self.assertResults(
+            u"""
+            TAP version 13
+            1..2
+            # 1 more messages from noisy not shown
+            ok 1 - a.txt
+              ---
+              message: "F"
+              plugin: noisy
+              severity: info
+              count: 2
+              ...
+            not ok 2 - a.txt:1-3, 7
+              ---
+              message: "W"
+              plugin: noisy
+              severity: warn
+              count: 4
+              ...
+            """,
+            printed
+        )
+
+    def test_message_records(self):
+        """
+        Messages that weren't kept are listed as a comment.
+        """
+        printed = self.run_formatter(factory.message_records())
+
+        self.assertResults(
+            u"""
+            TAP version 13
+            1..3
+            # 2 more messages from lines not shown
+            ok 1 - C
+              ---
+              plugin: lines
+              severity: info
+              ...
+            not ok 2 - a.txt
+              ---
+              message: "F"
+              plugin: lines
+              severity: warn
+              ...
+            not ok 3 - a.txt:1
+              ---
+              message: "L"
+              plugin: lines
+              severity: stop
+              ...
+            """,
+            printed
+        )
+
+    def test_usage(self):
+        """
+        What each plugin cost is added to its diagnostics.
+        """
+        printed = self.run_formatter(factory.with_usage())
+
+        self.assertResults(
+            u"""
+            TAP version 13
+            1..2
+            # Skipped skipped
+            not ok 1 - W
+              ---
+              plugin: fast
+              severity: warn
+              duration_ms: 250
+              cpu_ms: 125
+              max_rss_kb: 2048
+              ...
+            ok 2 - I
+              ---
+              plugin: slow
+              severity: info
+              duration_ms: 1500
+              cpu_ms: 1250
+              max_rss_kb: 10240
+              ...
+            """,
+            printed
+        )
+
     def test_commit_specific_error(self):
         """
         Commit-specific error.
@@ -17,3 +17,12 @@ def red_bold(payload):
     Format payload as red.
     """
     return u'\x1b[31;1m{0}\x1b[39;22m'.format(payload)
+
+
+def format_lines(lines):
+    """
+    Format ``[first, last]`` ranges of lines like ``1-3, 7``.
+    """
+    return u', '.join([
+        unicode(first) if first == last else u'{0}-{1}'.format(first, last)
+        for first, last in lines])
@@ -0,0 +1,344 @@
+import re
+from os import environ
+from os.path import join, isdir
+from time import time
+from tempfile import mkdtemp
+from shutil import rmtree
+from subprocess import Popen, PIPE
+from threading import Thread, Lock
+
+from jig.exc import GitCatFileError, GitDiffError
+from jig.trace import record
+
+try:
+    from collections import OrderedDict
+except ImportError:   # pragma: no cover
+    from ordereddict import OrderedDict
+
+# Where the changes to each file start in the output of git diff, the files
+# are named after the position of the pair of blobs being compared
+_DIFF_HEADER_RE = re.compile(r'^diff --git a/(\d+) b/(\d+)$', re.MULTILINE)
+
+
+class BlobCache(object):
+
+    """
+    The contents of blobs that have been read, kept for the next time.
+
+    A blob never changes, so it's kept by its SHA until it's the least
+    recently used one and there are more than ``max_size`` bytes of them.
+
+    """
+    def __init__(self, max_size):
+        """
+        :param int max_size: how many bytes of blobs to keep
+        """
+        self.max_size = max_size
+        self.size = 0
+
+        self._blobs = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def get(self, sha):
+        """
+        The contents of the blob, ``None`` if they aren't kept.
+
+        :param string sha: hex SHA of the blob
+        """
+        with self._lock:
+            try:
+                data = self._blobs.pop(sha)
+            except KeyError:
+                return None
+
+            # Now the most recently used
+            self._blobs[sha] = data
+
+            return data
+
+    def set(self, sha, data):
+        """
+        Keep the contents of a blob.
+
+        :param string sha: hex SHA of the blob
+        :param str data: its contents
+        """
+        if len(data) > self.max_size:
+            return
+
+        with self._lock:
+            if sha in self._blobs:
+                self.size -= len(self._blobs.pop(sha))
+
+            self._blobs[sha] = data
+            self.size += len(data)
+
+            while self.size > self.max_size:
+                self.size -= len(self._blobs.popitem(last=False)[1])
+
+
+class BlobReader(object):
+
+    """
+    Reads the contents of blobs from a Git repository.
+
+    Instead of looking each object up one at a time, all of the requested
+    SHA's are streamed through a single ``git cat-file`` process.
+
+    """
+    def __init__(self, gitrepo, cache=None):
+        """
+        Where ``gitrepo`` is the path to the root of the Git repository.
+
+        Blobs that are in the :py:class:`BlobCache` ``cache`` aren't read
+        again, the ones that are read are added to it.
+        """
+        self.gitrepo = gitrepo
+        self.cache = cache
+
+    def _cached(self, shas):
+        """
+        The contents of the blobs that are in the cache by SHA.
+        """
+        if self.cache is None:
+            return {}
+
+        cached = {}
+        for sha in shas:
+            data = self.cache.get(sha)
+
+            if data is not None:
+                cached[sha] = data
+
+        return cached
+
+    def _cat_file(self, option, shas):
+        """
+        Start a ``git cat-file`` process and feed it ``shas``.
+
+        The SHA's are written from another thread so Git never waits on us to
+        read its output while we wait on it to read the next SHA.
+
+        Returns the process and the thread feeding it.
+        """
+        try:
+            process = Popen(
+                ['git', 'cat-file', option], stdin=PIPE, stdout=PIPE,
+                stderr=PIPE, cwd=self.gitrepo)
+        except OSError as ose:
+            raise GitCatFileError(str(ose))
+
+        # For tracing how long it ran once it's finished
+        process.started = time()
+        process.option = option
+
+        def feed():
+            try:
+                for sha in shas:
+                    process.stdin.write('{0}\n'.format(sha))
+                process.stdin.close()
+            except (IOError, ValueError):
+                # The reader went away before all the SHA's were requested
+                pass
+
+        feeder = Thread(target=feed)
+        feeder.daemon = True
+        feeder.start()
+
+        return process, feeder
+
+    def _finish(self, process, feeder):
+        """
+        Stop the ``git cat-file`` process if it's still running.
+        """
+        if process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+        process.wait()
+        feeder.join()
+
+        process.stdout.close()
+        process.stderr.close()
+
+        record(
+            u'git cat-file', 'git', process.started,
+            command=u'git cat-file {0}'.format(process.option))
+
+    def sizes(self, shas):
+        """
+        Find the size of each of the objects without reading them.
+
+        Returns a dictionary of SHA to size in bytes. Objects that do not
+        exist in the repository have a size of ``None``.
+
+        :param list shas: hex SHA strings of the objects
+        :rtype: dict
+        """
+        shas = list(shas)
+
+        sizes = dict([
+            (sha, len(data)) for sha, data in self._cached(shas).items()])
+
+        shas = [i for i in shas if i not in sizes]
+
+        if not shas:
+            return sizes
+
+        process, feeder = self._cat_file('--batch-check', shas)
+
+        try:
+            for sha in shas:
+                # Each line is "<sha> <type> <size>" or "<name> missing"
+                parts = process.stdout.readline().split()
+
+                if not parts:
+                    raise GitCatFileError(process.stderr.read())
+
+                sizes[sha] = int(parts[2]) if len(parts) == 3 else None
+        finally:
+            self._finish(process, feeder)
+
+        return sizes
+
+    def read(self, shas):
+        """
+        A generator for the contents of the objects, in the order requested.
+
+        Yields a ``(sha, data)`` tuple for each of ``shas``. If the object does
+        not exist in the repository ``data`` is ``None``.
+
+        Only one object is read into memory at a time. If the generator is
+        not exhausted the ``git cat-file`` process is killed when it's closed.
+
+        :param list shas: hex SHA strings of the objects
+        """
+        shas = list(shas)
+
+        cached = self._cached(shas)
+        missing = [i for i in shas if i not in cached]
+
+        if not missing:
+            for sha in shas:
+                yield sha, cached[sha]
+            return
+
+        process, feeder = self._cat_file('--batch', missing)
+
+        try:
+            for sha in shas:
+                if sha in cached:
+                    yield sha, cached[sha]
+                    continue
+
+                parts = process.stdout.readline().split()
+
+                if not parts:
+                    raise GitCatFileError(process.stderr.read())
+
+                if len(parts) != 3:
+                    # "<name> missing"
+                    yield sha, None
+                    continue
+
+                data = process.stdout.read(int(parts[2]))
+
+                # Each object is followed by a newline
+                process.stdout.read(1)
+
+                if self.cache is not None:
+                    self.cache.set(sha, data)
+
+                yield sha, data
+        finally:
+            self._finish(process, feeder)
+
+    def _objects(self):
+        """
+        The object directory of the repository.
+        """
+        dotgit = join(self.gitrepo, '.git')
+
+        return join(dotgit if isdir(dotgit) else self.gitrepo, 'objects')
+
+    def _git(self, args, env, stdin=None):
+        """
+        Run a Git command and return its output.
+        """
+        started = time()
+
+        try:
+            process = Popen(
+                ['git'] + args, stdin=PIPE, stdout=PIPE, stderr=PIPE,
+                cwd=self.gitrepo, env=env)
+        except OSError as ose:
+            raise GitDiffError(str(ose))
+
+        stdout, stderr = process.communicate(stdin)
+
+        record(
+            u'git {0}'.format(args[0]), 'git', started,
+            command=u' '.join(['git'] + args))
+
+        if process.returncode != 0:
+            raise GitDiffError(stderr)
+
+        return stdout
+
+    def diff(self, pairs, algorithm):
+        """
+        Describe the differences between each pair of blobs.
+
+        Instead of running ``git diff`` once for each pair, the blobs are put
+        in two trees that are compared with a single ``git diff -U0``. The
+        trees are written to a temporary object directory so nothing is
+        added to the repository.
+
+        Returns a list of unified diffs, without any context lines, in the
+        same order as ``pairs``. A pair of identical blobs has an empty diff.
+
+        :param list pairs: ``(a_sha, b_sha)`` tuples of hex SHA strings
+        :param string algorithm: given to ``git diff --diff-algorithm``
+        :rtype: list
+        """
+        pairs = list(pairs)
+
+        if not pairs:
+            return []
+
+        objects = mkdtemp()
+
+        env = dict(environ)
+        env['GIT_OBJECT_DIRECTORY'] = objects
+        env['GIT_ALTERNATE_OBJECT_DIRECTORIES'] = self._objects()
+
+        try:
+            trees = []
+            for side in (0, 1):
+                listing = ''.join([
+                    '100644 blob {0}\t{1}\n'.format(pair[side], index)
+                    for index, pair in enumerate(pairs)])
+
+                trees.append(self._git(['mktree'], env, listing).strip())
+
+            output = self._git([
+                'diff', '--no-color', '--no-ext-diff', '--no-textconv',
+                '--no-renames', '-U0',
+                '--diff-algorithm={0}'.format(algorithm)] + trees, env)
+        finally:
+            rmtree(objects, ignore_errors=True)
+
+        patches = [''] * len(pairs)
+
+        headers = list(_DIFF_HEADER_RE.finditer(output))
+        for number, header in enumerate(headers):
+            end = headers[number + 1].start() \
+                if number + 1 < len(headers) else len(output)
+
+            patches[int(header.group(1))] = output[header.start():end]
+
+        return patches
@@ -1,5 +1,7 @@
-from os import unlink
-from tempfile import mkstemp
+from os import fdopen, unlink, makedirs, symlink, chmod
+from os.path import dirname, isdir, join
+from tempfile import mkstemp, mkdtemp
+from shutil import rmtree
 from functools import partial
 from contextlib import contextmanager
 from collections import namedtuple
@@ -11,6 +13,8 @@ from jig.exc import (
     GitRevListFormatError, GitRevListMissing, GitWorkingDirectoryDirty,
     TrackingBranchMissing)
 from jig.gitutils.checks import working_directory_dirty
+from jig.gitutils.blobs import BlobReader
+from jig.trace import span
 
 
 def parse_rev_range(repository, rev_range):
@@ -45,22 +49,24 @@ def parse_rev_range(repository, rev_range):
 def _prepare_with_rev_range(repo, rev_range):
     # If a rev_range is specified then we need to make sure the working
     # directory is completely clean before continuing.
-    if rev_range and working_directory_dirty(repo.working_dir):
-        raise GitWorkingDirectoryDirty()
+    with span(u'prepare working directory'):
+        if rev_range and working_directory_dirty(repo.working_dir):
+            raise GitWorkingDirectoryDirty()
 
-    try:
-        head = repo.head.reference
-        return_to_normal = head.checkout
-    except TypeError:
-        head = repo.head.commit
-        return_to_normal = partial(repo.git.checkout, head.hexsha)
+        try:
+            head = repo.head.reference
+            return_to_normal = head.checkout
+        except TypeError:
+            head = repo.head.commit
+            return_to_normal = partial(repo.git.checkout, head.hexsha)
 
-    repo.git.checkout(rev_range.b.hexsha)
+        repo.git.checkout(rev_range.b.hexsha)
 
     try:
         yield head
     finally:
-        return_to_normal()
+        with span(u'restore working directory'):
+            return_to_normal()
 
 
 @contextmanager
@@ -72,8 +78,10 @@ def _prepare_against_staged_index(repo):
     """
     stash = None
 
-    if repo.is_dirty(index=False, working_tree=True, untracked_files=False):
-        stash = repo.git.stash('save', '--keep-index')
+    with span(u'prepare working directory'):
+        if repo.is_dirty(
+                index=False, working_tree=True, untracked_files=False):
+            stash = repo.git.stash('save', '--keep-index')
 
     try:
         yield stash
@@ -81,33 +89,173 @@ def _prepare_against_staged_index(repo):
         if not stash:
             return
 
-        os_handle, patchfile = mkstemp()
+        with span(u'restore working directory'):
+            os_handle, patchfile = mkstemp()
+
+            with open(patchfile, 'w') as fh:
+                repo.git.diff(
+                    '--color=never', '-R', 'stash@{0}',
+                    output_stream=fh)
+
+            repo.git.apply(patchfile)
+
+            unlink(patchfile)
+
+            repo.git.stash('drop', '-q')
+
+
+@contextmanager
+def _export_staged_index(repo):
+    """
+    Export the staged version of the changed files to a temporary directory.
+
+    The working directory is left alone. The temporary directory is yielded
+    and has the same layout as the Git repository, but only contains the files
+    that are added or modified in the index. It's removed afterwards.
+
+    :param git.Repo repo: Git repo
+    """
+    directory = mkdtemp()
+
+    try:
+        with span(u'prepare working directory'):
+            _checkout_staged_index(repo, directory)
+
+        yield directory
+    finally:
+        with span(u'restore working directory'):
+            rmtree(directory)
+
+
+def _checkout_staged_index(repo, directory):
+    """
+    Copy the staged version of the changed files into ``directory``.
 
-        with open(patchfile, 'w') as fh:
-            repo.git.diff(
-                '--color=never', '-R', 'stash@{0}',
-                output_stream=fh)
+    :param git.Repo repo: Git repo
+    :param string directory: where to put them
+    """
+    try:
+        paths = repo.git.diff(
+            '--cached', '--name-only', '--no-renames', '-z',
+            '--diff-filter=ACMT', 'HEAD').split('\0')
+    except GitCommandError:
+        # Nothing has been committed yet
+        paths = repo.git.ls_files('-z').split('\0')
 
-        repo.git.apply(patchfile)
+    paths = [i for i in paths if i]
 
-        unlink(patchfile)
+    if not paths:
+        return
 
-        repo.git.stash('drop', '-q')
+    os_handle, pathsfile = mkstemp()
+
+    with fdopen(os_handle, 'w') as fh:
+        fh.write('\0'.join(paths))
+
+    with open(pathsfile, 'r') as fh:
+        repo.git.checkout_index(
+            '--prefix={0}/'.format(directory), '-z', '--stdin',
+            istream=fh)
+
+    unlink(pathsfile)
 
 
 @contextmanager
-def prepare_working_directory(repository, rev_range=None):
+def _export_rev_range(repo, rev_range):
+    """
+    Export the files changed in a revision range to a temporary directory.
+
+    Nothing is checked out, the version of each added or modified file at the
+    end of the range is read from the object database. The working directory
+    can be dirty and several ranges can be exported at the same time.
+
+    The temporary directory is yielded and removed afterwards.
+
+    :param git.Repo repo: Git repo
+    :param RevRangePair rev_range:
+    """
+    directory = mkdtemp()
+
+    try:
+        with span(u'prepare working directory'):
+            _write_rev_range(repo, rev_range, directory)
+
+        yield directory
+    finally:
+        with span(u'restore working directory'):
+            rmtree(directory)
+
+
+def _write_rev_range(repo, rev_range, directory):
+    """
+    Write the files changed in a revision range into ``directory``.
+
+    :param git.Repo repo: Git repo
+    :param RevRangePair rev_range:
+    :param string directory: where to put them
+    """
+    # Lines like ":100644 100755 <a sha> <b sha> M" each followed by the path
+    raw = repo.git.diff_tree(
+        '-r', '-z', '--no-renames', '--diff-filter=ACMT',
+        rev_range.a.hexsha, rev_range.b.hexsha).split('\0')
+
+    changed = []
+    for header, path in zip(raw[0::2], raw[1::2]):
+        mode, sha = header.split()[1], header.split()[3]
+
+        if mode == '160000':
+            # Sub-modules are commits in another repository
+            continue
+
+        changed.append((mode, sha, path))
+
+    contents = BlobReader(repo.git_dir).read([i[1] for i in changed])
+
+    try:
+        for (mode, sha, path), (_, data) in zip(changed, contents):
+            filename = join(directory, path)
+
+            if not isdir(dirname(filename)):
+                makedirs(dirname(filename))
+
+            if mode == '120000':
+                symlink(data, filename)
+                continue
+
+            with open(filename, 'wb') as fh:
+                fh.write(data or '')
+
+            if mode == '100755':
+                chmod(filename, 0o755)
+    finally:
+        contents.close()
+
+
+@contextmanager
+def prepare_working_directory(repository, rev_range=None, export=False):
     """
     Use Git stash and checkout to prepare the working directory for a Jig run.
 
+    If ``export`` is ``True`` the working directory isn't touched. The staged
+    files, or the files changed in the ``rev_range``, are exported to a
+    temporary directory instead, which is yielded.
+
     :param string gitrepo: file path to the Git repository
     :param RevRangePair rev_range:
+    :param bool export: export the changed files instead of stashing or
+        checking out
     """
     repo = git.Repo(repository)
 
-    if rev_range:
+    if rev_range and export:
+        with _export_rev_range(repo, rev_range) as directory:
+            yield directory
+    elif rev_range:
         with _prepare_with_rev_range(repo, rev_range) as head:
             yield head
+    elif export:
+        with _export_staged_index(repo) as directory:
+            yield directory
     else:
         with _prepare_against_staged_index(repo) as stash:
             yield stash
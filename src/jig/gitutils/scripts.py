@@ -12,11 +12,17 @@ RUN_JIG_SCRIPT = \
     path.append('{gitdb_dir}')
     path.append('{smmap_dir}')
 
-    from jig.runner import Runner
+    from jig.client import fromhook
 
-    # Start up the runner, passing in the repo directory
-    jig = Runner()
-    jig.fromhook(join(dirname(__file__), '..', '..'))
+    gitrepo = join(dirname(__file__), '..', '..')
+
+    # Let jig daemon check the changes if it's running, it's already loaded
+    if not fromhook(gitrepo):
+        from jig.runner import Runner
+
+        # Start up the runner, passing in the repo directory
+        jig = Runner()
+        jig.fromhook(gitrepo)
     """).strip()
 
 AUTO_JIG_INIT_SCRIPT = \
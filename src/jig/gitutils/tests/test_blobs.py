@@ -0,0 +1,166 @@
+from os import listdir
+from os.path import join
+from tempfile import mkdtemp
+
+from git import Repo
+from mock import patch
+
+from jig.tests.testcase import JigTestCase
+from jig.exc import GitCatFileError, GitDiffError
+from jig.gitutils.blobs import BlobCache, BlobReader
+
+
+class TestBlobCache(JigTestCase):
+
+    """
+    Blobs that were read are kept up to a size.
+
+    """
+    def test_least_recently_used(self):
+        """
+        The blobs used least recently are let go first.
+        """
+        cache = BlobCache(6)
+
+        cache.set('a', 'aa')
+        cache.set('b', 'bb')
+        cache.set('c', 'cc')
+
+        self.assertEqual('aa', cache.get('a'))
+
+        cache.set('d', 'dd')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(['aa', 'cc', 'dd'], [cache.get(i) for i in 'acd'])
+        self.assertEqual(6, cache.size)
+
+    def test_too_large(self):
+        """
+        Blobs larger than the whole cache aren't kept.
+        """
+        cache = BlobCache(1)
+
+        cache.set('a', 'aa')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+
+class TestBlobReader(JigTestCase):
+
+    """
+    Blobs can be read with one git cat-file process.
+
+    """
+    def setUp(self):
+        super(TestBlobReader, self).setUp()
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.commit(self.gitrepodir, 'b.txt', 'bb\nbb\n')
+
+        tree = Repo(self.gitrepodir).head.commit.tree
+
+        self.a_sha = tree['a.txt'].hexsha
+        self.b_sha = tree['b.txt'].hexsha
+        self.missing_sha = '0' * 40
+
+        self.reader = BlobReader(self.gitrepodir)
+
+    def test_sizes(self):
+        """
+        Sizes are known without reading the objects.
+        """
+        self.assertEqual(
+            {self.a_sha: 2, self.b_sha: 6, self.missing_sha: None},
+            self.reader.sizes([self.a_sha, self.b_sha, self.missing_sha]))
+
+    def test_read(self):
+        """
+        Contents are in the order they were requested.
+        """
+        self.assertEqual(
+            [(self.b_sha, 'bb\nbb\n'),
+             (self.missing_sha, None),
+             (self.a_sha, 'a\n'),
+             (self.b_sha, 'bb\nbb\n')],
+            list(self.reader.read(
+                [self.b_sha, self.missing_sha, self.a_sha, self.b_sha])))
+
+    def test_read_nothing(self):
+        """
+        Nothing is started if there is nothing to read.
+        """
+        self.assertEqual({}, self.reader.sizes([]))
+        self.assertEqual([], list(self.reader.read([])))
+
+    def test_stops_early(self):
+        """
+        The reader can be closed before everything is read.
+        """
+        contents = self.reader.read([self.a_sha] * 1000)
+
+        self.assertEqual((self.a_sha, 'a\n'), next(contents))
+
+        contents.close()
+
+    def test_not_a_repository(self):
+        """
+        Reading outside of a Git repository is an error.
+        """
+        with self.assertRaises(GitCatFileError):
+            BlobReader(mkdtemp()).sizes([self.a_sha])
+
+    def test_diff(self):
+        """
+        Each pair of blobs is compared with one git diff.
+        """
+        objects = join(self.gitrepodir, '.git', 'objects')
+        before = sorted(listdir(objects))
+
+        patches = self.reader.diff(
+            [(self.a_sha, self.b_sha), (self.a_sha, self.a_sha),
+             (self.b_sha, self.a_sha)], 'myers')
+
+        self.assertEqual(3, len(patches))
+        self.assertIn('@@ -1 +1,2 @@\n-a\n+bb\n+bb\n', patches[0])
+        self.assertEqual('', patches[1])
+        self.assertIn('@@ -1,2 +1 @@\n-bb\n-bb\n+a\n', patches[2])
+
+        # The trees that were compared aren't kept in the repository
+        self.assertEqual(before, sorted(listdir(objects)))
+
+    def test_diff_nothing(self):
+        """
+        Nothing is started if there is nothing to compare.
+        """
+        self.assertEqual([], self.reader.diff([], 'myers'))
+
+    def test_diff_error(self):
+        """
+        Git not being able to compare the blobs is an error.
+        """
+        with self.assertRaises(GitDiffError):
+            self.reader.diff([(self.a_sha, self.b_sha)], 'unknown')
+
+    def test_cache(self):
+        """
+        Blobs in the cache aren't read again.
+        """
+        cache = BlobCache(1024)
+        reader = BlobReader(self.gitrepodir, cache)
+
+        self.assertEqual(
+            [(self.a_sha, 'a\n')], list(reader.read([self.a_sha])))
+        self.assertEqual('a\n', cache.get(self.a_sha))
+
+        with patch.object(reader, '_cat_file') as cat_file:
+            self.assertEqual(
+                [(self.a_sha, 'a\n')], list(reader.read([self.a_sha])))
+            self.assertEqual({self.a_sha: 2}, reader.sizes([self.a_sha]))
+
+        self.assertFalse(cat_file.called)
+
+        # Only the ones that aren't cached are read
+        self.assertEqual(
+            [(self.b_sha, 'bb\nbb\n'), (self.a_sha, 'a\n')],
+            list(reader.read([self.b_sha, self.a_sha])))
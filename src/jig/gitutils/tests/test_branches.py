@@ -1,5 +1,5 @@
-from os import unlink
-from os.path import join, isfile
+from os import unlink, walk, chmod, symlink, readlink, access, X_OK
+from os.path import join, isfile, isdir, relpath
 from contextlib import contextmanager
 from functools import partial
 from itertools import chain, combinations
@@ -13,7 +13,8 @@ from jig.exc import (
     TrackingBranchMissing)
 from jig.gitutils.branches import (
     parse_rev_range, prepare_working_directory,
-    _prepare_against_staged_index, _prepare_with_rev_range, Tracked)
+    _prepare_against_staged_index, _prepare_with_rev_range,
+    _export_staged_index, _export_rev_range, Tracked)
 
 
 @contextmanager
@@ -38,6 +39,20 @@ def assert_git_status_unchanged(repository):
     assert before == after, "Working directory status has changed"
 
 
+def exported(directory):
+    """
+    Map the relative path of each exported file to its content.
+
+    :param string directory: where the files were exported to
+    """
+    files = {}
+    for root, dirs, filenames in walk(directory):
+        for filename in filenames:
+            with open(join(root, filename)) as fh:
+                files[relpath(join(root, filename), directory)] = fh.read()
+    return files
+
+
 class PrepareTestCase(JigTestCase):
 
     """
@@ -259,6 +274,57 @@ class TestPrepareAgainstStagedIndex(PrepareTestCase):
             self.reset_gitrepo()
 
 
+class TestExportStagedIndex(PrepareTestCase):
+
+    """
+    Export the staged files instead of preparing the working directory.
+
+    """
+    def prepare_context_manager(self):
+        return _export_staged_index(self.repo)
+
+    def test_nothing_staged(self):
+        """
+        Nothing is exported if nothing is staged.
+        """
+        with self.prepare() as directory:
+            self.assertEqual({}, exported(directory))
+
+        # It's removed afterwards
+        self.assertFalse(isdir(directory))
+
+    def test_staged(self):
+        """
+        Only the staged versions of the changed files are exported.
+        """
+        self.stage(self.gitrepodir, 'a.txt', 'aa')
+        self.stage(self.gitrepodir, 'f/g.txt', 'g')
+        self.modify_file(self.gitrepodir, 'a.txt', 'aaa')
+        self.modify_file(self.gitrepodir, 'b.txt', 'bb')
+        self.stage_remove(self.gitrepodir, 'c.txt')
+        self.create_file(self.gitrepodir, 'e.txt', 'e')
+
+        with self.prepare() as directory:
+            self.assertEqual(
+                {'a.txt': 'aa', join('f', 'g.txt'): 'g'},
+                exported(directory))
+
+        # The working directory is left alone
+        with open(join(self.gitrepodir, 'a.txt')) as fh:
+            self.assertEqual('aaa', fh.read())
+
+    def test_first_commit(self):
+        """
+        Staged files are exported before anything has been committed.
+        """
+        del self.gitrepodir
+
+        self.stage(self.gitrepodir, 'a.txt', 'a')
+
+        with self.prepare() as directory:
+            self.assertEqual({'a.txt': 'a'}, exported(directory))
+
+
 class TestPrepareWithRevRange(PrepareTestCase):
 
     """
@@ -361,6 +427,94 @@ class TestPrepareWithRevRange(PrepareTestCase):
         )
 
 
+class TestExportRevRange(PrepareTestCase):
+
+    """
+    Export the files changed in a revision range without checking out.
+
+    """
+    def prepare_context_manager(self):
+        rev_range_parsed = parse_rev_range(
+            self.repo.working_dir,
+            self.rev_range
+        )
+
+        return _export_rev_range(self.repo, rev_range_parsed)
+
+    def test_range(self):
+        """
+        The files changed in the range are exported.
+        """
+        self.rev_range = 'HEAD~2..HEAD~0'
+
+        with self.prepare() as directory:
+            self.assertEqual(
+                {'c.txt': 'c', 'd.txt': 'd'}, exported(directory))
+
+        self.assertFalse(isdir(directory))
+
+    def test_dirty_working_directory(self):
+        """
+        Dirty working directories are fine and left alone.
+        """
+        self.rev_range = 'HEAD~1..HEAD~0'
+
+        self.stage(self.gitrepodir, 'a.txt', 'aa')
+        self.modify_file(self.gitrepodir, 'd.txt', 'dd')
+
+        with self.prepare() as directory:
+            self.assertEqual({'d.txt': 'd'}, exported(directory))
+
+        self.assertEqual(
+            self.commits[-1], Repo(self.gitrepodir).head.commit)
+
+    def test_removed(self):
+        """
+        Removed files are not exported, modified and new ones are.
+        """
+        self.stage_remove(self.gitrepodir, 'a.txt')
+        self.stage(self.gitrepodir, 'b.txt', 'bb')
+        self.commit(self.gitrepodir, 'f/g.txt', 'g')
+
+        self.rev_range = 'HEAD~1..HEAD~0'
+
+        with self.prepare() as directory:
+            self.assertEqual(
+                {'b.txt': 'bb', join('f', 'g.txt'): 'g'},
+                exported(directory))
+
+    def test_modes(self):
+        """
+        Executable files and symlinks are exported as such.
+        """
+        self.create_file(self.gitrepodir, 'run.sh', '#!/bin/sh')
+        chmod(join(self.gitrepodir, 'run.sh'), 0o755)
+        symlink('a.txt', join(self.gitrepodir, 'link.txt'))
+
+        repo = Repo(self.gitrepodir)
+        repo.git.add('run.sh', 'link.txt')
+        repo.git.commit('-m', 'modes')
+
+        self.rev_range = 'HEAD~1..HEAD~0'
+
+        with self.prepare() as directory:
+            self.assertTrue(access(join(directory, 'run.sh'), X_OK))
+            self.assertEqual('a.txt', readlink(join(directory, 'link.txt')))
+
+    def test_several_ranges(self):
+        """
+        More than one range can be exported at the same time.
+        """
+        self.rev_range = 'HEAD~1..HEAD~0'
+
+        with self.prepare() as first:
+            self.rev_range = 'HEAD~2..HEAD~1'
+
+            with self.prepare() as second:
+                self.assertEqual({'d.txt': 'd'}, exported(first))
+                self.assertEqual({'c.txt': 'c'}, exported(second))
+
+
 class TestPrepareWorkingDirectory(JigTestCase):
 
     """
@@ -387,6 +541,39 @@ class TestPrepareWorkingDirectory(JigTestCase):
 
         self.assertTrue(p.return_value.__enter__.called)
 
+    def test_export(self):
+        """
+        Should export the staged files if asked to.
+        """
+        prepare_function = 'jig.gitutils.branches._export_staged_index'
+
+        with patch(prepare_function) as p:
+            p.return_value = MagicMock()
+
+            with prepare_working_directory(self.gitrepodir, export=True):
+                pass
+
+        self.assertTrue(p.return_value.__enter__.called)
+
+    def test_export_rev_range(self):
+        """
+        Should export the files changed in the rev range if asked to.
+        """
+        prepare_function = 'jig.gitutils.branches._export_rev_range'
+
+        with patch(prepare_function) as p:
+            p.return_value = MagicMock()
+
+            rev_range_parsed = parse_rev_range(
+                self.gitrepodir, 'HEAD~1..HEAD~0'
+            )
+
+            with prepare_working_directory(
+                    self.gitrepodir, rev_range_parsed, export=True):
+                pass
+
+        self.assertTrue(p.return_value.__enter__.called)
+
     def test_rev_range(self):
         """
         Should checkout the Git repo at the end of the rev range.
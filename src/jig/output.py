@@ -1,7 +1,7 @@
 # coding=utf-8
 import sys
 import codecs
-from functools import wraps
+from itertools import chain
 from StringIO import StringIO
 from contextlib import contextmanager
 
@@ -60,6 +60,28 @@ def lookup_type(strtype):
     return INFO
 
 
+def _add_line(lines, line):
+    """
+    Add ``line`` to the ``[first, last]`` ranges of ``lines``.
+
+    :param list lines: ranges in the order the lines were reported
+    :param int line: the line number
+    """
+    last = lines[-1]
+
+    if not isinstance(line, (int, long)) or \
+            not isinstance(last[1], (int, long)):
+        # Not a number, can't be part of a range
+        lines.append([line, line])
+    elif last[0] <= line <= last[1]:
+        # Already covered
+        return
+    elif line == last[1] + 1:
+        last[1] = line
+    else:
+        lines.append([line, line])
+
+
 def _get_hint(hint):
     """
     Retrieves a hint by the given name from :module:`jig.commands.hints`.
@@ -84,12 +106,116 @@ def utf8_writer(filelike):
     return codecs.getwriter('utf_8')(filelike)
 
 
+class MessageRecords(list):
+
+    """
+    Messages a plugin wrote one per line, as ``[file, line, type, body]``.
+
+    ``file`` and ``line`` are ``None`` for messages that aren't about a file
+    or a line. Anything that couldn't be read as a message is kept as it was
+    written.
+
+    Only some of the messages may have been kept, :py:attr:`truncated` is how
+    many more of each type there were. The same message may have been kept
+    once, :py:attr:`repeated` is how often it was written.
+
+    """
+    def __init__(self, records=(), truncated=None, repeated=None):
+        super(MessageRecords, self).__init__(records)
+
+        self.truncated = dict(truncated or {})
+        # [count, lines] by the index of records written more than once,
+        # lines are [first, last] ranges like Message.lines
+        self.repeated = dict(repeated or {})
+
+        # The index of each record by what makes it the same as another
+        self._indexes = {}
+
+    def add(self, record, limit=None, aggregate=False):
+        """
+        Keep ``record``, or only count it if there are ``limit`` already.
+
+        With ``aggregate`` a record with the same file, type and body as one
+        that was already kept is only counted in :py:attr:`repeated`, the
+        same way :py:class:`ResultsCollator` would, and ``limit`` is how many
+        different records are kept.
+
+        :param record: a ``[file, line, type, body]`` list
+        :param int limit: how many records to keep, ``None`` for all of them
+        :param bool aggregate: keep the same record only once
+        """
+        valid = isinstance(record, list) and len(record) == 4
+
+        key = None
+        if aggregate and valid:
+            filename, line, mtype, body = record
+
+            if filename is None:
+                # Commit specific, the line doesn't matter
+                line = None
+
+            key = (filename, lookup_type(mtype), body, line is None)
+
+            try:
+                index = self._indexes.get(key)
+            except TypeError:
+                # The body isn't something that can be compared this way
+                key = index = None
+
+            if index is not None:
+                self._repeat(index, line)
+                return
+
+        if limit is None or len(self) < limit:
+            if key is not None:
+                self._indexes[key] = len(self)
+
+            self.append(record)
+            return
+
+        if not valid:
+            # Not a message, nothing to count
+            return
+
+        mtype = lookup_type(record[2])
+        self.truncated[mtype] = self.truncated.get(mtype, 0) + 1
+
+    def _repeat(self, index, line):
+        """
+        The record at ``index`` was written again, on ``line``.
+        """
+        try:
+            repeated = self.repeated[index]
+        except KeyError:
+            repeated = self.repeated[index] = [1, None]
+
+        repeated[0] += 1
+
+        if line is None:
+            return
+
+        if repeated[1] is None:
+            first = self[index][1]
+            repeated[1] = [[first, first]]
+
+        _add_line(repeated[1], line)
+
+
 class Message(object):
 
     """
     Represents one message that a plugin is communicating to the user.
 
+    A large run can report hundreds of thousands of these, so they don't have
+    a ``__dict__``.
+
+    The same message reported more than once is kept once, :py:attr:`count`
+    is how many times it was reported and :py:attr:`lines` the ``[first,
+    last]`` ranges of lines it was reported on.
+
     """
+    __slots__ = ('plugin', '_type', 'body', 'file', 'line', 'count', 'lines')
+
     def __init__(self, plugin, type=INFO, body='', file=None, line=None):
         """
         Create a message object associated with a plugin.
@@ -104,6 +230,9 @@ class Message(object):
         self.file = file
         self.line = line
 
+        self.count = 1
+        self.lines = None
+
     def __repr__(self):
         reprstr = '<{cls} type="{t}", body={b}, file={f}, line={l}>'
         return reprstr.format(
@@ -124,6 +253,22 @@ class Message(object):
             return False
         return True
 
+    def repeat(self, line=None):
+        """
+        The same message was reported again, on ``line`` if it's given.
+
+        :param int line: where it was reported
+        """
+        self.count += 1
+
+        if line is None:
+            return
+
+        if self.lines is None:
+            self.lines = [[self.line, self.line]]
+
+        _add_line(self.lines, line)
+
     @property
     def type(self):
         return self._type
@@ -139,6 +284,8 @@ class Error(Message):
     An error message related to a plugin's results.
 
     """
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         if 'type' not in kwargs:
             # Default to stop for errors
@@ -220,29 +367,70 @@ class ResultsCollator(object):
     """
     Collects and combines plugin results into a unified summary.
 
+    Each plugin keeps at most its ``max_messages``, and all of them together
+    at most ``limit``. The ones past that are only counted, see
+    :py:attr:`truncated`.
+
     """
-    def __init__(self, results):
-        # Decorate our message methods
-        setattr(
-            self, '_commit_specific_message',
-            self.iterresults(self._commit_specific_message))
-        setattr(
-            self, '_file_specific_message',
-            self.iterresults(self._file_specific_message))
-        setattr(
-            self, '_line_specific_message',
-            self.iterresults(self._line_specific_message))
-
-        self._results = results
+    def __init__(self, results, limit=None, aggregate=False):
+        """
+        Collate ``results``.
+
+        :param dict results: ``(retcode, stdout, stderr)`` by plugin, or
+            ``None`` for plugins that were skipped
+        :param int limit: how many messages to keep for all of the plugins,
+            ``None`` for all of them
+        :param bool aggregate: keep the same message from a plugin, about
+            the same file, only once along with how often it was reported
+        """
+        self._usage = dict([
+            (plugin, result.usage) for plugin, result in results.items()
+            if getattr(result, 'usage', None)])
         self._plugins = set()
         self._reporters = set()
         self._counts = {INFO: 0, WARN: 0, STOP: 0}
+        self._plugin_counts = {}
         self._errors = []
+        self._skipped = []
+        self._truncated = {}
+
+        self._cm = []
+        self._fm = []
+        self._lm = []
+
+        self._by_plugin = {}
+        self._by_file = {}
+        self._by_line = {}
+
+        # Filenames are repeated in many messages, they share one string
+        self._filenames = {}
+
+        self._limit = limit
+        self._kept = {}
+        self._total = 0
+        self._aggregated = {} if aggregate else None
+
+        # Pre-compute our messages (collate), each result is only looked at
+        # once and never changed
+        for plugin, result in results.items():
+            if result is None:
+                self._skipped.append(plugin)
+                continue
 
-        # Pre-compute our messages (collate)
-        self._cm = list(self._commit_specific_message())
-        self._fm = list(self._file_specific_message())
-        self._lm = list(self._line_specific_message())
+            self._plugins.add(plugin)
+
+            retcode, stdout, stderr = result
+
+            if not retcode == 0:
+                self._errors.append(Error(plugin, body=stderr or stdout))
+                continue
+
+            for message in self._collate(plugin, stdout):
+                if isinstance(message, Error):
+                    self._errors.append(message)
+                    continue
+
+                self._add(message)
 
     @property
     def messages(self):
@@ -252,8 +440,7 @@ class ResultsCollator(object):
         Return a tuple of messages by type based on the results that were
         provided when initializing the collator.
 
-        Each tuple contains a generator object which will return
-        ``jig.output.Message`` objects.
+        Each tuple contains a list of ``jig.output.Message`` objects.
 
         The tuple has a length of 3 and is in this order:
 
@@ -263,6 +450,53 @@ class ResultsCollator(object):
         """
         return (self._cm, self._fm, self._lm)
 
+    def iter_messages(self):
+        """
+        Iterate over all of the messages and then the errors.
+
+        The same order as the :py:attr:`messages` followed by the
+        :py:attr:`errors` without copying them into a new list.
+        """
+        return chain(self._cm, self._fm, self._lm, self._errors)
+
+    @property
+    def message_count(self):
+        """
+        How many items :py:meth:`iter_messages` has.
+        """
+        return (
+            len(self._cm) + len(self._fm) + len(self._lm) + len(self._errors))
+
+    @property
+    def by_plugin(self):
+        """
+        Messages grouped by the plugin that reported them.
+
+        Returns a dictionary of lists of ``jig.output.Message`` objects by
+        plugin, in the order each plugin reported them. Plugins without any
+        messages aren't included.
+        """
+        return self._by_plugin
+
+    @property
+    def by_file(self):
+        """
+        File and line specific messages grouped by filename.
+
+        Returns a dictionary of lists of ``jig.output.Message`` objects.
+        """
+        return self._by_file
+
+    @property
+    def by_line(self):
+        """
+        Line specific messages grouped by filename and line number.
+
+        Returns a dictionary of lists of ``jig.output.Message`` objects, the
+        keys are ``(filename, line)`` tuples.
+        """
+        return self._by_line
+
     @property
     def plugins(self):
         """
@@ -277,9 +511,6 @@ class ResultsCollator(object):
     def reporters(self):
         """
         Provides a set of plugins that yielded messages.
-
-        This method will only provide something other than an empty set when
-        the commit, file, or line specific message methods have been called.
         """
         return self._reporters
 
@@ -294,6 +525,16 @@ class ResultsCollator(object):
         """
         return self._counts
 
+    @property
+    def plugin_counts(self):
+        """
+        Tally of the type of messages from each plugin.
+
+        Returns a dictionary of dictionaries like :py:attr:`counts` by plugin.
+        Plugins without any messages aren't included.
+        """
+        return self._plugin_counts
+
     @property
     def errors(self):
         """
@@ -306,46 +547,155 @@ class ResultsCollator(object):
         """
         return self._errors
 
-    def iterresults(self, func):
+    @property
+    def skipped(self):
         """
-        Decorator that iterates through results.
+        Plugins that didn't run because another one stopped the commit.
 
-        This simplifies some of the boilerplate for our collation. The
-        decorated function must be a generator that yields ``Message`` or
-        ``Error`` object. It will sift errors and collect those into a separate
-        container. The ``Message`` objects then be returned to the caller.
+        A plugin's result is ``None`` when it was skipped, see
+        :py:meth:`jig.runner.Runner.results`.
+
+        Returns a list of plugins in the order they were given.
         """
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            for plugin, result in self._results.items():
-                self._plugins.add(plugin)
+        return self._skipped
 
-                retcode, stdout, stderr = result
+    @property
+    def truncated(self):
+        """
+        How many messages were not kept for each plugin.
 
-                if not retcode == 0:
-                    error = Error(plugin)
-                    error.body = stderr or stdout
-                    self._errors.append(error)
-                    # Remove this plugin since it's an error. If we don't do
-                    # this we'll end up reporting on this 3 times.
-                    del self._results[plugin]
-                    continue
+        Messages are cut off when a plugin reports more than its
+        ``max_messages``, or all of them together more than the ``limit``
+        given to the collator. The messages that weren't kept are still
+        included in the :py:attr:`counts`.
 
-                for message in list(func(plugin, stdout)):
-                    if isinstance(message, Error):
-                        self._errors.append(message)
-                        try:
-                            del self._results[plugin]
-                        except KeyError:
-                            pass
-                        continue   # pragma: no cover
-                    self._reporters.add(plugin)
-                    self._counts[message.type] += 1
-                    yield message
+        Returns a dictionary of numbers by plugin.
+        """
+        return self._truncated
 
-        return wrapper
+    @property
+    def usage(self):
+        """
+        What it cost to run each plugin.
+
+        Returns a dictionary of :py:class:`jig.plugins.usage.Usage` objects
+        by plugin. Plugins whose results came from the cache aren't included.
+        """
+        return self._usage
 
-    def _commit_specific_message(self, plugin, obj):
+    def _count(self, plugin, mtype, count=1):
+        """
+        Add ``count`` messages of type ``mtype`` to the tallies.
+        """
+        try:
+            counts = self._plugin_counts[plugin]
+        except KeyError:
+            counts = self._plugin_counts[plugin] = {INFO: 0, WARN: 0, STOP: 0}
+
+        counts[mtype] += count
+        self._counts[mtype] += count
+
+    def _keep(self, plugin):
+        """
+        Is there room for another message from ``plugin``.
+        """
+        kept = self._kept.get(plugin, 0)
+        limit = getattr(plugin, 'max_messages', None)
+
+        if limit is not None and kept >= limit:
+            return False
+
+        if self._limit is not None and self._total >= self._limit:
+            return False
+
+        self._kept[plugin] = kept + 1
+        self._total += 1
+
+        return True
+
+    def _add(self, message):
+        """
+        Put ``message`` in its place in the messages and indexes.
+
+        It's always counted, even when it's the same as an earlier message or
+        there are already enough messages.
+        """
+        plugin = message.plugin
+
+        self._reporters.add(plugin)
+        self._count(plugin, message.type, message.count)
+
+        if message.file is not None:
+            message.file = self._filenames.setdefault(
+                message.file, message.file)
+
+        key = None
+        if self._aggregated is not None:
+            key = (plugin, message.type, message.body, message.file,
+                   message.line is None)
+
+            try:
+                same = self._aggregated.get(key)
+            except TypeError:
+                # The body isn't something that can be compared this way
+                key = same = None
+
+            if same is not None:
+                same.repeat(message.line)
+
+                if message.line is not None:
+                    self._by_line.setdefault(
+                        (message.file, message.line), []).append(same)
+                return
+
+        if not self._keep(plugin):
+            self._truncated[plugin] = \
+                self._truncated.get(plugin, 0) + message.count
+            return
+
+        if key is not None:
+            self._aggregated[key] = message
+
+        if message.line is not None:
+            self._lm.append(message)
+            self._by_line.setdefault(
+                (message.file, message.line), []).append(message)
+
+            for first, last in message.lines or ():
+                # Aggregated when it was read, see MessageRecords
+                lines = [first] if first == last else range(first, last + 1)
+
+                for line in lines:
+                    if line != message.line:
+                        self._by_line.setdefault(
+                            (message.file, line), []).append(message)
+        elif message.file is not None:
+            self._fm.append(message)
+        else:
+            self._cm.append(message)
+
+        if message.file is not None:
+            self._by_file.setdefault(message.file, []).append(message)
+
+        self._by_plugin.setdefault(plugin, []).append(message)
+
+    def _collate(self, plugin, obj):
+        """
+        Turn the output of a plugin into ``Message`` and ``Error`` objects.
+
+        Plugins can report commit specific messages as a list, file and line
+        specific messages as a dictionary by filename, or write all of them
+        one per line, see :py:class:`MessageRecords`.
+        """
+        if isinstance(obj, MessageRecords):
+            return self._record_messages(plugin, obj)
+
+        if isinstance(obj, dict):
+            return self._file_messages(plugin, obj)
+
+        return self._commit_messages(plugin, obj)
+
+    def _commit_messages(self, plugin, obj):
         """
         Look for plugins that are reporting generic messages.
 
@@ -360,10 +710,6 @@ class ResultsCollator(object):
             # This is falsy, there is nothing of interest here
             return
 
-        if isinstance(obj, dict):
-            # This is for file or line specific messages
-            return
-
         if isinstance(obj, basestring):
             # Straight up message, normalize this for our loop
             obj = [obj]
@@ -390,19 +736,20 @@ class ResultsCollator(object):
         # This object is not understood
         yield Error(plugin, body=obj)
 
-    def _file_specific_message(self, plugin, obj):
+    def _file_messages(self, plugin, obj):
         """
-        Look for plugins that are reporting file specific messages.
+        Look for plugins that are reporting file and line specific messages.
 
-        These messages are specific to a file but not necessarily to a line
-        number. In general they apply to a condition that is present that
+        File specific messages apply to a condition that is present that
         affects the whole file. An example of this would be detecting
         underscores or camel case in the filename.
-        """
-        if not isinstance(obj, dict):
-            # This is not a file specific messages
-            return
 
+        For plugins wishing to identify specific lines, they use line specific
+        messages. For example, you may have a JavaScript plugin that reports
+        the existence of ``console.log`` on line 45. This allows the developer
+        to pinpoint the problem much quicker than file or commit specific
+        messages.
+        """
         for filename, group in obj.items():
             if isinstance(group, basestring):
                 group = [group]
@@ -438,56 +785,51 @@ class ResultsCollator(object):
                 if len(msg) == 3:
                     if not msg[2]:
                         continue
-                    # In the format of [LINE, TYPE, BODY]
-                    if msg[0] is not None:
-                        # This is line specific, skip this
-                        continue
+                    # In the format of [LINE, TYPE, BODY], a line of None is
+                    # about the whole file
                     yield Message(
                         plugin, body=msg[2], type=msg[1],
-                        file=filename)
+                        file=filename, line=msg[0])
                     continue
 
                 # This object is not understood
                 yield Error(plugin, body=obj)
 
-    def _line_specific_message(self, plugin, obj):
+    def _record_messages(self, plugin, obj):
         """
-        Look for plugins that are reporting line specific messages.
-
-        For plugins wishing to identify specific lines, they use line specific
-        messages. For example, you may have a JavaScript plugin that reports
-        the existence of ``console.log`` on line 45. This allows the developer
-        to pinpoint the problem much quicker than file or commit specific
-        messages.
+        Look at messages written one per line as ``[file, line, type, body]``.
 
-        There is a lack of error handling in this method. The commit and file
-        specific handlers take care of error handling for us. This method gets
-        to be pretty clean.
+        A message without a file is commit specific, even if it has a line.
         """
-        if not isinstance(obj, dict):
-            # This is not a file or line specific messages
-            return
+        if obj.truncated:
+            # Count the ones that weren't kept
+            self._truncated[plugin] = self._truncated.get(plugin, 0) + \
+                sum(obj.truncated.values())
 
-        for filename, group in obj.items():
-            if isinstance(group, basestring):
-                group = [group]
+            for mtype, count in obj.truncated.items():
+                self._count(plugin, mtype, count)
 
-            for msg in group:
-                if isinstance(msg, basestring):
-                    msg = [msg]
+        for index, record in enumerate(obj):
+            if not isinstance(record, list) or len(record) != 4:
+                yield Error(plugin, body=record)
+                continue
 
-                if 0 <= len(msg) <= 2:
-                    # There is nothing here of interest
-                    continue
+            filename, line, mtype, body = record
 
-                if msg[0] is None:
-                    # This is not line specific
-                    continue
-                if not msg[2]:
-                    # The body is empty
-                    continue
-                # In the format of [LINE, TYPE, BODY]
-                yield Message(
-                    plugin, body=msg[2], type=msg[1],
-                    file=filename, line=msg[0])
+            if not body:
                 continue
+
+            if filename is None:
+                message = Message(plugin, type=mtype, body=body)
+            else:
+                message = Message(
+                    plugin, type=mtype, body=body, file=filename, line=line)
+
+            if index in obj.repeated:
+                # Written more than once, it was only kept the first time
+                count, lines = obj.repeated[index]
+
+                message.count = count
+                message.lines = lines and [list(i) for i in lines]
+
+            yield message
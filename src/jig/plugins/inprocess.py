@@ -0,0 +1,133 @@
+import imp
+import traceback
+from os.path import getmtime, join
+from hashlib import sha1
+from time import time
+from threading import Lock, Thread
+
+from jig.exc import PluginError
+from jig.conf import CODEC
+from jig.plugins.timeouts import timed_out
+
+# Functions that have been loaded and when their module was last changed, by
+# plugin path and entry point
+_functions = {}
+_functions_lock = Lock()
+
+
+def _module_name(path, module):
+    """
+    A name for ``module`` that no other plugin's module will have.
+
+    Plugins often name their modules the same thing, giving each one a name
+    based on the plugin's directory keeps them from replacing each other in
+    ``sys.modules``.
+    """
+    if isinstance(path, unicode):
+        path = path.encode(CODEC)
+
+    return 'jig_plugin_{0}_{1}'.format(
+        sha1(path).hexdigest()[:12], module.replace('.', '_'))
+
+
+def parse_entry_point(entry_point):
+    """
+    Split an entry point like ``checks:pre_commit`` into its two parts.
+
+    :param string entry_point: the module and function separated by a colon
+    :rtype: tuple
+    """
+    module, _, function = entry_point.strip().partition(':')
+
+    if not module or not function:
+        raise PluginError(
+            'The entry_point {0} must be a module and a function, like '
+            'checks:pre_commit.'.format(entry_point))
+
+    return module, function
+
+
+def function_for(path, entry_point):
+    """
+    Get the function an in-process plugin named in its ``entry_point``.
+
+    The module is a Python file relative to the plugin's directory, with dots
+    separating any sub-directories. It's imported the first time it's asked
+    for and re-used until the file changes.
+
+    :param string path: the plugin's directory
+    :param string entry_point: from :py:func:`parse_entry_point`
+    :rtype: function
+    """
+    module, function = parse_entry_point(entry_point)
+
+    filename = join(path, *module.split('.')) + '.py'
+
+    with _functions_lock:
+        modified = getmtime(filename)
+
+        if _functions.get((path, entry_point), (None,))[0] != modified:
+            loaded = imp.load_source(_module_name(path, module), filename)
+
+            _functions[(path, entry_point)] = (
+                modified, getattr(loaded, function))
+
+        return _functions[(path, entry_point)][1]
+
+
+def _call(path, entry_point, files, config):
+    """
+    Call the function, turning any exception into an error.
+    """
+    try:
+        function = function_for(path, entry_point)
+
+        return 0, function(files, config), u''
+    except (Exception, SystemExit):
+        # Messages can quote files that aren't UTF-8
+        return 1, u'', traceback.format_exc().decode('utf-8', 'replace')
+
+
+def call(path, entry_point, files, config, timeout=None):
+    """
+    Call an in-process plugin's function with ``files`` and ``config``.
+
+    Returns the same ``(retcode, stdout, stderr)`` as
+    :py:meth:`jig.plugins.Plugin.pre_commit`, except ``stdout`` is whatever
+    the function returned instead of a string of JSON.
+
+    If the function can't be imported or raises an exception the traceback
+    is returned as ``stderr`` with a non-zero ``retcode``, just like a
+    pre-commit script that failed.
+
+    With a ``timeout`` the function is called in another thread, which is
+    given up on after that many seconds. Unlike a process it can't be killed,
+    it finishes in the background and its result is thrown away.
+
+    :param string path: the plugin's directory
+    :param string entry_point: from :py:func:`parse_entry_point`
+    :param list files: the file records, see
+        :py:meth:`jig.diffconvert.GitDiffIndex.file_records`
+    :param dict config: the plugin's settings
+    :param float timeout: seconds to wait, ``None`` to wait forever
+    :rtype: tuple
+    """
+    if not timeout:
+        return _call(path, entry_point, files, config)
+
+    returned = []
+
+    thread = Thread(
+        target=lambda: returned.append(
+            _call(path, entry_point, files, config)))
+    thread.daemon = True
+
+    started = time()
+
+    thread.start()
+    thread.join(timeout)
+
+    if not returned:
+        return 1, u'', timed_out(time() - started)
+
+    return returned[0]
@@ -1,13 +1,27 @@
+import re
+import sys
 import json
+import errno
 from os import listdir
+from time import time
+from threading import Thread
+from fnmatch import translate
 from os.path import join, isfile, isdir, realpath
-from subprocess import Popen, PIPE
+from subprocess import PIPE
 from ConfigParser import SafeConfigParser
 from ConfigParser import Error as ConfigParserError
-from ConfigParser import NoSectionError
+from ConfigParser import NoSectionError, NoOptionError
 
 from jig.exc import PluginError
-from jig.conf import PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT
+from jig.conf import (
+    PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT, PLUGIN_PROTOCOLS,
+    PLUGIN_DEFAULT_PROTOCOL, PLUGIN_OUTPUTS, PLUGIN_DEFAULT_OUTPUT,
+    PLUGIN_DEFAULT_MAX_MESSAGES)
+from jig.plugins.worker import worker_for
+from jig.plugins.timeouts import ProcessTimer, new_process_group, timed_out
+from jig.plugins.usage import AccountedPopen, PluginResult, Usage
+from jig.trace import span
+from jig.plugins import inprocess, ndjson
 
 try:
     from collections import OrderedDict
@@ -15,6 +29,57 @@ except ImportError:   # pragma: no cover
     from ordereddict import OrderedDict
 
 
+def _compile_globs(patterns):
+    """
+    Compile whitespace separated glob ``patterns`` into one regular expression.
+
+    Returns ``None`` if there are no patterns.
+
+    :param string patterns: globs like ``*.py docs/*``
+    """
+    globs = patterns.split()
+
+    if not globs:
+        return None
+
+    return re.compile('|'.join([translate(i) for i in globs]))
+
+
+def _default_timeout_for(config):
+    """
+    Determine how many seconds a plugin can run for if it doesn't say.
+
+    This is the ``[jig] timeout`` option from the main ``config``. Without it,
+    or if it's not a positive number, plugins can run for as long as they
+    need and ``None`` is returned.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: float or None
+    """
+    try:
+        timeout = config.getfloat('jig', 'timeout')
+    except (NoSectionError, NoOptionError, ValueError):
+        return None
+
+    return timeout if timeout > 0 else None
+
+
+def _aggregate_for(config):
+    """
+    Determine if the same message from a plugin is only shown once.
+
+    This is the ``[jig] aggregate`` option from ``config``, which is on unless
+    it's ``no``, ``off``, ``false`` or ``0``.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: bool
+    """
+    try:
+        return config.getboolean('jig', 'aggregate')
+    except (NoSectionError, NoOptionError, ValueError):
+        return True
+
+
 class PluginManager(object):
 
     """
@@ -43,6 +108,10 @@ class PluginManager(object):
         Creates :py:class:`Plugin` instances from ``config``.
         """
         plugins = []
+
+        default_timeout = _default_timeout_for(config)
+        aggregate = _aggregate_for(config)
+
         for section_name in config.sections():
             if not section_name.startswith('plugin:'):
                 # We are only interested in the plugin configs
@@ -65,12 +134,105 @@ class PluginManager(object):
                         'Could not parse config file for '
                         '{0} in {1}, line {2}.'.format(name, path, line))
 
+            try:
+                # Only send this many lines around each change
+                diff_context = plugin_config.getint('plugin', 'diff_context')
+            except (NoSectionError, NoOptionError):
+                # Send the whole file
+                diff_context = None
+            except ValueError:
+                raise PluginError(
+                    'The diff_context for {0} in {1} must be a '
+                    'number.'.format(name, path))
+
+            try:
+                # Stop the plugin if it runs longer than this many seconds
+                timeout = plugin_config.getfloat('plugin', 'timeout')
+            except (NoSectionError, NoOptionError):
+                timeout = default_timeout
+            except ValueError:
+                raise PluginError(
+                    'The timeout for {0} in {1} must be a number.'.format(
+                        name, path))
+
+            if timeout is not None and timeout <= 0:
+                # No limit at all, even if there is a default
+                timeout = None
+
+            try:
+                # How the pre-commit script is ran
+                protocol = plugin_config.get('plugin', 'protocol')
+            except (NoSectionError, NoOptionError):
+                protocol = PLUGIN_DEFAULT_PROTOCOL
+
+            if protocol not in PLUGIN_PROTOCOLS:
+                raise PluginError(
+                    'The protocol for {0} in {1} must be one of {2}.'.format(
+                        name, path, ', '.join(PLUGIN_PROTOCOLS)))
+
+            try:
+                # The function in-process plugins call, like checks:pre_commit
+                entry_point = plugin_config.get('plugin', 'entry_point')
+            except (NoSectionError, NoOptionError):
+                entry_point = None
+
+            if protocol == 'python':
+                if not entry_point:
+                    raise PluginError(
+                        'The plugin {0} in {1} needs an entry_point to use '
+                        'the python protocol.'.format(name, path))
+
+                inprocess.parse_entry_point(entry_point)
+
+            try:
+                # What the pre-commit script writes to stdout
+                output = plugin_config.get('plugin', 'output')
+            except (NoSectionError, NoOptionError):
+                output = PLUGIN_DEFAULT_OUTPUT
+
+            if output not in PLUGIN_OUTPUTS:
+                raise PluginError(
+                    'The output for {0} in {1} must be one of {2}.'.format(
+                        name, path, ', '.join(PLUGIN_OUTPUTS)))
+
+            if output == 'ndjson' and protocol != 'process':
+                raise PluginError(
+                    'The plugin {0} in {1} can only use the ndjson output '
+                    'with the process protocol.'.format(name, path))
+
+            try:
+                # Only keep this many of the messages written one per line
+                max_messages = plugin_config.getint('plugin', 'max_messages')
+            except (NoSectionError, NoOptionError):
+                max_messages = PLUGIN_DEFAULT_MAX_MESSAGES
+            except ValueError:
+                raise PluginError(
+                    'The max_messages for {0} in {1} must be a '
+                    'number.'.format(name, path))
+
+            if max_messages is not None and max_messages <= 0:
+                # Keep all of them
+                max_messages = None
+
+            # Which files the plugin is interested in
+            matchers = {}
+            for option in ('include', 'exclude'):
+                try:
+                    matchers[option] = _compile_globs(
+                        plugin_config.get('plugin', option))
+                except (NoSectionError, NoOptionError):
+                    matchers[option] = None
+
             # Get rid of the path, we don't need to send this as part of the
             # config for the plugin
             pc = OrderedDict(config.items(section_name))
             del pc['path']
 
-            section = Plugin(bundle, name, path, pc)
+            section = Plugin(
+                bundle, name, path, pc, diff_context=diff_context,
+                include=matchers['include'], exclude=matchers['exclude'],
+                protocol=protocol, entry_point=entry_point, timeout=timeout,
+                output=output, max_messages=max_messages, aggregate=aggregate)
             plugins.append(section)
 
         return plugins
@@ -218,7 +380,11 @@ class Plugin(object):
     A single unit that performs some helpful operation for the user.
 
     """
-    def __init__(self, bundle, name, path, config={}, help={}):
+    def __init__(self, bundle, name, path, config={}, help={},
+                 diff_context=None, include=None, exclude=None,
+                 protocol=PLUGIN_DEFAULT_PROTOCOL, entry_point=None,
+                 timeout=None, output=PLUGIN_DEFAULT_OUTPUT,
+                 max_messages=PLUGIN_DEFAULT_MAX_MESSAGES, aggregate=True):
         # What bundle is this plugin a part of
         self.bundle = bundle
         # What is the name of this plugin?
@@ -229,8 +395,99 @@ class Plugin(object):
         self.config = config
         # Helpful descriptions of the configurations
         self.help = help
+        # Lines of context around each change, None for the whole file
+        self.diff_context = diff_context
+        # Compiled globs of the files it receives, None for no filtering
+        self.include = include
+        self.exclude = exclude
+        # Started for every run, kept running as a worker, or called in-process
+        self.protocol = protocol
+        # The module and function called by in-process plugins
+        self.entry_point = entry_point
+        # Seconds it can run for before it's stopped, None for no limit
+        self.timeout = timeout
+        # A single JSON document or a message per line on stdout
+        self.output = output
+        # Messages per line beyond this many are only counted, None for no
+        # limit
+        self.max_messages = max_messages
+        # The same message per line is kept once and counted, max_messages
+        # is then how many different ones are kept
+        self.aggregate = aggregate
+
+    @property
+    def filtered(self):
+        """
+        Does this plugin only receive some of the files.
+        """
+        return bool(self.include or self.exclude)
+
+    def wants(self, name):
+        """
+        Should the file ``name`` be sent to this plugin.
+
+        ``name`` is the path of the file relative to the Git repository. It's
+        wanted if it matches one of the ``include`` globs, or there aren't any,
+        and doesn't match one of the ``exclude`` globs.
+
+        :param string name: path of the file
+        :rtype: bool
+        """
+        if self.include and not self.include.match(name):
+            return False
+
+        if self.exclude and self.exclude.match(name):
+            return False
+
+        return True
 
-    def pre_commit(self, git_diff_index):
+    def wants_any(self, git_diff_index):
+        """
+        Is any of the files in ``git_diff_index`` sent to this plugin.
+
+        :param GitDiffIndex git_diff_index: the changes being checked
+        :rtype: bool
+        """
+        if not self.filtered:
+            return True
+
+        return any([self.wants(i) for i in git_diff_index.names()])
+
+    def input_chunks(self, git_diff_index):
+        """
+        The JSON data the pre-commit script receives on stdin, a piece at a
+        time.
+
+        Only the ``config`` is encoded here, the ``files`` are encoded by the
+        :py:class:`jig.diffconvert.GitDiffIndex` as they are needed and
+        re-used for every plugin that has the same :py:attr:`diff_context`.
+        Only the files this plugin :py:meth:`wants` are included.
+
+        :param GitDiffIndex git_diff_index: the changes being checked
+        :rtype: generator of str
+        """
+        yield '{{"config":{0},"files":'.format(
+            json.dumps(self.config, separators=(',', ':')))
+
+        for chunk in git_diff_index.iter_files_json(
+                self.diff_context, self.wants if self.filtered else None,
+                reader=self):
+            yield chunk
+
+        yield '}'
+
+    def encode_input(self, git_diff_index):
+        """
+        All of the :py:meth:`input_chunks` as one string.
+
+        The JSON is compact, it doesn't have any new lines.
+
+        :param GitDiffIndex git_diff_index: the changes being checked
+        :rtype: str
+        """
+        return ''.join(self.input_chunks(git_diff_index))
+
+    def pre_commit(self, git_diff_index, cancellation=None):
         """
         Runs the plugin's pre-commit script, passing in the diff.
 
@@ -247,27 +504,92 @@ class Plugin(object):
         The ``diff`` attribute is a list of files and changes that have
         occurred to them.  See :py:module:`jig.diffconvert` for
         information on what this object provides.
+
+        If the plugin uses the ``worker`` protocol the script is only started
+        once and the same data is sent as a single line to the running script,
+        see :py:class:`jig.plugins.worker.PluginWorker`.
+
+        If the plugin uses the ``python`` protocol its function is called with
+        the files and config instead, without any JSON, and ``stdout`` is
+        whatever it returned. See :py:func:`jig.plugins.inprocess.call`.
+
+        If the plugin's :py:attr:`output` is ``ndjson`` its messages are read
+        as it writes them and ``stdout`` is a
+        :py:class:`jig.output.MessageRecords` of the first
+        :py:attr:`max_messages` of them.
+
+        If the plugin runs for longer than its :py:attr:`timeout` it's
+        stopped, along with anything it started, and a non-zero ``retcode`` is
+        returned with how long it ran for as ``stderr``.
+
+        If ``cancellation``, a :py:class:`jig.plugins.timeouts.Cancellation`,
+        is cancelled before the plugin finishes it's stopped the same way and
+        ``None`` is returned instead of its results.
+
+        The results are a :py:class:`jig.plugins.usage.PluginResult`, which
+        also has the time, CPU and memory the plugin took as its ``usage``.
         """
-        # Grab this plugin's settings
-        data_in = {
-            'config': self.config,
-            'files': git_diff_index}
+        if cancellation and cancellation.cancelled:
+            return None
+
+        started = time()
+
+        def result(outcome, rusage=None, payload=None):
+            if outcome is None:
+                return None
+
+            return PluginResult(*outcome, usage=Usage.measured(
+                time() - started, rusage, payload))
+
+        if self.protocol == 'python':
+            with span(u'file_records', plugin=self.name):
+                files = git_diff_index.file_records(
+                    self.diff_context, self.wants if self.filtered else None,
+                    reader=self)
+
+            return result(inprocess.call(
+                self.path, self.entry_point, files, dict(self.config),
+                self.timeout))
 
         script = join(self.path, PLUGIN_PRE_COMMIT_SCRIPT)
-        ph = Popen([script], stdin=PIPE, stdout=PIPE, stderr=PIPE)
 
-        # Send the data to the script
-        stdin = json.dumps(data_in, indent=2, cls=PluginDataJSONEncoder)
+        if self.protocol == 'worker':
+            # The request is sent again if the worker crashes, so it's kept
+            # whole. The worker keeps running so its CPU and memory for this
+            # request can't be told apart
+            with span(u'encode_input', plugin=self.name):
+                stdin = self.encode_input(git_diff_index)
+
+            return result(worker_for(script).request(
+                stdin, self.timeout, cancellation), payload=len(stdin))
+
+        ph = AccountedPopen(
+            [script], stdin=PIPE, stdout=PIPE, stderr=PIPE,
+            preexec_fn=new_process_group)
+
+        # Send the data to the script, along with this plugin's settings,
+        # while it's reading it. Only its output is left for communicate
+        writer = _InputWriter(
+            ph.stdin, self.input_chunks(git_diff_index), self.name)
+        ph.stdin = None
+        writer.start()
 
         retcode = None
         stdout = ''
         stderr = ''
 
+        timer = ProcessTimer(ph, self.timeout, cancellation)
+
         try:
-            stdout, stderr = ph.communicate(stdin)
+            with timer:
+                if self.output == 'ndjson':
+                    stdout, stderr = ndjson.communicate(
+                        ph, self.max_messages, self.aggregate)
+                else:
+                    stdout, stderr = ph.communicate()
+                    stdout = stdout.decode('utf-8')
 
             # Convert to unicode
-            stdout = stdout.decode('utf-8')
             stderr = stderr.decode('utf-8')
 
             retcode = ph.returncode
@@ -279,8 +601,64 @@ class Plugin(object):
             else:
                 stderr = unicode(ose)
 
+        writer.join()
+
+        if writer.exc_info:
+            # Describing the files failed, the same as if it happened here
+            raise writer.exc_info[0], writer.exc_info[1], writer.exc_info[2]
+
+        if timer.cancelled and retcode != 0:
+            # Killed, another plugin already decided how this turns out
+            return None
+
+        if timer.expired:
+            # Whatever it managed to write is kept, but it's still an error
+            retcode = 1
+            stderr = timed_out(timer.elapsed)
+
         # And return the relevant stuff
-        return retcode, stdout, stderr
+        return result((retcode, stdout, stderr), ph.rusage, writer.written)
+
+
+class _InputWriter(Thread):
+
+    """
+    Writes the input of a plugin to its stdin from another thread.
+
+    The files are encoded as they are written, so the plugin can start reading
+    before all of them are ready and they never have to be in one string.
+
+    """
+    def __init__(self, stdin, chunks, name):
+        super(_InputWriter, self).__init__()
+        self.daemon = True
+
+        self.stdin = stdin
+        self.chunks = chunks
+        self.name = name
+
+        # How many bytes were written
+        self.written = 0
+        # Anything that went wrong while encoding
+        self.exc_info = None
+
+    def run(self):
+        try:
+            with span(u'encode_input', plugin=self.name):
+                for chunk in self.chunks:
+                    self.stdin.write(chunk)
+                    self.written += len(chunk)
+        except IOError as e:
+            if e.errno != errno.EPIPE:
+                self.exc_info = sys.exc_info()
+            # Otherwise the plugin stopped reading, it exited or was stopped
+        except Exception:
+            self.exc_info = sys.exc_info()
+        finally:
+            try:
+                self.stdin.close()
+            except IOError:
+                pass
 
 
 class PluginDataJSONEncoder(json.JSONEncoder):
@@ -293,14 +671,4 @@ class PluginDataJSONEncoder(json.JSONEncoder):
         """
         Implements JSONEncoder default method.
         """
-        files = [i for i in obj.files()]
-
-        obj = []
-        for f in files:
-            obj.append({
-                'type': unicode(f['type']),
-                'name': unicode(f['name']),
-                'filename': unicode(f['filename']),
-                'diff': [j for j in f['diff']]})
-
-        return obj
+        return obj.serializable_files()
@@ -0,0 +1,74 @@
+import json
+from threading import Thread
+
+from jig.output import MessageRecords
+
+
+def read_messages(stream, limit=None, aggregate=False):
+    """
+    Read the messages a plugin writes to ``stream``, one per line.
+
+    Each line is decoded as soon as it's read, so only the messages that are
+    kept are ever held in memory. Lines that aren't JSON are kept as text
+    and reported as errors, blank lines are ignored.
+
+    With ``aggregate`` the same message about the same file is only kept
+    once, and ``limit`` is how many different messages are kept. See
+    :py:meth:`jig.output.MessageRecords.add`.
+
+    :param file stream: the plugin's stdout
+    :param int limit: how many messages to keep, ``None`` for all of them
+    :param bool aggregate: keep the same message only once
+    :rtype: :py:class:`jig.output.MessageRecords`
+    """
+    records = MessageRecords()
+
+    for line in iter(stream.readline, ''):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line.decode('utf-8', 'replace')
+
+        records.add(record, limit, aggregate)
+
+    return records
+
+
+def communicate(process, limit=None, aggregate=False):
+    """
+    Wait for ``process`` while reading its stdout as messages.
+
+    The same as :py:meth:`subprocess.Popen.communicate` for a process whose
+    stdin is already taken care of, except stdout is read with
+    :py:func:`read_messages`.
+
+    :param subprocess.Popen process: the plugin's process
+    :param int limit: how many messages to keep, ``None`` for all of them
+    :param bool aggregate: keep the same message only once
+    :returns: the :py:class:`jig.output.MessageRecords` and stderr
+    :rtype: tuple
+    """
+    stderr = []
+
+    def collect():
+        # Drained from another thread so the plugin never blocks on it
+        stderr.append(process.stderr.read())
+
+    collector = Thread(target=collect)
+    collector.daemon = True
+    collector.start()
+
+    records = read_messages(process.stdout, limit, aggregate)
+    process.stdout.close()
+
+    collector.join()
+    process.stderr.close()
+
+    process.wait()
+
+    return records, ''.join(stderr)
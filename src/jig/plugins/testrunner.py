@@ -22,7 +22,6 @@ from jig.formatters.utils import green_bold, red_bold
 from jig.formatters.fancy import FancyFormatter
 from jig.output import ConsoleView, ResultsCollator, strip_paint
 from jig.plugins import PluginManager
-from jig.plugins.manager import PluginDataJSONEncoder
 from jig.diffconvert import GitDiffIndex
 
 try:
@@ -268,8 +267,8 @@ class InstrumentedGitDiffIndex(GitDiffIndex):
         # This should be a tuple of (REAL_PATH, REPLACEMENT_PATH)
         self.replace_path = (None, None)
 
-    def files(self):
-        real_files = super(InstrumentedGitDiffIndex, self).files()
+    def files(self, context=None):
+        real_files = super(InstrumentedGitDiffIndex, self).files(context)
 
         for f in real_files:
             if all(self.replace_path):
@@ -373,10 +372,7 @@ class PluginTestRunner(object):
                 gdi.replace_path = (self.timeline.repo.working_dir, wd)
 
                 # Gather up the input to the plugin for logging
-                stdin = json.dumps({
-                    'config': plugin.config,
-                    'files': gdi},
-                    indent=2, cls=PluginDataJSONEncoder)
+                stdin = plugin.encode_input(gdi)
 
                 # Now run the actual pre_commit hook for this plugin
                 res = plugin.pre_commit(gdi)
@@ -386,6 +382,11 @@ class PluginTestRunner(object):
             try:
                 # Is it JSON data?
                 data = json.loads(stdout)
+            except TypeError:
+                # In-process plugins return the data itself, keep it as JSON
+                # for the verbose output like any other plugin
+                data = stdout
+                stdout = json.dumps(data, default=unicode)
             except ValueError:
                 # Not JSON
                 data = stdout
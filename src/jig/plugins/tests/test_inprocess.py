@@ -0,0 +1,171 @@
+from os import makedirs, utime
+from os.path import join
+from tempfile import mkdtemp
+
+from jig.tests.testcase import JigTestCase
+from jig.exc import PluginError
+from jig.plugins.inprocess import parse_entry_point, function_for, call
+
+
+class TestInProcess(JigTestCase):
+
+    """
+    Plugins can be called inside of jig.
+
+    """
+    def setUp(self):
+        super(TestInProcess, self).setUp()
+
+        self.plugin_dir = join(self.fixturesdir, 'plugin11')
+
+    def module(self, path, name, source):
+        """
+        Write a module called ``name`` in ``path`` and return ``path``.
+        """
+        parts = name.split('.')
+
+        directory = join(path, *parts[:-1])
+        if parts[:-1]:
+            makedirs(directory)
+
+        with open(join(directory, parts[-1] + '.py'), 'w') as fh:
+            fh.write(source)
+
+        return path
+
+    def test_parse_entry_point(self):
+        """
+        Entry points are a module and function separated by a colon.
+        """
+        self.assertEqual(
+            ('checks', 'pre_commit'), parse_entry_point('checks:pre_commit'))
+        self.assertEqual(
+            ('lint.checks', 'run'), parse_entry_point(' lint.checks:run '))
+
+        for bad in ('checks', 'checks:', ':pre_commit'):
+            with self.assertRaises(PluginError):
+                parse_entry_point(bad)
+
+    def test_function_for(self):
+        """
+        The function is imported once and re-used.
+        """
+        function = function_for(self.plugin_dir, 'checks:pre_commit')
+
+        self.assertEqual('pre_commit', function.__name__)
+        self.assertIs(
+            function, function_for(self.plugin_dir, 'checks:pre_commit'))
+
+    def test_sub_directory(self):
+        """
+        Modules can be in a sub-directory of the plugin.
+        """
+        path = self.module(
+            mkdtemp(), 'lint.checks', 'def run(files, config):\n'
+            '    return "lint"\n')
+
+        self.assertEqual(
+            (0, 'lint', u''), call(path, 'lint.checks:run', [], {}))
+
+    def test_isolated(self):
+        """
+        Plugins with modules of the same name do not replace each other.
+        """
+        first = self.module(
+            mkdtemp(), 'checks', 'def run(files, config):\n'
+            '    return "first"\n')
+        second = self.module(
+            mkdtemp(), 'checks', 'def run(files, config):\n'
+            '    return "second"\n')
+
+        self.assertEqual('first', call(first, 'checks:run', [], {})[1])
+        self.assertEqual('second', call(second, 'checks:run', [], {})[1])
+
+    def test_reloaded(self):
+        """
+        Modules are imported again after they change.
+        """
+        path = self.module(
+            mkdtemp(), 'checks', 'def run(files, config):\n'
+            '    return "before"\n')
+
+        self.assertEqual('before', call(path, 'checks:run', [], {})[1])
+
+        self.module(
+            path, 'checks', 'def run(files, config):\n'
+            '    return "after"\n')
+        utime(join(path, 'checks.py'), (0, 0))
+
+        self.assertEqual('after', call(path, 'checks:run', [], {})[1])
+
+    def test_call(self):
+        """
+        The function receives the files and config.
+        """
+        retcode, stdout, stderr = call(
+            self.plugin_dir, 'checks:pre_commit',
+            [{'name': u'a.txt'}], {'fail': 'no'})
+
+        self.assertEqual(0, retcode)
+        self.assertEqual({u'a.txt': [[1, 'info', 'Checked in-process']]},
+                         stdout)
+        self.assertEqual(u'', stderr)
+
+    def test_timeout(self):
+        """
+        Functions that take too long are given up on.
+        """
+        path = self.module(
+            mkdtemp(), 'checks', 'import time\n\n'
+            'def run(files, config):\n'
+            '    time.sleep(30)\n')
+
+        retcode, stdout, stderr = call(path, 'checks:run', [], {}, 0.2)
+
+        self.assertEqual(1, retcode)
+        self.assertEqual(
+            u'Error: the plugin was stopped after running for 0.2 seconds',
+            stderr)
+
+        # Fast enough
+        self.assertEqual(
+            0, call(self.plugin_dir, 'checks:pre_commit', [], {}, 10)[0])
+
+    def test_missing_function(self):
+        """
+        A function that doesn't exist is an error.
+        """
+        retcode, stdout, stderr = call(
+            self.plugin_dir, 'checks:missing', [], {})
+
+        self.assertEqual(1, retcode)
+        self.assertIn(u'AttributeError', stderr)
+
+    def test_exit(self):
+        """
+        Plugins can't exit jig.
+        """
+        path = self.module(
+            mkdtemp(), 'checks', 'import sys\n\n'
+            'def run(files, config):\n'
+            '    sys.exit(2)\n')
+
+        retcode, stdout, stderr = call(path, 'checks:run', [], {})
+
+        self.assertEqual(1, retcode)
+        self.assertIn(u'SystemExit', stderr)
+
+    def test_non_utf8_error(self):
+        """
+        Exceptions that aren't UTF-8 are still errors.
+        """
+        path = self.module(
+            mkdtemp(), 'checks',
+            'def run(files, config):\n'
+            '    raise ValueError("caf\\xe9")\n')
+
+        retcode, stdout, stderr = call(path, 'checks:run', [], {})
+
+        self.assertEqual((1, u''), (retcode, stdout))
+        self.assertIsInstance(stderr, unicode)
+        self.assertIn(u'ValueError: caf\ufffd', stderr)
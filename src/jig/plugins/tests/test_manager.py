@@ -2,12 +2,17 @@
 import json
 from os.path import join
 from subprocess import Popen
+from tempfile import mkdtemp
 
 from mock import patch
 
 from jig.tests.testcase import PluginTestCase
 from jig.exc import PluginError
-from jig.plugins import PluginManager
+from jig.plugins import PluginManager, Plugin, create_plugin
+from jig.plugins.manager import _compile_globs
+from jig.plugins.worker import stop_workers
+from jig.output import MessageRecords
+from jig import diffconvert
 
 
 class TestPluginManager(PluginTestCase):
@@ -134,6 +139,170 @@ class TestPluginManager(PluginTestCase):
 
         self.assertIn('Could not find the bundle or name', str(ec.exception))
 
+    def test_diff_context(self):
+        """
+        A plugin can ask for only the lines around each change.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin08'))
+        pm.add(join(self.fixturesdir, 'plugin01'))
+
+        self.assertEqual(0, pm.plugins[0].diff_context)
+        self.assertEqual(None, pm.plugins[1].diff_context)
+
+    def test_invalid_diff_context(self):
+        """
+        The diff context must be a number.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[plugin]\ndiff_context = lots\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('must be a number', str(ec.exception))
+
+    def test_include_exclude(self):
+        """
+        Plugins can choose which files they receive with globs.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        pm.add(join(self.fixturesdir, 'plugin09'))
+
+        everything, some = pm.plugins
+
+        self.assertFalse(everything.filtered)
+        self.assertTrue(everything.wants('README'))
+
+        self.assertTrue(some.filtered)
+        self.assertTrue(some.wants('a.txt'))
+        self.assertTrue(some.wants('scripts/README'))
+        self.assertFalse(some.wants('README'))
+        self.assertFalse(some.wants('italian-lesson.txt'))
+
+    def test_protocol(self):
+        """
+        Plugins can be ran as workers.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        pm.add(join(self.fixturesdir, 'plugin10'))
+
+        self.assertEqual(
+            ['process', 'worker'], [i.protocol for i in pm.plugins])
+
+    def test_invalid_protocol(self):
+        """
+        Unknown protocols are caught when the plugin is added.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[plugin]\nprotocol = carrier-pigeon\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('must be one of process, worker', str(ec.exception))
+
+    def test_ndjson_needs_process(self):
+        """
+        Only plugins started for every run can write a message per line.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[plugin]\nprotocol = worker\noutput = ndjson\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('ndjson output', str(ec.exception))
+
+    def test_timeout(self):
+        """
+        Plugins can set their own timeout, or use the default.
+        """
+        self.jigconfig.set('jig', 'timeout', '60')
+
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        pm.add(join(self.fixturesdir, 'plugin12'))
+
+        self.assertEqual([60.0, 0.5], [i.timeout for i in pm.plugins])
+
+    def test_no_timeout(self):
+        """
+        Without a default plugins can run for as long as they need.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+
+        self.assertIsNone(pm.plugins[0].timeout)
+
+    def test_invalid_timeout(self):
+        """
+        Timeouts must be numbers.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[plugin]\ntimeout = soon\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('must be a number', str(ec.exception))
+
+    def test_python_needs_entry_point(self):
+        """
+        In-process plugins must name the function to call.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[plugin]\nprotocol = python\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('needs an entry_point', str(ec.exception))
+
+    def test_invalid_entry_point(self):
+        """
+        The entry point must be a module and a function.
+        """
+        plugin_dir = create_plugin(mkdtemp(), 'test01', 'plugin01')
+
+        with open(join(plugin_dir, 'config.cfg'), 'a') as fh:
+            fh.write(
+                '\n[plugin]\nprotocol = python\nentry_point = checks\n')
+
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError) as ec:
+            pm.add(plugin_dir)
+
+        self.assertIn('must be a module and a function', str(ec.exception))
+
     def test_add_plugin_from_directory_of_plugins(self):
         """
         Adds all the plugins in a directory of plugins.
@@ -223,6 +392,227 @@ class TestPlugin(PluginTestCase):
             [1, u'warn', u'The cast: is +'],
             data['argument.txt'][0])
 
+    def test_pre_commit_usage(self):
+        """
+        The time, CPU, memory and input of the plugin are kept with its
+        results.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        result = pm.plugins[0].pre_commit(gdi)
+
+        self.assertGreater(result.usage.wall, 0)
+        self.assertGreater(result.usage.cpu, 0)
+        self.assertGreater(result.usage.maxrss, 0)
+        self.assertEqual(
+            len(pm.plugins[0].encode_input(gdi)), result.usage.payload)
+
+    def test_files_encoded_once(self):
+        """
+        The files are only read and described once for all the plugins.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin07'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        with patch.object(diffconvert, 'describe_diff',
+                          wraps=diffconvert.describe_diff) as describe:
+            for plugin in pm.plugins:
+                retcode, stdout, stderr = plugin.pre_commit(gdi)
+
+                self.assertEqual(0, retcode)
+                self.assertIn('argument.txt', json.loads(stdout))
+
+        # One file changed in this diff, so one description of it
+        self.assertEqual(2, len(pm.plugins))
+        self.assertEqual(1, describe.call_count)
+
+    def test_input_error(self):
+        """
+        Errors while the input is being written are raised.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        with patch.object(gdi, 'iter_files_json') as iter_files_json:
+            iter_files_json.side_effect = ValueError('Broken')
+
+            with self.assertRaises(ValueError):
+                pm.plugins[0].pre_commit(gdi)
+
+    def test_ndjson_output(self):
+        """
+        Messages written one per line are kept up to the plugin's limit.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin13'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        plugin = pm.plugins[0]
+        lines = len(list(gdi.files().next()['diff']))
+
+        retcode, stdout, stderr = plugin.pre_commit(gdi)
+
+        self.assertEqual((u'ndjson', 5), (plugin.output, plugin.max_messages))
+        self.assertEqual(0, retcode)
+        self.assertIsInstance(stdout, MessageRecords)
+        self.assertEqual([None, None, u'info', u'Commit checked'], stdout[0])
+        self.assertEqual(5, len(stdout))
+        # The commit and file messages and three of the lines were kept
+        self.assertEqual({u'stop': lines - 3}, stdout.truncated)
+
+    def test_config_for_each_plugin(self):
+        """
+        Each plugin receives its own config along with the shared files.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin07'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        pm.plugins[0].config = {'a': '1'}
+        pm.plugins[1].config = {'b': '2'}
+
+        sent = [json.loads(i.encode_input(gdi)) for i in pm.plugins]
+
+        self.assertEqual({'a': '1'}, sent[0]['config'])
+        self.assertEqual({'b': '2'}, sent[1]['config'])
+        self.assertEqual(sent[0]['files'], sent[1]['files'])
+        self.assertEqual(u'argument.txt', sent[0]['files'][0]['name'])
+
+    def test_diff_context_input(self):
+        """
+        Plugins with a diff context receive hunks and fewer lines.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin08'))
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[1])
+
+        limited, full = [
+            json.loads(i.encode_input(gdi))['files'][0] for i in pm.plugins]
+
+        self.assertIn('hunks', limited)
+        self.assertNotIn('hunks', full)
+        self.assertLess(len(limited['diff']), len(full['diff']))
+
+    def test_only_wanted_files(self):
+        """
+        Plugins with include or exclude globs only receive those files.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin09'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        plugin = pm.plugins[0]
+        files = json.loads(plugin.encode_input(gdi))['files']
+
+        self.assertEqual([u'famous-deaths.txt'], [i['name'] for i in files])
+        self.assertTrue(plugin.wants_any(gdi))
+
+        plugin.include = None
+        plugin.exclude = _compile_globs('*.txt')
+
+        self.assertEqual([], json.loads(plugin.encode_input(gdi))['files'])
+        self.assertFalse(plugin.wants_any(gdi))
+
+    def test_worker_pre_commit(self):
+        """
+        Workers receive the same data on one line.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin10'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        try:
+            first = pm.plugins[0].pre_commit(gdi)
+            second = pm.plugins[0].pre_commit(gdi)
+        finally:
+            stop_workers()
+
+        self.assertEqual(0, first[0])
+        self.assertEqual(
+            [u'famous-deaths.txt', u'italian-lesson.txt'],
+            sorted(json.loads(first[1]).keys()))
+        # It was the same process both times
+        self.assertEqual(first, second)
+
+    def test_python_pre_commit(self):
+        """
+        In-process plugins return their data without any JSON.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin11'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
+
+        self.assertEqual(0, retcode)
+        self.assertEqual(
+            [u'famous-deaths.txt', u'italian-lesson.txt'],
+            sorted(stdout.keys()))
+        self.assertEqual(u'', stderr)
+
+    def test_python_exception(self):
+        """
+        Exceptions raised by in-process plugins are errors.
+        """
+        self.jigconfig.add_section('plugin:test01:plugin11')
+        self.jigconfig.set(
+            'plugin:test01:plugin11', 'path',
+            join(self.fixturesdir, 'plugin11'))
+        self.jigconfig.set('plugin:test01:plugin11', 'fail', 'yes')
+
+        pm = PluginManager(self.jigconfig)
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertEqual(u'', stdout)
+        self.assertIn(u'ValueError: Failed on purpose', stderr)
+
+    def test_python_import_error(self):
+        """
+        In-process plugins that can't be imported are errors.
+        """
+        plugin = Plugin(
+            'test01', 'plugin11', join(self.fixturesdir, 'plugin11'),
+            protocol='python', entry_point='missing:pre_commit')
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        retcode, stdout, stderr = plugin.pre_commit(gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn(u'OSError', stderr)
+
+    def test_timed_out_pre_commit(self):
+        """
+        Plugins that run for too long are stopped with an error.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin12'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertRegexpMatches(
+            stderr, r'^Error: the plugin was stopped after running for '
+            r'0\.\d seconds$')
+
     def test_sigpipe_error(self):
         """
         If a SIGPIPE is received, handle it without blowing up.
@@ -0,0 +1,130 @@
+from time import time
+from threading import Timer
+from subprocess import Popen, PIPE
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins.timeouts import (
+    Cancellation, ProcessTimer, new_process_group, timed_out)
+
+
+def _start(command):
+    """
+    Start ``command`` in its own process group.
+    """
+    return Popen(
+        ['sh', '-c', command], stdout=PIPE, stderr=PIPE,
+        preexec_fn=new_process_group)
+
+
+class TestProcessTimer(JigTestCase):
+
+    """
+    Plugins that run too long are stopped.
+
+    """
+    start = staticmethod(_start)
+
+    def test_timed_out(self):
+        """
+        The error says how long the plugin ran.
+        """
+        self.assertEqual(
+            u'Error: the plugin was stopped after running for 1.5 seconds',
+            timed_out(1.5))
+
+    def test_finishes(self):
+        """
+        Processes that finish in time are left alone.
+        """
+        process = self.start('echo done')
+
+        with ProcessTimer(process, 10) as timer:
+            stdout, stderr = process.communicate()
+
+        self.assertFalse(timer.expired)
+        self.assertEqual('done\n', stdout)
+        self.assertEqual(0, process.returncode)
+
+    def test_no_timeout(self):
+        """
+        Without a timeout the process can run as long as it needs.
+        """
+        process = self.start('sleep 0.2')
+
+        with ProcessTimer(process) as timer:
+            process.communicate()
+
+        self.assertFalse(timer.expired)
+        self.assertGreaterEqual(timer.elapsed, 0.2)
+
+    def test_expired(self):
+        """
+        The process and anything it started are killed.
+        """
+        # The background sleep keeps stdout open until it's killed too
+        process = self.start('sleep 30 & sleep 30')
+
+        started = time()
+
+        with ProcessTimer(process, 0.2) as timer:
+            process.communicate()
+
+        self.assertTrue(timer.expired)
+        self.assertLess(time() - started, 10)
+        self.assertGreaterEqual(timer.elapsed, 0.2)
+        self.assertEqual(-9, process.returncode)
+
+
+class TestCancellation(JigTestCase):
+
+    """
+    Plugins still running can be stopped when their results aren't needed.
+
+    """
+    def test_not_cancelled(self):
+        """
+        Processes that finish are left alone.
+        """
+        cancellation = Cancellation()
+        process = _start('echo done')
+
+        with ProcessTimer(process, cancellation=cancellation) as timer:
+            stdout, stderr = process.communicate()
+
+        self.assertFalse(cancellation.cancelled)
+        self.assertFalse(timer.cancelled)
+        self.assertEqual('done\n', stdout)
+
+    def test_cancelled_while_running(self):
+        """
+        Running processes and anything they started are killed.
+        """
+        cancellation = Cancellation()
+        process = _start('sleep 30 & sleep 30')
+
+        started = time()
+
+        Timer(0.2, cancellation.cancel).start()
+
+        with ProcessTimer(process, 10, cancellation) as timer:
+            process.communicate()
+
+        self.assertTrue(timer.cancelled)
+        self.assertFalse(timer.expired)
+        self.assertLess(time() - started, 5)
+        self.assertEqual(-9, process.returncode)
+
+    def test_already_cancelled(self):
+        """
+        Processes started after cancelling are killed right away.
+        """
+        cancellation = Cancellation()
+        cancellation.cancel()
+
+        process = _start('sleep 30')
+
+        with ProcessTimer(process, cancellation=cancellation) as timer:
+            process.communicate()
+
+        self.assertTrue(timer.cancelled)
+        self.assertEqual(-9, process.returncode)
@@ -0,0 +1,90 @@
+from subprocess import PIPE
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins.usage import (
+    AccountedPopen, PluginResult, Usage, _maxrss_bytes)
+
+
+class TestPluginResult(JigTestCase):
+
+    """
+    Plugin results carry what it cost to run the plugin.
+
+    """
+    def test_tuple(self):
+        """
+        It's the same as the plain tuple.
+        """
+        usage = Usage(1.0, 0.25, 0.25, 2048, 100)
+
+        result = PluginResult(0, u'out', u'err', usage)
+
+        retcode, stdout, stderr = result
+
+        self.assertEqual((0, u'out', u'err'), result)
+        self.assertEqual(usage, result.usage)
+        self.assertIsNone(PluginResult(0, u'', u'').usage)
+
+
+class TestUsage(JigTestCase):
+
+    """
+    What it cost to run a plugin.
+
+    """
+    def test_not_measured(self):
+        """
+        Without the resource usage only the time is known.
+        """
+        usage = Usage.measured(1.5)
+
+        self.assertEqual(Usage(1.5, None, None, None, None), usage)
+        self.assertIsNone(usage.cpu)
+
+    def test_cpu(self):
+        """
+        The CPU time is the user and system time together.
+        """
+        self.assertEqual(0.75, Usage(1.0, 0.5, 0.25, None, None).cpu)
+
+    def test_maxrss_bytes(self):
+        """
+        The most memory used is in bytes whatever the platform reports.
+        """
+        self.assertEqual(2048 * 1024, _maxrss_bytes(2048, 'linux2'))
+        self.assertEqual(2048, _maxrss_bytes(2048, 'darwin'))
+
+
+class TestAccountedPopen(JigTestCase):
+
+    """
+    Processes keep the resources they used.
+
+    """
+    def test_rusage(self):
+        """
+        The CPU time and memory are known once the process has exited.
+        """
+        process = AccountedPopen(
+            ['sh', '-c', 'i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done'],
+            stdout=PIPE, stderr=PIPE)
+
+        self.assertIsNone(process.rusage)
+
+        process.communicate()
+
+        usage = Usage.measured(1.0, process.rusage, 10)
+
+        self.assertEqual(0, process.returncode)
+        self.assertGreater(usage.cpu, 0)
+        self.assertGreater(usage.maxrss, 0)
+        self.assertEqual(10, usage.payload)
+
+    def test_exit_status(self):
+        """
+        The exit status is the same as any other process.
+        """
+        process = AccountedPopen(['sh', '-c', 'exit 3'])
+
+        self.assertEqual(3, process.wait())
+        self.assertIsNotNone(process.rusage)
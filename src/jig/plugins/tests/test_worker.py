@@ -0,0 +1,177 @@
+import json
+from os import chmod
+from os.path import join
+from tempfile import mkdtemp
+
+from jig.tests.testcase import JigTestCase
+from jig.conf import PLUGIN_PRE_COMMIT_SCRIPT
+from jig.plugins.worker import PluginWorker, worker_for, stop_workers
+
+
+def request(crash='no', names=('a.txt',)):
+    """
+    A request as a single line of JSON.
+    """
+    return json.dumps({
+        'config': {'crash': crash},
+        'files': [{'name': i, 'diff': []} for i in names]})
+
+
+class TestPluginWorker(JigTestCase):
+
+    """
+    Plugins can be kept running between runs.
+
+    """
+    def setUp(self):
+        super(TestPluginWorker, self).setUp()
+
+        self.script = join(
+            self.fixturesdir, 'plugin10', PLUGIN_PRE_COMMIT_SCRIPT)
+        self.worker = PluginWorker(self.script)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def checked_by(self, stdout, name='a.txt'):
+        """
+        The message the worker sent back for the file ``name``.
+        """
+        return json.loads(stdout)[name][0][2]
+
+    def test_request(self):
+        """
+        The same process answers every request.
+        """
+        retcode, stdout, stderr = self.worker.request(request())
+
+        self.assertEqual(0, retcode)
+        self.assertEqual(u'', stderr)
+        self.assertEqual(
+            u'Checked by {0}'.format(self.worker.process.pid),
+            self.checked_by(stdout))
+
+        retcode, stdout, stderr = self.worker.request(
+            request(names=('b.txt',)))
+
+        self.assertEqual(
+            u'Checked by {0}'.format(self.worker.process.pid),
+            self.checked_by(stdout, 'b.txt'))
+
+    def test_restarts(self):
+        """
+        A worker that went away is started again.
+        """
+        self.worker.request(request())
+
+        first = self.worker.process.pid
+
+        self.worker.process.kill()
+        self.worker.process.wait()
+
+        retcode, stdout, stderr = self.worker.request(request())
+
+        self.assertEqual(0, retcode)
+        self.assertNotEqual(first, self.worker.process.pid)
+        self.assertEqual(
+            u'Checked by {0}'.format(self.worker.process.pid),
+            self.checked_by(stdout))
+
+    def test_timeout(self):
+        """
+        A worker that takes too long is killed and not tried again.
+        """
+        script = join(mkdtemp(), PLUGIN_PRE_COMMIT_SCRIPT)
+
+        with open(script, 'w') as fh:
+            fh.write('#!/bin/sh\nsleep 30\n')
+        chmod(script, 0o755)
+
+        worker = PluginWorker(script)
+
+        try:
+            retcode, stdout, stderr = worker.request(request(), timeout=0.2)
+        finally:
+            worker.stop()
+
+        self.assertEqual(1, retcode)
+        self.assertEqual(
+            u'Error: the plugin was stopped after running for 0.2 seconds',
+            stderr)
+
+    def test_crashes(self):
+        """
+        If the worker can't answer it's an error.
+        """
+        retcode, stdout, stderr = self.worker.request(request(crash='yes'))
+
+        self.assertEqual(1, retcode)
+        self.assertEqual(u'', stdout)
+        self.assertEqual(u'Crashed\n', stderr)
+        self.assertFalse(self.worker.running)
+
+    def test_crash_stderr(self):
+        """
+        Only what was written to stderr during the last request is kept.
+        """
+        script = join(mkdtemp(), PLUGIN_PRE_COMMIT_SCRIPT)
+
+        with open(script, 'w') as fh:
+            fh.write(
+                '#!/usr/bin/env python2.7\n'
+                'import json, sys\n'
+                'for line in iter(sys.stdin.readline, ""):\n'
+                '    data = json.loads(line)\n'
+                '    sys.stderr.write("Checking %s\\n" % '
+                'data["files"][0]["name"])\n'
+                '    sys.stderr.flush()\n'
+                '    if data["config"]["crash"] == "yes":\n'
+                '        sys.exit(1)\n'
+                '    sys.stdout.write("{}\\n")\n'
+                '    sys.stdout.flush()\n')
+        chmod(script, 0o755)
+
+        worker = PluginWorker(script)
+
+        try:
+            for name in ('a.txt', 'b.txt', 'c.txt'):
+                self.assertEqual(
+                    (0, u'{}', u''), worker.request(request(names=(name,))))
+
+            # What the earlier requests wrote isn't kept around
+            self.assertNotIn('Checking a.txt\n', worker._stderr)
+
+            retcode, stdout, stderr = worker.request(
+                request(crash='yes', names=('d.txt',)))
+        finally:
+            worker.stop()
+
+        self.assertEqual(1, retcode)
+        self.assertEqual(u'Checking d.txt\n', stderr)
+
+    def test_stop(self):
+        """
+        Workers can be stopped.
+        """
+        self.worker.start()
+        process = self.worker.process
+
+        self.worker.stop()
+
+        self.assertFalse(self.worker.running)
+        self.assertIsNotNone(process.returncode)
+
+    def test_worker_for(self):
+        """
+        There is one worker for each script.
+        """
+        worker = worker_for(self.script)
+
+        self.assertIs(worker, worker_for(self.script))
+
+        worker.start()
+
+        stop_workers()
+
+        self.assertFalse(worker.running)
+        self.assertIsNot(worker, worker_for(self.script))
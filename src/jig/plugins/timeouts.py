@@ -0,0 +1,173 @@
+import signal
+from os import killpg, setpgrp
+from time import time
+from threading import Event, Lock, Timer
+
+
+def timed_out(elapsed):
+    """
+    The error given for a plugin that was stopped after ``elapsed`` seconds.
+
+    :param float elapsed: how long the plugin ran
+    :rtype: unicode
+    """
+    return u'Error: the plugin was stopped after running for {0:.1f} ' \
+        u'seconds'.format(elapsed)
+
+
+def new_process_group():
+    """
+    Given to :py:class:`subprocess.Popen` as the ``preexec_fn``.
+
+    Anything the plugin starts is put in the same group, so it can all be
+    killed together when it runs for too long.
+    """
+    setpgrp()
+
+
+def kill_process_group(process):
+    """
+    Kill ``process`` and anything it started.
+
+    :param subprocess.Popen process: started with :py:func:`new_process_group`
+    """
+    try:
+        killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        # It already exited
+        pass
+
+
+class Cancellation(object):
+
+    """
+    Stops plugins that are still running once their results aren't needed.
+
+    Processes are registered while they run. When :py:meth:`cancel` is
+    called they are killed, and any registered afterwards are killed as soon
+    as they are.
+
+    """
+    def __init__(self):
+        self._cancelled = Event()
+        self._processes = set()
+        self._lock = Lock()
+
+    @property
+    def cancelled(self):
+        """
+        Has :py:meth:`cancel` been called.
+        """
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """
+        Kill all of the registered processes.
+        """
+        with self._lock:
+            self._cancelled.set()
+
+            for process in self._processes:
+                kill_process_group(process)
+
+    def register(self, process):
+        """
+        Kill ``process`` if the plugins are cancelled while it runs.
+
+        :param subprocess.Popen process: started with
+            :py:func:`new_process_group`
+        """
+        with self._lock:
+            self._processes.add(process)
+
+            if self.cancelled:
+                kill_process_group(process)
+
+    def unregister(self, process):
+        """
+        ``process`` has finished.
+        """
+        with self._lock:
+            self._processes.discard(process)
+
+
+class ProcessTimer(object):
+
+    """
+    Kills a plugin's process group if it runs longer than ``timeout`` seconds.
+
+    Used as a context manager around waiting for the process::
+
+        with ProcessTimer(process, 10) as timer:
+            stdout, stderr = process.communicate(stdin)
+
+        if timer.expired:
+            ...
+
+    """
+    def __init__(self, process, timeout=None, cancellation=None):
+        """
+        There is no limit if ``timeout`` is ``None``.
+
+        The process is also killed if the :py:class:`Cancellation` is
+        cancelled while it's running.
+        """
+        self.process = process
+        self.timeout = timeout
+        self.cancellation = cancellation
+        self.started = None
+        self.finished = None
+
+        self._expired = Event()
+        self._cancelled = False
+        self._timer = None
+
+    @property
+    def expired(self):
+        """
+        Was the process killed because it ran for too long.
+        """
+        return self._expired.is_set()
+
+    @property
+    def cancelled(self):
+        """
+        Was the process killed because the plugins were cancelled.
+        """
+        return not self.expired and self._cancelled
+
+    @property
+    def elapsed(self):
+        """
+        How many seconds the process has been waited on.
+        """
+        return (self.finished or time()) - self.started
+
+    def _expire(self):
+        self._expired.set()
+
+        kill_process_group(self.process)
+
+    def __enter__(self):
+        self.started = time()
+
+        if self.cancellation:
+            self.cancellation.register(self.process)
+
+        if self.timeout:
+            self._timer = Timer(self.timeout, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.finished = time()
+
+        if self._timer:
+            self._timer.cancel()
+
+        if self.cancellation:
+            self._cancelled = self.cancellation.cancelled
+
+            self.cancellation.unregister(self.process)
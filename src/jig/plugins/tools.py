@@ -207,6 +207,20 @@ def set_checked_for_updates(gitrepo, date=None):
     return config
 
 
+def jig_setting(config, option, default=None):
+    """
+    Read a single option from the ``[jig]`` section of the main config.
+
+    :param SafeConfigParser config: the config from :py:func:`get_jigconfig`
+    :param string option: name of the option to read
+    :param default: returned if the section or the option is missing
+    """
+    try:
+        return config.get('jig', option)
+    except (NoSectionError, NoOptionError):
+        return default
+
+
 def create_plugin(in_dir, bundle, name, template='python', settings={}):
     """
     Creates a plugin in the given directory.
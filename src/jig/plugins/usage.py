@@ -0,0 +1,115 @@
+import sys
+import errno
+from os import wait4
+from collections import namedtuple
+from subprocess import Popen
+
+
+def _maxrss_bytes(maxrss, platform=None):
+    """
+    Convert ``ru_maxrss`` to bytes.
+
+    It's already in bytes on Mac OS X but in kilobytes everywhere else.
+
+    :param int maxrss: from the resource usage
+    :param string platform: like :py:data:`sys.platform`, which is used if
+        it's not given
+    :rtype: int
+    """
+    if (platform or sys.platform) == 'darwin':
+        return maxrss
+
+    return maxrss * 1024
+
+
+class Usage(namedtuple('Usage', 'wall user sys maxrss payload')):
+
+    """
+    What running a plugin cost.
+
+    ``wall`` is how many seconds it took, ``user`` and ``sys`` how many
+    seconds of CPU time its process used, ``maxrss`` the most memory it had in
+    bytes and ``payload`` how many bytes of input it was sent. Anything
+    that can't be measured is ``None``, like the CPU and memory of plugins
+    that run inside of jig.
+
+    """
+    __slots__ = ()
+
+    @classmethod
+    def measured(cls, wall, rusage=None, payload=None):
+        """
+        Create the usage of a process from its :py:func:`os.wait4` resource
+        usage.
+
+        :param float wall: how many seconds it took
+        :param rusage: from :py:attr:`AccountedPopen.rusage`
+        :param int payload: how many bytes of input it was sent
+        :rtype: Usage
+        """
+        if rusage is None:
+            return cls(wall, None, None, None, payload)
+
+        return cls(
+            wall, rusage.ru_utime, rusage.ru_stime,
+            _maxrss_bytes(rusage.ru_maxrss), payload)
+
+    @property
+    def cpu(self):
+        """
+        Seconds of user and system CPU time, ``None`` if it wasn't measured.
+        """
+        if self.user is None or self.sys is None:
+            return None
+
+        return self.user + self.sys
+
+
+class PluginResult(tuple):
+
+    """
+    The ``(retcode, stdout, stderr)`` of a plugin along with its
+    :py:class:`Usage`.
+
+    It can be used anywhere the plain tuple is.
+
+    """
+    def __new__(cls, retcode, stdout, stderr, usage=None):
+        result = super(PluginResult, cls).__new__(
+            cls, (retcode, stdout, stderr))
+        result.usage = usage
+
+        return result
+
+
+class AccountedPopen(Popen):
+
+    """
+    A :py:class:`subprocess.Popen` that keeps the resources its process used.
+
+    Once the process has been waited on :py:attr:`rusage` is the
+    :py:func:`os.wait4` resource usage, ``None`` until then.
+
+    """
+    rusage = None
+
+    def wait(self):
+        """
+        Wait for the process to exit, like :py:meth:`subprocess.Popen.wait`.
+        """
+        while self.returncode is None:
+            try:
+                pid, status, rusage = wait4(self.pid, 0)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno != errno.ECHILD:
+                    raise
+                # Already reaped somewhere else
+                pid, status, rusage = self.pid, 0, None
+
+            if pid == self.pid:
+                self.rusage = rusage
+                self._handle_exitstatus(status)
+
+        return self.returncode
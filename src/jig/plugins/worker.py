@@ -0,0 +1,201 @@
+import atexit
+from os.path import getmtime
+from subprocess import Popen, PIPE
+from threading import Thread, Lock
+
+from jig.plugins.timeouts import ProcessTimer, new_process_group, timed_out
+
+# Workers that have been started and when their pre-commit script was last
+# changed, by the path of the script
+_workers = {}
+_workers_lock = Lock()
+
+
+class PluginWorker(object):
+
+    """
+    A plugin's pre-commit script kept running between runs.
+
+    Each request is one line of JSON written to the script's stdin, the same
+    object other plugins receive. The script answers with one line of JSON on
+    its stdout, the same output other plugins write before they exit.
+
+    If the script exits it's started again and given the request one more
+    time.
+
+    """
+    def __init__(self, script):
+        """
+        Where ``script`` is the path to the plugin's pre-commit script.
+        """
+        self.script = script
+        self.process = None
+        self._collector = None
+
+        # What the script has written to stderr during the current request
+        self._stderr = []
+
+        # Only one request at a time
+        self._lock = Lock()
+
+    @property
+    def running(self):
+        """
+        Is the script running.
+        """
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """
+        Start the script if it isn't running.
+        """
+        if self.running:
+            return
+
+        self._stderr = []
+        self.process = Popen(
+            [self.script], stdin=PIPE, stdout=PIPE, stderr=PIPE,
+            preexec_fn=new_process_group)
+
+        def collect(stream, collected):
+            # Drained from another thread so the script never blocks on it
+            for line in iter(stream.readline, ''):
+                collected.append(line)
+
+        self._collector = Thread(
+            target=collect, args=(self.process.stderr, self._stderr))
+        self._collector.daemon = True
+        self._collector.start()
+
+    def stop(self):
+        """
+        Stop the script.
+        """
+        if not self.process:
+            return
+
+        try:
+            # Scripts reading requests in a loop will see the end of stdin
+            self.process.stdin.close()
+        except IOError:
+            pass
+
+        if self.process.poll() is None:
+            try:
+                self.process.terminate()
+            except OSError:
+                pass
+
+        self.process.wait()
+        self._collector.join()
+
+        self.process.stdout.close()
+        self.process.stderr.close()
+        self.process = None
+
+    def _request(self, line, timeout=None, cancellation=None):
+        """
+        Send one request and read the response, ``None`` if the script died.
+
+        Returns the response and the :py:class:`ProcessTimer` that was
+        waiting on it.
+        """
+        self.start()
+
+        # Only what's written while answering this request is reported, the
+        # list is shared with the thread collecting it
+        del self._stderr[:]
+
+        with ProcessTimer(self.process, timeout, cancellation) as timer:
+            try:
+                self.process.stdin.write(line + '\n')
+                self.process.stdin.flush()
+
+                response = self.process.stdout.readline()
+            except IOError:
+                # The script is gone, SIGPIPE
+                response = ''
+
+        if not response:
+            self.stop()
+            return None, timer
+
+        return response, timer
+
+    def request(self, line, timeout=None, cancellation=None):
+        """
+        Send a single line of JSON to the script and return its response.
+
+        Returns the same ``(retcode, stdout, stderr)`` as
+        :py:meth:`jig.plugins.Plugin.pre_commit`. If the script takes longer
+        than ``timeout`` seconds it's killed and not tried again. If it's
+        killed because ``cancellation`` was cancelled ``None`` is returned.
+
+        :param str line: a JSON object without any new lines
+        :param float timeout: seconds to wait, ``None`` to wait forever
+        :param Cancellation cancellation: stops waiting for the script
+        :rtype: tuple
+        """
+        with self._lock:
+            response, timer = self._request(line, timeout, cancellation)
+
+            if response is None and not timer.expired \
+                    and not timer.cancelled:
+                # Crashed, give it one more chance in the time that's left
+                remaining = timeout and max(timeout - timer.elapsed, 0.001)
+
+                response, timer = self._request(
+                    line, remaining, cancellation)
+
+            if response is None and timer.cancelled:
+                return None
+
+            if timer.expired:
+                return 1, u'', timed_out(timer.elapsed)
+
+            if response is None:
+                stderr = ''.join(self._stderr).decode('utf-8')
+
+                return 1, u'', stderr or \
+                    u'Error: the plugin worker exited without a response'
+
+            return 0, response.decode('utf-8').rstrip('\n'), u''
+
+
+def worker_for(script):
+    """
+    Get the worker for ``script``, one is created if it doesn't exist yet.
+
+    If the script has changed since its worker was created, like when the
+    plugin was updated while ``jig daemon`` was running, the old worker is
+    stopped and a new one is created.
+
+    :param string script: path to the plugin's pre-commit script
+    :rtype: PluginWorker
+    """
+    try:
+        modified = getmtime(script)
+    except OSError:
+        # Starting it will fail the same way it does for any other plugin
+        modified = None
+
+    with _workers_lock:
+        if script in _workers and _workers[script][0] != modified:
+            _workers.pop(script)[1].stop()
+
+        if script not in _workers:
+            _workers[script] = (modified, PluginWorker(script))
+
+        return _workers[script][1]
+
+
+@atexit.register
+def stop_workers():
+    """
+    Stop all of the workers that have been started.
+    """
+    with _workers_lock:
+        for modified, worker in _workers.values():
+            worker.stop()
+
+        _workers.clear()
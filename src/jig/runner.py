@@ -1,21 +1,40 @@
 import json
 import sys
+from os import stat
+from os.path import join
+from ConfigParser import NoSectionError, NoOptionError
 from datetime import datetime
+from threading import Thread, Lock
+from Queue import Queue, Empty
 
 from git import Repo
 
 from jig.exc import GitRepoNotInitialized
-from jig.conf import PLUGIN_CHECK_FOR_UPDATES
+from jig.conf import (
+    PLUGIN_CHECK_FOR_UPDATES, JIG_DEFAULT_JOBS, JIG_DIFF_ALGORITHMS,
+    JIG_DEFAULT_DIFF_ALGORITHM, JIG_PREPARE_STRATEGIES,
+    JIG_DEFAULT_PREPARE_STRATEGY, JIG_DIR_NAME, JIG_PLUGIN_CONFIG_FILENAME,
+    JIG_DAEMON_BLOB_CACHE_SIZE, PLUGIN_CONFIG_FILENAME)
 from jig.gitutils.checks import repo_jiginitialized
 from jig.gitutils.branches import parse_rev_range, prepare_working_directory
+from jig.gitutils.blobs import BlobCache
 from jig.diffconvert import GitDiffIndex
+from jig.cache import (
+    ResultCache, cache_size_for, run_fingerprint, last_successful_run,
+    set_last_successful_run)
+from jig.stats import PluginStats
+from jig.trace import span, trace_filename, tracing
 from jig.plugins import get_jigconfig, PluginManager
+from jig.plugins.manager import _aggregate_for
+from jig.plugins.timeouts import Cancellation
+from jig.plugins.usage import PluginResult
 from jig.plugins.tools import (
     set_jigconfig, last_checked_for_updates, plugins_have_updates,
-    set_checked_for_updates, update_plugins)
+    set_checked_for_updates, update_plugins, jig_setting)
 from jig.commands import get_command, list_commands
-from jig.output import ConsoleView, ResultsCollator
+from jig.output import ConsoleView, ResultsCollator, STOP
 from jig.formatters.fancy import FancyFormatter
+from jig.formatters.profile import print_profile
 
 try:
     from collections import OrderedDict
@@ -41,16 +60,396 @@ def _diff_for(gitrepo, rev_range=None):
             return None
 
 
+def _jobs_for(config, jobs=None):
+    """
+    Determine how many plugins are allowed to run at the same time.
+
+    If ``jobs`` is not given the ``[jig] jobs`` option from ``config`` is used,
+    and failing that :py:data:`jig.conf.JIG_DEFAULT_JOBS`.
+
+    :param SafeConfigParser config: the main jig config
+    :param int jobs: explicitly requested number of jobs
+    :rtype: int
+    """
+    if jobs is None:
+        try:
+            jobs = int(jig_setting(config, 'jobs', JIG_DEFAULT_JOBS))
+        except ValueError:
+            jobs = JIG_DEFAULT_JOBS
+
+    return max(1, jobs)
+
+
+def _diff_algorithm_for(config):
+    """
+    Determine which algorithm describes the changes made to files.
+
+    This is the ``[jig] diff_algorithm`` option from ``config`` if it's one of
+    :py:data:`jig.conf.JIG_DIFF_ALGORITHMS`, otherwise the default.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: string
+    """
+    algorithm = jig_setting(
+        config, 'diff_algorithm', JIG_DEFAULT_DIFF_ALGORITHM)
+
+    if algorithm not in JIG_DIFF_ALGORITHMS:
+        return JIG_DEFAULT_DIFF_ALGORITHM
+
+    return algorithm
+
+
+def _prepare_strategy_for(config):
+    """
+    Determine how the staged changes are prepared for the plugins.
+
+    This is the ``[jig] prepare`` option from ``config`` if it's one of
+    :py:data:`jig.conf.JIG_PREPARE_STRATEGIES`, otherwise the default.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: string
+    """
+    strategy = jig_setting(config, 'prepare', JIG_DEFAULT_PREPARE_STRATEGY)
+
+    if strategy not in JIG_PREPARE_STRATEGIES:
+        return JIG_DEFAULT_PREPARE_STRATEGY
+
+    return strategy
+
+
+def _max_blob_size_for(config):
+    """
+    Determine the size in bytes of the largest file version to describe.
+
+    This is the ``[jig] max_blob_size`` option from ``config``. Without it, or
+    if it's not a positive number, there is no limit and ``None`` is returned.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: int or None
+    """
+    try:
+        size = int(jig_setting(config, 'max_blob_size', 0))
+    except ValueError:
+        return None
+
+    return size if size > 0 else None
+
+
+def _fail_fast_for(config, fail_fast=None):
+    """
+    Determine if the plugins should stop as soon as one of them stops.
+
+    If ``fail_fast`` is not given the ``[jig] fail_fast`` option from
+    ``config`` is used, which is off unless it's ``yes``, ``on``, ``true`` or
+    ``1``.
+
+    :param SafeConfigParser config: the main jig config
+    :param bool fail_fast: explicitly requested
+    :rtype: bool
+    """
+    if fail_fast is not None:
+        return fail_fast
+
+    try:
+        return config.getboolean('jig', 'fail_fast')
+    except (NoSectionError, NoOptionError, ValueError):
+        return False
+
+
+def _stream_for(config, stream=None):
+    """
+    Determine if results should be printed as each plugin finishes.
+
+    If ``stream`` is not given the ``[jig] stream`` option from ``config`` is
+    used, which is off unless it's ``yes``, ``on``, ``true`` or ``1``.
+
+    :param SafeConfigParser config: the main jig config
+    :param bool stream: explicitly requested
+    :rtype: bool
+    """
+    if stream is not None:
+        return stream
+
+    try:
+        return config.getboolean('jig', 'stream')
+    except (NoSectionError, NoOptionError, ValueError):
+        return False
+
+
+def _max_messages_for(config):
+    """
+    Determine how many messages are kept for all of the plugins together.
+
+    This is the ``[jig] max_messages`` option from ``config``. Without it, or
+    if it's not a positive number, there is no limit and ``None`` is returned.
+
+    :param SafeConfigParser config: the main jig config
+    :rtype: int or None
+    """
+    try:
+        limit = int(jig_setting(config, 'max_messages', 0))
+    except ValueError:
+        return None
+
+    return limit if limit > 0 else None
+
+
+def _decode(outcome):
+    """
+    Decode the JSON ``stdout`` of a plugin's ``(retcode, stdout, stderr)``.
+
+    The :py:class:`jig.plugins.usage.Usage` is kept, cached results don't
+    have one.
+    """
+    retcode, stdout, stderr = outcome
+
+    try:
+        # Is it JSON data?
+        data = json.loads(stdout)
+    except TypeError:
+        # In-process plugins return the data itself
+        data = stdout
+    except ValueError:
+        # Not JSON
+        data = stdout
+
+    return PluginResult(
+        retcode, data, stderr, getattr(outcome, 'usage', None))
+
+
+def _stops(plugin, outcome):
+    """
+    Does the decoded ``outcome`` of ``plugin`` contain a stop message.
+    """
+    collator = ResultsCollator(OrderedDict([(plugin, outcome)]))
+
+    return collator.counts[STOP] > 0
+
+
+def _run_concurrently(func, items, jobs, order=None):
+    """
+    Call ``func`` for each of ``items`` using a pool of ``jobs`` threads.
+
+    The return values are given back as a list in the same order as ``items``
+    regardless of which call finished first. If any call raises an exception
+    it is raised again in the calling thread once the pool has stopped.
+
+    :param function func: called with a single item
+    :param list items: the things to call ``func`` with
+    :param int jobs: maximum number of calls running at the same time
+    :param list order: indexes of ``items`` in the order the calls should be
+        started, if None they are started in the order they were given. Only
+        used when there is more than one job
+    :rtype: list
+    """
+    items = list(items)
+
+    if jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    if order is None:
+        order = range(len(items))
+
+    returned = [None] * len(items)
+    failures = []
+
+    queue = Queue()
+    for index in order:
+        queue.put((index, items[index]))
+
+    def worker():
+        while not failures:
+            try:
+                index, item = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                returned[index] = func(item)
+            except Exception as e:
+                failures.append(e)
+
+    workers = [Thread(target=worker) for i in range(min(jobs, len(items)))]
+
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+
+    for thread in workers:
+        thread.join()
+
+    if failures:
+        raise failures[0]
+
+    return returned
+
+
+class _InstallOrder(object):
+
+    """
+    Passes each plugin's result on in the order the plugins were installed.
+
+    The result of a plugin that finishes before the ones installed ahead of
+    it is held back until they have all finished or been skipped.
+
+    """
+    def __init__(self, finished, plugins):
+        """
+        :param function finished: called with each plugin and its result
+        :param list plugins: in the order they were installed
+        """
+        self._finished = finished
+        self._waiting = list(plugins)
+        self._done = {}
+        self._lock = Lock()
+
+    def __call__(self, plugin, outcome):
+        """
+        ``plugin`` has finished, its ``outcome`` is None if it was skipped.
+        """
+        with self._lock:
+            self._done[plugin] = outcome
+
+            while self._waiting and self._waiting[0] in self._done:
+                plugin = self._waiting.pop(0)
+                outcome = self._done.pop(plugin)
+
+                if outcome is not None:
+                    self._finished(plugin, outcome)
+
+
+def _stamp(path):
+    """
+    When the file at ``path`` was modified and its size, None if it's missing.
+    """
+    try:
+        info = stat(path)
+    except OSError:
+        return None
+
+    return info.st_mtime, info.st_size
+
+
+class Preloaded(object):
+
+    """
+    What a run loads from a Git repository, kept for the runs after it.
+
+    ``jig daemon`` checks the same repository over and over. The jig config
+    and the plugins are only loaded again once one of the files they're read
+    from has changed, and the GitPython ``Repo`` once the repository's own
+    config has. The blobs that were read are kept in a
+    :py:class:`jig.gitutils.blobs.BlobCache`.
+
+    """
+    def __init__(self, gitrepo, blob_cache_size=JIG_DAEMON_BLOB_CACHE_SIZE):
+        """
+        :param string gitrepo: path to the Git repository
+        :param int blob_cache_size: how many bytes of blobs are kept
+        """
+        self.gitrepo = gitrepo
+        self.blob_cache = BlobCache(blob_cache_size)
+
+        # Each is a tuple of what it was loaded from and what was loaded
+        self._config = None
+        self._plugins = None
+        self._repo = None
+
+        self._lock = Lock()
+
+    def jigconfig(self):
+        """
+        The main jig config, see :py:func:`jig.plugins.get_jigconfig`.
+
+        :rtype: SafeConfigParser
+        """
+        stamp = _stamp(
+            join(self.gitrepo, JIG_DIR_NAME, JIG_PLUGIN_CONFIG_FILENAME))
+
+        with self._lock:
+            if self._config is None or self._config[0] != stamp:
+                self._config = (stamp, get_jigconfig(self.gitrepo))
+
+            return self._config[1]
+
+    def plugin_manager(self, config):
+        """
+        The :py:class:`jig.plugins.PluginManager` for ``config``.
+
+        :param SafeConfigParser config: from :py:meth:`jigconfig`
+        """
+        # Each plugin's config is read when the plugins are loaded
+        paths = [config.get(i, 'path') for i in config.sections()
+                 if i.startswith('plugin:')]
+        stamps = [_stamp(join(i, PLUGIN_CONFIG_FILENAME)) for i in paths]
+
+        with self._lock:
+            if self._plugins is None or self._plugins[0] is not config or \
+                    self._plugins[1] != stamps:
+                self._plugins = (config, stamps, PluginManager(config))
+
+            return self._plugins[2]
+
+    def repo(self):
+        """
+        The GitPython ``Repo``.
+
+        :rtype: git.Repo
+        """
+        with self._lock:
+            if self._repo is not None:
+                stamp, repo = self._repo
+
+                if _stamp(join(repo.git_dir, 'config')) == stamp:
+                    return repo
+
+            repo = Repo(self.gitrepo)
+            self._repo = (_stamp(join(repo.git_dir, 'config')), repo)
+
+            return repo
+
+
 class Runner(object):
 
     """
     Runs jig in a Git repo.
 
     """
-    def __init__(self, view=None, formatter=None):
+    def __init__(self, view=None, formatter=None, preloaded=None):
+        """
+        Give it a :py:class:`Preloaded` as ``preloaded`` to use what was
+        loaded by earlier runs.
+        """
         self.view = view or ConsoleView()
         create_formatter = lambda f: f() if f else FancyFormatter()
         self.formatter = create_formatter(formatter)
+        self.preloaded = preloaded
+
+    def _jigconfig(self, gitrepo):
+        """
+        The main jig config, see :py:class:`Preloaded`.
+        """
+        if self.preloaded:
+            return self.preloaded.jigconfig()
+
+        return get_jigconfig(gitrepo)
+
+    def _plugin_manager(self, config):
+        """
+        The plugins in ``config``, see :py:class:`Preloaded`.
+        """
+        if self.preloaded:
+            return self.preloaded.plugin_manager(config)
+
+        return PluginManager(config)
+
+    def _repo(self, gitrepo):
+        """
+        The GitPython ``Repo``, see :py:class:`Preloaded`.
+        """
+        if self.preloaded:
+            return self.preloaded.repo()
+
+        return Repo(gitrepo)
 
     def fromhook(self, gitrepo):
         """
@@ -60,7 +459,9 @@ class Runner(object):
         """
         return self.main(gitrepo)
 
-    def main(self, gitrepo, plugin=None, rev_range=None, interactive=True):
+    def main(self, gitrepo, plugin=None, rev_range=None, interactive=True,
+             jobs=None, fail_fast=None, profile=False, trace=None,
+             stream=None):
         """
         Run Jig on the given Git repository.
 
@@ -71,59 +472,164 @@ class Runner(object):
             index
         :param bool interactive: if True then the user will be prompted to
             commit or cancel when any messages are generated by the plugins.
+        :param int jobs: how many plugins to run at the same time, if None
+            then the ``[jig] jobs`` setting is used
+        :param bool fail_fast: stop the rest of the plugins once one of them
+            reports a stop message, if None then the ``[jig] fail_fast``
+            setting is used
+        :param bool profile: show how long each plugin took, and the CPU and
+            memory it used, after the results
+        :param string trace: file to write a trace of the run to, see
+            :py:mod:`jig.trace`. If None then the ``JIG_TRACE`` environment
+            variable is used
+        :param bool stream: print the results of each plugin as soon as it
+            finishes, if None then the ``[jig] stream`` setting is used
         """
-        sys.stdin = open('/dev/tty')
-
-        if interactive:
-            # Check to see if the plugins need updating
-            now = datetime.utcnow()
+        with tracing(trace_filename(trace)):
+            sys.stdin = open('/dev/tty')
+
+            with span(u'update check'):
+                if interactive and self.update_check_due(gitrepo):
+                    # Check to see if the plugins need updating
+                    self.update_plugins(gitrepo)
+
+            report_counts, fingerprint = self.check(
+                gitrepo, plugin=plugin, rev_range=rev_range,
+                interactive=interactive, jobs=jobs, fail_fast=fail_fast,
+                profile=profile, stream=stream)
+
+            if interactive and report_counts and sum(report_counts):
+                # Git will run a pre-commit hook with stdin pointed at
+                # /dev/null. We will reconnect to the tty so that raw_input
+                # works.
+                while True:
+                    try:
+                        answer = raw_input(
+                            '\nCommit anyway (hit "c"), or stop (hit "s"): ')
+                    except KeyboardInterrupt:
+                        sys.exit(1)
+                    if answer and answer[0].lower() == 's':
+                        sys.exit(1)
+                    elif answer and answer[0].lower() == 'c':
+                        break
+
+            if fingerprint:
+                set_last_successful_run(gitrepo, fingerprint)
+
+            sys.exit(0)
+
+    def check(self, gitrepo, plugin=None, rev_range=None, interactive=True,
+              jobs=None, fail_fast=None, profile=False, stream=None):
+        """
+        Run the plugins on the Git repository and print the results.
 
-            with self.view.out():
-                last_checked = last_checked_for_updates(gitrepo) or \
-                    datetime.fromtimestamp(0)
+        This is everything :py:meth:`main` does without asking the user any
+        questions. Returns a tuple of the number of info, warn and stop
+        messages, ``None`` if the changes were not checked, and the
+        :py:func:`jig.cache.run_fingerprint` to record if the user commits.
 
-            if now > last_checked + PLUGIN_CHECK_FOR_UPDATES:
-                self.update_plugins(gitrepo)
+        See :py:meth:`main` for the arguments.
 
+        :rtype: tuple
+        """
         with self.view.out() as printer:
-            if not repo_jiginitialized(gitrepo):
-                raise GitRepoNotInitialized(
-                    'This repository has not been initialized.')
+            with span(u'repo_jiginitialized'):
+                if not repo_jiginitialized(gitrepo):
+                    raise GitRepoNotInitialized(
+                        'This repository has not been initialized.')
 
             if rev_range:
-                rev_range_parsed = parse_rev_range(gitrepo, rev_range)
+                with span(u'parse_rev_range'):
+                    rev_range_parsed = parse_rev_range(gitrepo, rev_range)
             else:
                 rev_range_parsed = None
 
-            with prepare_working_directory(gitrepo, rev_range_parsed):
-                results = self.results(   # pragma: no branch
-                    gitrepo,
-                    plugin=plugin,
-                    rev_range=rev_range_parsed
-                )
-
-            if not results:
-                report_counts = (0, 0, 0)
+            config = self._jigconfig(gitrepo)
+
+            fingerprint = None
+            if interactive and not plugin and not rev_range:
+                # Committing exactly what passed last time, like when only the
+                # commit message was fixed, doesn't need to be checked again
+                with span(u'run_fingerprint'):
+                    fingerprint = run_fingerprint(
+                        gitrepo, config,
+                        self._plugin_manager(config).plugins,
+                        self._repo(gitrepo))
+
+            # Leave the working directory alone and give the plugins a copy of
+            # the changed files instead
+            export = _prepare_strategy_for(config) == 'export'
+
+            # Formatters that can print one plugin at a time are given each
+            # plugin's results as soon as it finishes
+            streaming = _stream_for(config, stream) and \
+                hasattr(self.formatter, 'print_plugin')
+            printing = Lock()
+            started = []
+
+            limit = _max_messages_for(config)
+            aggregate = _aggregate_for(config)
+            # How many messages the plugins that were streamed have shown,
+            # they're streamed in the order they were installed if there's a
+            # limit so the same ones are shown as in the summary
+            shown = [0]
+
+            def finished(installed, outcome):
+                with printing:
+                    if not started:
+                        self.formatter.start_stream(printer)
+                        started.append(True)
+
+                    collator = ResultsCollator(
+                        OrderedDict([(installed, outcome)]),
+                        limit=None if limit is None else limit - shown[0],
+                        aggregate=aggregate)
+                    shown[0] += sum([len(i) for i in collator.messages])
+
+                    self.formatter.print_plugin(printer, collator)
+
+            if fingerprint and fingerprint == last_successful_run(gitrepo):
+                printer(u'Jig already checked these changes, skipping.')
+
+                report_counts = None
             else:
-                collator = ResultsCollator(results)
-
-                report_counts = self.formatter.print_results(printer, collator)
-
-        if interactive and report_counts and sum(report_counts):
-            # Git will run a pre-commit hook with stdin pointed at /dev/null.
-            # We will reconnect to the tty so that raw_input works.
-            while True:
-                try:
-                    answer = raw_input(
-                        '\nCommit anyway (hit "c"), or stop (hit "s"): ')
-                except KeyboardInterrupt:
-                    sys.exit(1)
-                if answer and answer[0].lower() == 's':
-                    sys.exit(1)
-                elif answer and answer[0].lower() == 'c':
-                    break
-
-        sys.exit(0)
+                with prepare_working_directory(
+                        gitrepo, rev_range_parsed, export=export) as prepared:
+                    results = self.results(   # pragma: no branch
+                        gitrepo,
+                        plugin=plugin,
+                        rev_range=rev_range_parsed,
+                        jobs=jobs,
+                        root=prepared if export else None,
+                        fail_fast=fail_fast,
+                        finished=finished if streaming else None,
+                        # The limit is shared in the order the summary uses
+                        ordered=limit is not None
+                    )
+
+                if not results:
+                    report_counts = (0, 0, 0)
+                else:
+                    with span(u'ResultsCollator'):
+                        collator = ResultsCollator(
+                            results, limit=limit, aggregate=aggregate)
+
+                    with span(u'format'):
+                        if streaming:
+                            if not started:
+                                # Every plugin was skipped
+                                self.formatter.start_stream(printer)
+
+                            report_counts = self.formatter.end_stream(
+                                printer, collator)
+                        else:
+                            report_counts = self.formatter.print_results(
+                                printer, collator)
+
+                        if profile:
+                            print_profile(printer, collator)
+
+        return report_counts, fingerprint
 
     def fromconsole(self, argv):
         """
@@ -144,6 +650,21 @@ class Runner(object):
             # If it's empty
             self.view.print_help(list_commands())
 
+    def update_check_due(self, gitrepo):
+        """
+        Has it been long enough to check the plugins for updates again.
+
+        :param string gitrepo: path to the Git repository
+        :rtype: bool
+        """
+        now = datetime.utcnow()
+
+        with self.view.out():
+            last_checked = last_checked_for_updates(gitrepo) or \
+                datetime.fromtimestamp(0)
+
+        return now > last_checked + PLUGIN_CHECK_FOR_UPDATES
+
     def update_plugins(self, gitrepo):
         """
         Prompt the user to update the plugins if available.
@@ -183,7 +704,8 @@ class Runner(object):
                 if answer and answer[0].lower() == 'n':
                     return False
 
-    def results(self, gitrepo, plugin=None, rev_range=None):
+    def results(self, gitrepo, plugin=None, rev_range=None, jobs=None,
+                root=None, fail_fast=None, finished=None, ordered=False):
         """
         Run jig in the repository and return results.
 
@@ -195,8 +717,24 @@ class Runner(object):
             all plugins
         :param RevRangePair rev_range: the revision range to use instead of the
             Git index
+        :param int jobs: how many plugins to run at the same time, if None
+            then the ``[jig] jobs`` setting is used
+        :param unicode root: directory the staged files were exported to, if
+            None they are in the Git repository's working directory
+        :param bool fail_fast: once a plugin reports a stop message the ones
+            still running are stopped and the rest are skipped, their result
+            is None. If None then the ``[jig] fail_fast`` setting is used
+        :param function finished: called with each plugin and its decoded
+            result as soon as it finishes, from the thread that ran it.
+            Skipped plugins are not given to it
+        :param bool ordered: ``finished`` is called in the order the plugins
+            were installed instead of the order they finish in, the results
+            of plugins that finish early are held back
         """
-        pm = PluginManager(get_jigconfig(gitrepo))
+        with span(u'PluginManager'):
+            config = self._jigconfig(gitrepo)
+
+            pm = self._plugin_manager(config)
 
         # Check to make sure we have some plugins to run
         with self.view.out() as printer:
@@ -206,9 +744,10 @@ class Runner(object):
                     'use jig install to add some.')
                 return
 
-            self.repo = Repo(gitrepo)
+            self.repo = self._repo(gitrepo)
 
-            diff = _diff_for(self.repo, rev_range)
+            with span(u'_diff_for'):
+                diff = _diff_for(self.repo, rev_range)
 
             if diff is None:
                 # No diff on head, no commits have been written yet
@@ -229,24 +768,92 @@ class Runner(object):
 
         # Our git diff index is an object that makes working with the diff much
         # easier in the context of our plugins.
-        gdi = GitDiffIndex(gitrepo, diff)
+        with span(u'GitDiffIndex'):
+            gdi = GitDiffIndex(
+                gitrepo, diff, _diff_algorithm_for(config),
+                _max_blob_size_for(config), root,
+                self.preloaded.blob_cache if self.preloaded else None)
+
+            # Only the plugin that was requested, or all of them, as long as
+            # they are interested in at least one of the files
+            to_run = [i for i in pm.plugins
+                      if (not plugin or i.name == plugin) and
+                      i.wants_any(gdi)]
+
+        # Every plugin that runs is known, so the files can be let go once
+        # they've all read them
+        for i in to_run:
+            gdi.expect(i, i.diff_context)
 
-        # Go through the plugins and gather up the results
-        results = OrderedDict()
-        for installed in pm.plugins:
-            if plugin and installed.name != plugin:
-                # This plugin doesn't match the requested
-                continue
+        cache = ResultCache(gitrepo, cache_size_for(config))
+        stats = PluginStats(gitrepo)
 
-            retcode, stdout, stderr = installed.pre_commit(gdi)
+        fail_fast = _fail_fast_for(config, fail_fast)
+        cancellation = Cancellation()
 
+        in_order = _InstallOrder(finished, to_run) \
+            if finished and ordered else None
+
+        def pre_commit(installed):
             try:
-                # Is it JSON data?
-                data = json.loads(stdout)
-            except ValueError:
-                # Not JSON
-                data = stdout
+                outcome = _pre_commit(installed)
+            finally:
+                # Whatever happened, this plugin is done with the files
+                gdi.release(installed)
+
+            if in_order:
+                # Skipped plugins can't hold up the ones after them
+                in_order(installed, outcome)
+            elif finished and outcome is not None:
+                finished(installed, outcome)
+
+            return outcome
+
+        def _pre_commit(installed):
+            if cancellation.cancelled:
+                # A stop message was already reported, skip this one
+                return None
+
+            # Same plugin and same files, the results will be the same too
+            with span(u'cache', plugin=installed.name):
+                key = cache.key(installed, gdi)
+
+                outcome = cache.get(key)
+
+            if outcome is None:
+                with span(installed.name, 'plugin',
+                          protocol=installed.protocol):
+                    outcome = installed.pre_commit(gdi, cancellation)
+
+                if outcome is None:
+                    # Stopped before it finished
+                    return None
+
+                if getattr(outcome, 'usage', None):
+                    stats.record(installed, outcome.usage)
+
+                cache.set(key, outcome)
+
+            outcome = _decode(outcome)
+
+            if fail_fast and _stops(installed, outcome):
+                # The commit is going to be stopped whatever the others say
+                cancellation.cancel()
+
+            return outcome
+
+        # Plugins are separate processes so they can run side-by-side. The
+        # slowest ones are started first so they don't hold up the end of the
+        # run, the results still come back in the order the plugins were
+        # installed
+        outcomes = _run_concurrently(
+            pre_commit, to_run, _jobs_for(config, jobs),
+            stats.schedule(to_run))
+
+        cache.evict()
+        stats.save()
 
-            results[installed] = (retcode, data, stderr)
+        # Gather up the results, None for the plugins that were skipped
+        results = OrderedDict(zip(to_run, outcomes))
 
         return results
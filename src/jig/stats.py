@@ -0,0 +1,146 @@
+"""
+Plugin timing history
+=====================
+
+Every time a plugin runs, how long it took, how much CPU time and memory it
+used and how much input it was sent are recorded in :file:`.jig/stats`. Only
+the last few runs of each plugin are kept.
+
+When plugins run concurrently the order they are started in decides how long
+the whole run takes. A slow plugin started last keeps everyone waiting after
+the others have finished, so the history is used to start the slowest plugins
+first. Plugins that haven't been timed yet are started before all of them,
+in the order they were installed, since nothing is known about them.
+"""
+import json
+from os import fdopen, rename, unlink
+from os.path import dirname, join
+from tempfile import mkstemp
+from threading import Lock
+
+from jig.conf import JIG_DIR_NAME, JIG_STATS_FILENAME, JIG_STATS_HISTORY
+
+
+def _plugin_key(plugin):
+    """
+    What the history of ``plugin`` is recorded under.
+    """
+    return u'{0}:{1}'.format(plugin.bundle, plugin.name)
+
+
+class PluginStats(object):
+
+    """
+    How long plugins took the last few times they ran.
+
+    """
+    def __init__(self, gitrepo, history=JIG_STATS_HISTORY):
+        """
+        Where ``gitrepo`` is the path to the root of the Git repository.
+
+        Up to ``history`` runs are kept for each plugin.
+        """
+        self.filename = join(gitrepo, JIG_DIR_NAME, JIG_STATS_FILENAME)
+        self.history = history
+
+        self._runs = None
+        self._lock = Lock()
+
+    @property
+    def runs(self):
+        """
+        The recorded runs of each plugin, read the first time it's needed.
+
+        A dictionary of lists, each run is a dictionary with ``wall``,
+        ``cpu``, ``maxrss`` and ``payload`` keys.
+        """
+        if self._runs is None:
+            try:
+                with open(self.filename, 'r') as fh:
+                    self._runs = json.load(fh)
+            except (IOError, ValueError):
+                self._runs = {}
+
+            if not isinstance(self._runs, dict):
+                self._runs = {}
+
+        return self._runs
+
+    def record(self, plugin, usage):
+        """
+        Record a run of ``plugin``.
+
+        Can be called from more than one thread at the same time.
+
+        :param Plugin plugin: the plugin that ran
+        :param Usage usage: see :py:class:`jig.plugins.usage.Usage`
+        """
+        with self._lock:
+            runs = self.runs.setdefault(_plugin_key(plugin), [])
+
+            runs.append(
+                {'wall': usage.wall, 'cpu': usage.cpu, 'maxrss': usage.maxrss,
+                 'payload': usage.payload})
+
+            del runs[:-self.history]
+
+    def expected(self, plugin):
+        """
+        How many seconds ``plugin`` is expected to take.
+
+        This is the average of its recorded runs, ``None`` if it hasn't been
+        recorded yet.
+
+        :param Plugin plugin: the plugin
+        :rtype: float
+        """
+        runs = self.runs.get(_plugin_key(plugin), [])
+
+        walls = [i.get('wall') for i in runs if isinstance(i, dict)]
+        walls = [i for i in walls if isinstance(i, (int, float))]
+
+        if not walls:
+            return None
+
+        return sum(walls) / len(walls)
+
+    def schedule(self, plugins):
+        """
+        The order ``plugins`` should be started in, slowest first.
+
+        Plugins that haven't been recorded come first in the order they were
+        given.
+
+        :param list plugins: the plugins that are about to run
+        :returns: the indexes of ``plugins`` in the order they should start
+        :rtype: list
+        """
+        expected = [self.expected(i) for i in plugins]
+
+        untimed = [i for i, e in enumerate(expected) if e is None]
+        timed = sorted(
+            [i for i, e in enumerate(expected) if e is not None],
+            key=lambda i: -expected[i])
+
+        return untimed + timed
+
+    def save(self):
+        """
+        Write the recorded runs to :file:`.jig/stats`.
+        """
+        with self._lock:
+            if self._runs is None:
+                # Nothing was read or recorded
+                return
+
+            # Written to a temporary file first, nobody will read half of it
+            fd, temp = mkstemp(dir=dirname(self.filename))
+
+            try:
+                with fdopen(fd, 'w') as fh:
+                    json.dump(self._runs, fh)
+            except (IOError, TypeError, ValueError):
+                unlink(temp)
+                return
+
+            rename(temp, self.filename)
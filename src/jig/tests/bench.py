@@ -0,0 +1,558 @@
+"""
+End-to-end benchmarks
+=====================
+
+Measures how long :py:meth:`jig.runner.Runner.main` takes on synthetic Git
+repositories as the number of changed files, their size, how many of them
+are binary and the number of plugins grow::
+
+    $ script/bench
+    $ script/bench --output bench.json
+    $ script/bench --baseline bench.json
+
+Each scenario builds a repository with one commit, changes some of its files
+and stages them. Jig is then ran on the staged changes a few times with the
+results cache cleared before each run. Along with the total time, the spans
+recorded by :py:mod:`jig.trace` are added up so a slower
+:py:mod:`jig.diffconvert` or :py:mod:`jig.gitutils` shows up on its own.
+
+The results can be written as JSON and compared to an earlier run. Any
+scenario or phase that got slower than the tolerance allows is reported and
+the exit code is 1.
+
+With ``--messages`` the memory taken by collated messages is measured
+instead::
+
+    $ script/bench --messages 100000
+"""
+import sys
+import json
+from os import makedirs, unlink, close
+from os.path import join, dirname, isdir
+from random import Random
+from tempfile import mkdtemp, mkstemp
+from shutil import rmtree
+from time import time
+from collections import namedtuple
+
+from jig.conf import JIG_DIR_NAME
+from jig.exc import ForcedExit
+from jig.runner import Runner
+from jig.output import (
+    ConsoleView, ResultsCollator, MessageRecords, lookup_type)
+from jig.cache import ResultCache, clear_last_successful_run
+from jig.tools import NumberedDirectoriesToGit
+from jig.plugins import (
+    initializer, get_jigconfig, set_jigconfig, create_plugin, PluginManager)
+
+try:
+    import argparse
+except ImportError:   # pragma: no cover
+    from backports import argparse
+
+try:
+    from collections import OrderedDict
+except ImportError:   # pragma: no cover
+    from ordereddict import OrderedDict
+
+# Words the text files are made of
+WORDS = (
+    u'alpha', u'bravo', u'charlie', u'delta', u'echo', u'foxtrot', u'golf',
+    u'hotel', u'india', u'juliet', u'kilo', u'lima', u'mike', u'november',
+    u'oscar', u'papa', u'quebec', u'romeo', u'sierra', u'tango')
+
+# How many seconds a phase has to take before it can be a regression, so
+# the noise in very short phases isn't reported
+MINIMUM_SECONDS = 0.01
+
+
+class Scenario(namedtuple(
+        'Scenario', 'name files size binary plugins')):
+
+    """
+    What the synthetic repository of a benchmark looks like.
+
+    ``files`` is how many files are changed, ``size`` how many bytes each of
+    them is, ``binary`` the fraction of them that are binary and ``plugins``
+    how many plugins check them.
+
+    """
+    __slots__ = ()
+
+    @property
+    def params(self):
+        """
+        Everything but the name, as a dictionary.
+        """
+        return OrderedDict(
+            [(i, getattr(self, i)) for i in self._fields[1:]])
+
+
+SCENARIOS = (
+    Scenario(u'small', 1, 1024, 0.0, 1),
+    Scenario(u'many-files', 100, 1024, 0.0, 1),
+    Scenario(u'large-files', 5, 512 * 1024, 0.0, 1),
+    Scenario(u'binary', 20, 16 * 1024, 0.5, 1),
+    Scenario(u'many-plugins', 10, 4 * 1024, 0.0, 8))
+
+
+def _text(rng, size):
+    """
+    Lines of random words adding up to about ``size`` bytes.
+    """
+    lines = []
+    length = 0
+
+    while length < size:
+        line = u' '.join([rng.choice(WORDS) for i in range(8)])
+        lines.append(line)
+        length += len(line) + 1
+
+    return u'\n'.join(lines) + u'\n'
+
+
+def _binary(rng, size):
+    """
+    ``size`` random bytes.
+    """
+    if not size:
+        return ''
+
+    return ('%0*x' % (size * 2, rng.getrandbits(size * 8))).decode('hex')
+
+
+def _change(rng, content):
+    """
+    Rewrite about one in ten of the lines in ``content``.
+    """
+    lines = content.splitlines()
+
+    for i in range(len(lines)):
+        if rng.random() < 0.1:
+            lines[i] = u' '.join([rng.choice(WORDS) for j in range(8)])
+
+    return u'\n'.join(lines) + u'\n'
+
+
+def _write(filename, content):
+    if not isinstance(content, str):
+        content = content.encode('utf-8')
+
+    with open(filename, 'wb') as fh:
+        fh.write(content)
+
+
+def create_repository(scenario, seed=0):
+    """
+    Create a Git repository with staged changes as described by
+    ``scenario``.
+
+    The same ``seed`` always creates the same files.
+
+    :param Scenario scenario: what the repository looks like
+    :param int seed: for the random contents of the files
+    :returns: the path to the repository, it's initialized for jig and has
+        ``scenario.plugins`` installed
+    :rtype: string
+    """
+    rng = Random(seed)
+
+    binaries = int(round(scenario.files * scenario.binary))
+
+    names = [
+        (join(u'src', u'{0:03d}'.format(i // 50), u'file{0:04d}'.format(i)),
+         i < binaries)
+        for i in range(scenario.files)]
+
+    # The first commit is written out as a numbered directory
+    numdir = mkdtemp()
+
+    try:
+        contents = {}
+        for name, binary in names:
+            content = _binary(rng, scenario.size) if binary else \
+                _text(rng, scenario.size)
+            contents[name] = content
+
+            filename = join(numdir, u'01', name)
+            if not isdir(dirname(filename)):
+                makedirs(dirname(filename))
+
+            _write(filename, content)
+
+        repo = NumberedDirectoriesToGit(numdir).repo
+    finally:
+        rmtree(numdir)
+
+    gitrepo = repo.working_dir
+
+    # Like the test repositories, so stashing works and .jig is ignored
+    repo.git.config(u'--local', u'user.email', u'no+reply@jig')
+    repo.git.config(u'--local', u'user.name', u'Jig')
+
+    with open(join(gitrepo, u'.git', u'info', u'exclude'), 'w') as fh:
+        fh.write(JIG_DIR_NAME)
+
+    # Then some of every file is changed and staged
+    for name, binary in names:
+        content = _binary(rng, scenario.size) if binary else \
+            _change(rng, contents[name])
+
+        _write(join(gitrepo, name), content)
+
+    repo.git.add(u'-A')
+
+    initializer(gitrepo)
+
+    pm = PluginManager(get_jigconfig(gitrepo))
+    plugins_dir = join(gitrepo, JIG_DIR_NAME, u'bench')
+    makedirs(plugins_dir)
+
+    for i in range(scenario.plugins):
+        pm.add(create_plugin(
+            plugins_dir, u'bench', u'bench{0:02d}'.format(i),
+            settings={'verbose': 'no'}))
+
+    set_jigconfig(gitrepo, pm.config)
+
+    return gitrepo
+
+
+def phase_times(events):
+    """
+    Add up how long each phase of a run took from its trace events.
+
+    The time of spans with the same name is added together, all of the
+    plugins are added up as ``plugins``.
+
+    :param list events: the ``traceEvents`` written by :py:mod:`jig.trace`
+    :returns: seconds by the name of the phase
+    :rtype: dict
+    """
+    phases = {}
+
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+
+        name = u'plugins' if event.get('cat') == 'plugin' else event['name']
+
+        phases[name] = phases.get(name, 0.0) + event['dur'] / 1000000.0
+
+    return phases
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+
+    if len(values) % 2:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def _run(gitrepo):
+    """
+    Run jig once on the staged changes of ``gitrepo``.
+
+    :returns: how many seconds it took and the time of each phase
+    :rtype: tuple
+    """
+    ResultCache(gitrepo).clear()
+    clear_last_successful_run(gitrepo)
+
+    fd, tracefile = mkstemp(suffix='.json')
+    close(fd)
+
+    try:
+        runner = Runner(view=ConsoleView(
+            collect_output=True, exit_on_exception=False))
+
+        started = time()
+
+        try:
+            runner.main(gitrepo, interactive=False, trace=tracefile)
+        except (SystemExit, ForcedExit):
+            pass
+
+        total = time() - started
+
+        with open(tracefile) as fh:
+            events = json.load(fh)['traceEvents']
+    finally:
+        unlink(tracefile)
+
+    return total, phase_times(events)
+
+
+def measure(scenario, repeat=3, seed=0):
+    """
+    Benchmark a single scenario.
+
+    :param Scenario scenario: the repository to run jig on
+    :param int repeat: how many times to run it, the median is kept
+    :param int seed: for the contents of the files
+    :returns: the ``params``, ``total`` seconds and seconds of each of the
+        ``phases``
+    :rtype: dict
+    """
+    gitrepo = create_repository(scenario, seed=seed)
+
+    try:
+        runs = [_run(gitrepo) for i in range(repeat)]
+    finally:
+        rmtree(gitrepo)
+
+    names = set()
+    for total, phases in runs:
+        names.update(phases.keys())
+
+    return {
+        'params': scenario.params,
+        'total': _median([i[0] for i in runs]),
+        'phases': dict([
+            (name, _median([i[1].get(name, 0.0) for i in runs]))
+            for name in names])}
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Find what got slower than it was in ``baseline``.
+
+    Scenarios that aren't in both are ignored, as are phases that took less
+    than :py:data:`MINIMUM_SECONDS` each time.
+
+    :param dict results: from :py:func:`run_benchmarks`
+    :param dict baseline: an earlier run of :py:func:`run_benchmarks`
+    :param float tolerance: how much slower, as a fraction, is allowed
+    :returns: tuples of the scenario name, what got slower (``total`` or the
+        name of the phase), the baseline seconds and the current seconds
+    :rtype: list
+    """
+    regressions = []
+
+    before_scenarios = baseline.get('scenarios', {})
+
+    for name, after in sorted(results.get('scenarios', {}).items()):
+        before = before_scenarios.get(name)
+
+        if before is None:
+            continue
+
+        measures = [(u'total', before.get('total'), after.get('total'))]
+        measures.extend(sorted([
+            (phase, seconds, after.get('phases', {}).get(phase))
+            for phase, seconds in before.get('phases', {}).items()]))
+
+        for measured, was, now in measures:
+            if was is None or now is None:
+                continue
+
+            if max(was, now) < MINIMUM_SECONDS:
+                continue
+
+            if now > was * (1 + tolerance):
+                regressions.append((name, measured, was, now))
+
+    return regressions
+
+
+class _DictMessage(object):
+
+    """
+    A message with a ``__dict__`` and its own copy of the filename, the way
+    :py:class:`jig.output.Message` objects used to be kept.
+
+    """
+    def __init__(self, plugin, type, body, file, line):
+        self.plugin = plugin
+        self.type = lookup_type(type)
+        self.body = body
+        self.file = file
+        self.line = line
+
+
+def _message_records(count, files=100, seed=0):
+    """
+    ``count`` messages like a plugin would write them, one per line.
+    """
+    rng = Random(seed)
+
+    lines = [json.dumps([
+        u'src/module{0:03d}.py'.format(i % files), i + 1,
+        rng.choice((u'info', u'warn', u'stop')),
+        u'Line too long ({0} characters)'.format(rng.randint(80, 200))])
+        for i in range(count)]
+
+    # Decoded one at a time, so each message has its own strings
+    return [json.loads(i) for i in lines]
+
+
+def _footprint(messages):
+    """
+    Bytes used by ``messages`` and the strings they don't share.
+    """
+    seen = set()
+    total = 0
+
+    for message in messages:
+        for obj in (message, getattr(message, '__dict__', None),
+                    message.body, message.file):
+            if obj is None or id(obj) in seen:
+                continue
+
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+
+    return total
+
+
+def message_memory(count=100000, seed=0):
+    """
+    Measure the memory taken by ``count`` collated messages.
+
+    Messages collated by :py:class:`jig.output.ResultsCollator` are compared
+    with the same messages kept with a ``__dict__`` and a filename each.
+
+    :param int count: how many messages
+    :param int seed: for the contents of the messages
+    :returns: the bytes for every 100,000 messages of each
+    :rtype: dict
+    """
+    records = _message_records(count, seed=seed)
+
+    plugin = u'bench'
+
+    before = [
+        _DictMessage(plugin, mtype, body, filename, line)
+        for filename, line, mtype, body in records]
+
+    collator = ResultsCollator({plugin: (0, MessageRecords(records), '')})
+    after = list(collator.iter_messages())
+
+    scale = 100000.0 / count
+
+    return {
+        'messages': count,
+        'dict': int(_footprint(before) * scale),
+        'slots': int(_footprint(after) * scale)}
+
+
+def run_benchmarks(scenarios, repeat=3, seed=0, printer=None):
+    """
+    Benchmark each of ``scenarios``.
+
+    :param list scenarios: :py:class:`Scenario` objects
+    :param int repeat: how many times to run each one
+    :param int seed: for the contents of the files
+    :param function printer: called with a line for each scenario as it
+        finishes
+    :rtype: dict
+    """
+    results = {'scenarios': OrderedDict()}
+
+    for scenario in scenarios:
+        result = measure(scenario, repeat=repeat, seed=seed)
+        results['scenarios'][scenario.name] = result
+
+        if printer:
+            printer(u'{0:<16} {1:8.3f} s'.format(
+                scenario.name, result['total']))
+
+    return results
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='bench',
+        description='Measure how long jig takes on synthetic repositories')
+    parser.add_argument(
+        '--scenario', '-s', action='append', dest='scenarios',
+        choices=[i.name for i in SCENARIOS],
+        help='Only run this scenario, can be given more than once')
+    parser.add_argument(
+        '--files', type=int,
+        help='Run a custom scenario that changes this many files')
+    parser.add_argument(
+        '--size', type=int, default=1024,
+        help='Bytes in each file of the custom scenario')
+    parser.add_argument(
+        '--binary', type=float, default=0.0,
+        help='Fraction of the files in the custom scenario that are binary')
+    parser.add_argument(
+        '--plugins', type=int, default=1,
+        help='Plugins in the custom scenario')
+    parser.add_argument(
+        '--messages', type=int, metavar='COUNT',
+        help='Measure the memory of this many collated messages instead')
+    parser.add_argument(
+        '--repeat', '-r', type=int, default=3,
+        help='Run each scenario this many times and keep the median')
+    parser.add_argument(
+        '--output', '-o', metavar='FILE',
+        help='Write the results to this file as JSON')
+    parser.add_argument(
+        '--baseline', '-b', metavar='FILE',
+        help='Compare the results to an earlier --output')
+    parser.add_argument(
+        '--tolerance', '-t', type=float, default=0.25,
+        help='How much slower than the baseline is allowed, 0.25 is 25%%')
+
+    return parser
+
+
+def main(argv):
+    """
+    Run the benchmarks from the command line.
+
+    :param list argv: the arguments, without the name of the program
+    :returns: the exit code, 1 if something is slower than the baseline
+    :rtype: int
+    """
+    args = _parser().parse_args(argv)
+
+    def printer(line):
+        sys.stdout.write(line + u'\n')
+        sys.stdout.flush()
+
+    if args.messages:
+        memory = message_memory(args.messages)
+
+        for name in ('dict', 'slots'):
+            printer(u'{0:<16} {1:8.1f} MB per 100k messages'.format(
+                name, memory[name] / 1024.0 / 1024.0))
+
+        if args.output:
+            with open(args.output, 'w') as fh:
+                json.dump({'memory': memory}, fh, indent=2)
+
+        return 0
+
+    if args.files is not None:
+        scenarios = [Scenario(
+            u'custom', args.files, args.size, args.binary, args.plugins)]
+    elif args.scenarios:
+        scenarios = [i for i in SCENARIOS if i.name in args.scenarios]
+    else:
+        scenarios = list(SCENARIOS)
+
+    results = run_benchmarks(scenarios, repeat=args.repeat, printer=printer)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+
+    for name, measured, was, now in regressions:
+        printer(u'{0} {1} is slower: {2:.3f} s, was {3:.3f} s'.format(
+            name, measured, now, was))
+
+    return 1 if regressions else 0
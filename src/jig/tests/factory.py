@@ -1,5 +1,7 @@
 # coding=utf-8
 from jig.tests.mocks import MockPlugin
+from jig.output import MessageRecords
+from jig.plugins.usage import PluginResult, Usage
 
 try:
     from collections import OrderedDict
@@ -83,6 +85,55 @@ def one_of_each():
     ])
 
 
+def skipped_after_stop():
+    return OrderedDict([
+        (MockPlugin(name=u'stopper'), (0, [[u'stop', u'S']], '')),
+        (MockPlugin(name=u'skipped1'), None),
+        (MockPlugin(name=u'skipped2'), None)
+    ])
+
+
+def streamed():
+    return OrderedDict([
+        (MockPlugin(name=u'first'), (0, {u'a.txt': [
+            [1, u'warn', u'W'], [None, u'info', u'F']]}, '')),
+        (MockPlugin(name=u'second'), (0, {u'a.txt': [
+            [2, u'stop', u'S']]}, '')),
+        (MockPlugin(name=u'skipped'), None)
+    ])
+
+
+def repeated():
+    return OrderedDict([
+        (MockPlugin(name=u'noisy', max_messages=2), (0, {u'a.txt': [
+            [1, u'warn', u'W'], [2, u'warn', u'W'], [3, u'warn', u'W'],
+            [7, u'warn', u'W'], [None, u'info', u'F'], [None, u'info', u'F'],
+            [9, u'stop', u'S']]}, ''))
+    ])
+
+
+def message_records():
+    return OrderedDict([
+        (MockPlugin(name=u'lines'), (0, MessageRecords([
+            [None, None, u'info', u'C'],
+            [u'a.txt', None, u'warn', u'F'],
+            [u'a.txt', 1, u'stop', u'L']], {u'stop': 2}), ''))
+    ])
+
+
+def with_usage():
+    return OrderedDict([
+        (MockPlugin(name=u'fast'), PluginResult(
+            0, [[u'warn', u'W']], '', Usage(0.25, 0.125, 0.0, 2048 * 1024, 512))),
+        (MockPlugin(name=u'slow'), PluginResult(
+            0, [u'I'], '', Usage(1.5, 1.0, 0.25, 10240 * 1024, 2048))),
+        (MockPlugin(name=u'inprocess'), PluginResult(
+            0, [], '', Usage(0.5, None, None, None, None))),
+        (MockPlugin(name=u'cached'), (0, [], '')),
+        (MockPlugin(name=u'skipped'), None)
+    ])
+
+
 def commit_specific_bad_syntax():
     return OrderedDict([
         (MockPlugin(), (0, anon_obj, '')),
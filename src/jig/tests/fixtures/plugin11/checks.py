@@ -0,0 +1,9 @@
+def pre_commit(files, config):
+    if config.get('fail') == 'yes':
+        raise ValueError('Failed on purpose')
+
+    out = {}
+    for f in files:
+        out[f['name']] = [[1, 'info', 'Checked in-process']]
+
+    return out
@@ -12,9 +12,11 @@ class MockPlugin(Mock):
         if 'name' in kwargs:
             name = kwargs['name']
             del kwargs['name']
+        max_messages = kwargs.pop('max_messages', None)
 
         super(MockPlugin, self).__init__(*args, **kwargs)
         self.name = name
+        self.max_messages = max_messages
 
     @property
     def name(self):
@@ -0,0 +1,136 @@
+import json
+from os.path import join
+from tempfile import mkdtemp
+from shutil import rmtree
+
+from git import Repo
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins import get_jigconfig
+from jig.tests.bench import (
+    Scenario, create_repository, phase_times, measure, compare,
+    message_memory, main)
+
+
+class TestBench(JigTestCase):
+
+    """
+    Jig can be benchmarked on synthetic repositories.
+
+    """
+    def setUp(self):
+        super(TestBench, self).setUp()
+
+        self.scenario = Scenario(u'test', 4, 256, 0.5, 2)
+
+    def test_create_repository(self):
+        """
+        The files are changed and staged and the plugins installed.
+        """
+        gitrepo = create_repository(self.scenario)
+        self.addCleanup(rmtree, gitrepo)
+
+        repo = Repo(gitrepo)
+
+        staged = repo.git.diff(u'--cached', u'--numstat').splitlines()
+
+        self.assertEqual(4, len(staged))
+        # Half of them are binary, Git doesn't count their lines
+        self.assertEqual(2, len([i for i in staged if i.startswith('-')]))
+        self.assertEqual(
+            [u'plugin:bench:bench00', u'plugin:bench:bench01'],
+            sorted([i for i in get_jigconfig(gitrepo).sections()
+                    if i.startswith('plugin:')]))
+
+    def test_same_seed(self):
+        """
+        The same seed creates the same changes.
+        """
+        diffs = []
+        for i in range(2):
+            gitrepo = create_repository(self.scenario, seed=3)
+            self.addCleanup(rmtree, gitrepo)
+
+            diffs.append(Repo(gitrepo).git.diff(u'--cached'))
+
+        self.assertEqual(diffs[0], diffs[1])
+
+    def test_phase_times(self):
+        """
+        Spans with the same name and all of the plugins are added up.
+        """
+        events = [
+            {'ph': 'M', 'name': 'thread_name'},
+            {'ph': 'X', 'cat': 'git', 'name': 'git diff', 'dur': 1500000},
+            {'ph': 'X', 'cat': 'git', 'name': 'git diff', 'dur': 500000},
+            {'ph': 'X', 'cat': 'plugin', 'name': 'plugin01', 'dur': 250000},
+            {'ph': 'X', 'cat': 'plugin', 'name': 'plugin02', 'dur': 250000}]
+
+        self.assertEqual(
+            {u'git diff': 2.0, u'plugins': 0.5}, phase_times(events))
+
+    def test_measure(self):
+        """
+        Jig is ran and timed on the repository.
+        """
+        result = measure(self.scenario, repeat=1)
+
+        self.assertEqual(
+            {'files': 4, 'size': 256, 'binary': 0.5, 'plugins': 2},
+            dict(result['params']))
+        self.assertGreater(result['total'], 0)
+        self.assertIn(u'plugins', result['phases'])
+        self.assertIn(u'GitDiffIndex', result['phases'])
+
+    def test_compare(self):
+        """
+        Anything slower than the tolerance allows is a regression.
+        """
+        baseline = {'scenarios': {
+            'small': {'total': 1.0, 'phases': {
+                'git diff': 0.5, 'format': 0.001}},
+            'gone': {'total': 1.0, 'phases': {}}}}
+        results = {'scenarios': {
+            'small': {'total': 1.2, 'phases': {
+                'git diff': 0.9, 'format': 0.009}},
+            'new': {'total': 9.0, 'phases': {}}}}
+
+        self.assertEqual(
+            [('small', 'git diff', 0.5, 0.9)],
+            compare(results, baseline, tolerance=0.25))
+        self.assertEqual(
+            [('small', u'total', 1.0, 1.2),
+             ('small', 'git diff', 0.5, 0.9)],
+            compare(results, baseline, tolerance=0.1))
+
+    def test_main_baseline(self):
+        """
+        The results are written as JSON and compared with a baseline.
+        """
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+
+        output = join(directory, 'bench.json')
+        baseline = join(directory, 'baseline.json')
+
+        with open(baseline, 'w') as fh:
+            json.dump({'scenarios': {'custom': {'total': 0.0001}}}, fh)
+
+        retcode = main([
+            '--files', '1', '--size', '64', '--repeat', '1',
+            '--output', output, '--baseline', baseline])
+
+        with open(output) as fh:
+            results = json.load(fh)
+
+        self.assertEqual([u'custom'], results['scenarios'].keys())
+        self.assertEqual(1, retcode)
+
+    def test_message_memory(self):
+        """
+        Collated messages take less memory than ones with a ``__dict__``.
+        """
+        memory = message_memory(1000)
+
+        self.assertEqual(1000, memory['messages'])
+        self.assertLess(memory['slots'], memory['dict'])
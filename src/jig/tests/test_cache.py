@@ -0,0 +1,217 @@
+from os import utime
+from os.path import join
+from time import time
+
+from git import Repo
+
+from jig.tests.testcase import PluginTestCase
+from jig.plugins import PluginManager
+from jig.output import MessageRecords
+from jig.cache import (
+    ResultCache, cache_size_for, plugin_fingerprint, run_fingerprint,
+    last_successful_run, set_last_successful_run, clear_last_successful_run)
+
+
+class TestResultCache(PluginTestCase):
+
+    """
+    Plugin results can be cached.
+
+    """
+    def setUp(self):
+        super(TestResultCache, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepo = repo
+        self.testrepodir = working_dir
+        self.testdiffs = diffs
+
+        self.pm = PluginManager(self.jigconfig)
+        self.pm.add(join(self.fixturesdir, 'plugin01'))
+        self.pm.add(join(self.fixturesdir, 'plugin09'))
+
+        self.cache = ResultCache(self.gitrepodir)
+
+    def test_cache_size(self):
+        """
+        The size of the cache can be set, but falls back to the default.
+        """
+        self.assertEqual(10485760, cache_size_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'cache_size', '0')
+        self.assertEqual(0, cache_size_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'cache_size', 'big')
+        self.assertEqual(10485760, cache_size_for(self.jigconfig))
+
+    def test_plugin_fingerprint(self):
+        """
+        Plugins are identified by their contents and config.
+        """
+        plugin = self.pm.plugins[0]
+
+        before = plugin_fingerprint(plugin)
+
+        self.assertEqual(before, plugin_fingerprint(plugin))
+
+        plugin.config = {'a': '1'}
+
+        self.assertNotEqual(before, plugin_fingerprint(plugin))
+
+    def test_key(self):
+        """
+        Keys change with the files a plugin receives.
+        """
+        everything, some = self.pm.plugins
+
+        first = self.git_diff_index(self.testrepo, self.testdiffs[3])
+        second = self.git_diff_index(self.testrepo, self.testdiffs[3])
+        other = self.git_diff_index(self.testrepo, self.testdiffs[4])
+
+        self.assertEqual(
+            self.cache.key(everything, first),
+            self.cache.key(everything, second))
+        self.assertNotEqual(
+            self.cache.key(everything, first),
+            self.cache.key(some, first))
+        self.assertNotEqual(
+            self.cache.key(everything, first),
+            self.cache.key(everything, other))
+
+    def test_get_and_set(self):
+        """
+        Results from successful runs are stored.
+        """
+        self.assertIsNone(self.cache.get('a'))
+
+        self.cache.set('a', (0, u'{"a.txt": []}', u''))
+        self.cache.set('b', (1, u'', u'Failed'))
+
+        self.assertEqual((0, u'{"a.txt": []}', u''), self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(1, self.cache.stats().entries)
+
+    def test_message_records(self):
+        """
+        Messages written one per line are stored with what wasn't kept.
+        """
+        self.cache.set('a', (0, MessageRecords(
+            [[u'a.txt', 1, u'warn', u'W']], {u'warn': 3}), u''))
+
+        retcode, stdout, stderr = self.cache.get('a')
+
+        self.assertIsInstance(stdout, MessageRecords)
+        self.assertEqual([[u'a.txt', 1, u'warn', u'W']], stdout)
+        self.assertEqual({u'warn': 3}, stdout.truncated)
+
+        records = MessageRecords()
+        for line in (1, 2):
+            records.add([u'a.txt', line, u'warn', u'W'], aggregate=True)
+
+        self.cache.set('b', (0, records, u''))
+
+        self.assertEqual({0: [2, [[1, 2]]]}, self.cache.get('b')[1].repeated)
+
+    def test_turned_off(self):
+        """
+        Nothing is stored if the cache has no room.
+        """
+        cache = ResultCache(self.gitrepodir, 0)
+
+        cache.set('a', (0, u'', u''))
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, cache.stats().entries)
+
+    def test_evict(self):
+        """
+        The least recently used results are removed first.
+        """
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, (0, u'x' * 100, u''))
+
+        size = self.cache.stats().size / 3
+
+        # Make "b" the oldest, then use "a" so it's the newest
+        then = time() - 60
+        for key, age in (('a', 2), ('b', 3), ('c', 1)):
+            utime(join(self.cache.directory, '{0}.json'.format(key)),
+                  (then - age, then - age))
+        self.cache.get('a')
+
+        self.cache.max_size = size * 2
+        self.cache.evict()
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_clear(self):
+        """
+        The cache can be emptied.
+        """
+        self.cache.set('a', (0, u'', u''))
+        self.cache.set('b', (0, u'', u''))
+
+        self.assertEqual(2, self.cache.clear())
+        self.assertEqual(0, self.cache.stats().entries)
+        self.assertEqual(0, self.cache.stats().size)
+
+
+class TestLastSuccessfulRun(PluginTestCase):
+
+    """
+    Runs that passed are recorded.
+
+    """
+    def test_run_fingerprint(self):
+        """
+        Changes with the staged files, plugins and settings.
+        """
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+
+        nothing_staged = run_fingerprint(self.gitrepodir, self.jigconfig)
+
+        # Git's own index is used, GitPython leaves a stale tree cache in it
+        self.create_file(self.gitrepodir, 'b.txt', 'b')
+        Repo(self.gitrepodir).git.add('b.txt')
+
+        staged = run_fingerprint(self.gitrepodir, self.jigconfig)
+
+        self.assertNotEqual(nothing_staged, staged)
+        self.assertEqual(
+            staged, run_fingerprint(self.gitrepodir, self.jigconfig))
+
+        self._add_plugin(self.jigconfig, 'plugin01')
+
+        with_plugin = run_fingerprint(self.gitrepodir, self.jigconfig)
+
+        self.assertNotEqual(staged, with_plugin)
+
+        self.jigconfig.set('jig', 'diff_algorithm', 'histogram')
+
+        self.assertNotEqual(
+            with_plugin, run_fingerprint(self.gitrepodir, self.jigconfig))
+
+        # Checking for plugin updates doesn't count as a setting
+        self.jigconfig.remove_option('jig', 'diff_algorithm')
+        self.jigconfig.set('jig', 'last_checked_for_updates', '1')
+
+        self.assertEqual(
+            with_plugin, run_fingerprint(self.gitrepodir, self.jigconfig))
+
+    def test_record(self):
+        """
+        The fingerprint of the last run is kept in the .jig directory.
+        """
+        self.assertIsNone(last_successful_run(self.gitrepodir))
+
+        set_last_successful_run(self.gitrepodir, 'abc')
+
+        self.assertEqual('abc', last_successful_run(self.gitrepodir))
+
+        clear_last_successful_run(self.gitrepodir)
+        clear_last_successful_run(self.gitrepodir)
+
+        self.assertIsNone(last_successful_run(self.gitrepodir))
@@ -0,0 +1,227 @@
+from os import environ, getpid
+from os.path import join
+from threading import Thread
+
+from mock import patch
+
+from jig.tests.testcase import PluginTestCase, JigTestCase
+from jig.exc import DaemonError, DaemonUnavailable
+from jig.conf import JIG_DIR_NAME
+from jig.plugins import set_jigconfig
+from jig.plugins.tools import set_checked_for_updates
+from jig.cache import last_successful_run
+from jig.runner import Runner
+from jig.client import DaemonClient, fromhook, git_environ, socket_path
+from jig.daemon import JigDaemon
+
+
+class TestDaemonClient(JigTestCase):
+
+    """
+    The pre-commit hook can talk to a running daemon.
+
+    """
+    def test_socket_path(self):
+        """
+        Each Git repository has its own socket.
+        """
+        self.assertEqual(
+            join(self.gitrepodir, JIG_DIR_NAME, 'daemon.sock'),
+            socket_path(self.gitrepodir))
+
+    def test_git_environ(self):
+        """
+        The Git environment variables are sent with absolute paths.
+        """
+        variables = {
+            'GIT_INDEX_FILE': '.git/index',
+            'GIT_AUTHOR_NAME': 'Jig',
+            'NOT_GIT': 'no'}
+
+        with patch.dict(environ, variables):
+            sent = git_environ()
+
+        self.assertTrue(sent['GIT_INDEX_FILE'].startswith('/'))
+        self.assertTrue(sent['GIT_INDEX_FILE'].endswith('.git/index'))
+        self.assertEqual('Jig', sent['GIT_AUTHOR_NAME'])
+        self.assertNotIn('NOT_GIT', sent)
+
+    def test_not_running(self):
+        """
+        Without a daemon the hook runs jig itself.
+        """
+        with self.assertRaises(DaemonUnavailable):
+            DaemonClient(self.gitrepodir).connect()
+
+        self.assertFalse(fromhook(self.gitrepodir))
+
+
+class TestJigDaemon(PluginTestCase):
+
+    """
+    The daemon checks changes for the pre-commit hook.
+
+    """
+    def setUp(self):
+        super(TestJigDaemon, self).setUp()
+
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+        set_jigconfig(
+            self.gitrepodir, config=set_checked_for_updates(self.gitrepodir))
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        self.daemon = JigDaemon(self.gitrepodir)
+        self.daemon.start()
+
+        self.serving = Thread(target=self.daemon.serve)
+        self.serving.start()
+
+    def tearDown(self):
+        self.daemon.stop()
+        self.serving.join()
+
+    def request(self, message):
+        """
+        Send ``message`` to the daemon and return the response.
+        """
+        client = DaemonClient(self.gitrepodir)
+        client.connect()
+
+        try:
+            return client.request(message)
+        finally:
+            client.close()
+
+    def fromhook(self, commit=True):
+        """
+        Run the hook's client, answering the question with ``commit``.
+
+        Returns the mocked ``sys`` module.
+        """
+        with patch('jig.client.sys') as sys, \
+                patch('jig.client._ask_to_commit') as ask:
+            ask.return_value = commit
+
+            self.assertIsNot(False, fromhook(self.gitrepodir))
+
+        return sys
+
+    def written(self, stream):
+        """
+        Everything written to the mocked ``stream``.
+        """
+        return ''.join([i[0][0] for i in stream.write.call_args_list])
+
+    def test_ping(self):
+        """
+        The daemon answers with its process.
+        """
+        self.assertEqual({'pid': getpid()}, self.request({'command': 'ping'}))
+
+    def test_already_running(self):
+        """
+        Only one daemon can run for each Git repository.
+        """
+        with self.assertRaises(DaemonError):
+            JigDaemon(self.gitrepodir).start()
+
+    def test_check(self):
+        """
+        The hook shows the results and records that the changes passed.
+        """
+        sys = self.fromhook()
+
+        self.assertIn('plugin01', self.written(sys.stdout))
+        sys.exit.assert_called_with(0)
+        self.assertIsNotNone(last_successful_run(self.gitrepodir))
+
+        # Nothing changed, the daemon doesn't check them again
+        sys = self.fromhook()
+
+        self.assertIn(
+            'Jig already checked these changes, skipping.',
+            self.written(sys.stdout))
+
+    def test_streamed_output(self):
+        """
+        Each line is sent to the hook as soon as it's printed.
+        """
+        sys = self.fromhook()
+
+        lines = [i[0][0] for i in sys.stdout.write.call_args_list]
+
+        self.assertGreater(len(lines), 1)
+        self.assertTrue(all([i.endswith('\n') for i in lines]))
+        self.assertEqual(1, len([i for i in lines if 'plugin01' in i]))
+
+    def test_preloaded(self):
+        """
+        The plugins are loaded once for all of the checks.
+        """
+        self.fromhook(commit=False)
+
+        pm = self.daemon.preloaded.plugin_manager(
+            self.daemon.preloaded.jigconfig())
+
+        self.stage(self.gitrepodir, 'c.txt', 'c')
+        self.fromhook(commit=False)
+
+        self.assertIs(pm, self.daemon.preloaded.plugin_manager(
+            self.daemon.preloaded.jigconfig()))
+
+    def test_stop_commit(self):
+        """
+        If the user stops the commit nothing is recorded.
+        """
+        sys = self.fromhook(commit=False)
+
+        sys.exit.assert_called_with(1)
+        self.assertIsNone(last_successful_run(self.gitrepodir))
+
+    def test_fallback(self):
+        """
+        The hook asks about plugin updates itself.
+        """
+        with patch.object(Runner, 'update_check_due') as due:
+            due.return_value = True
+
+            self.assertFalse(fromhook(self.gitrepodir))
+
+    def test_git_environ(self):
+        """
+        Changes are checked with the Git environment variables of the hook.
+        """
+        seen = []
+
+        def check(gitrepo):
+            seen.append(environ.get('GIT_INDEX_FILE'))
+            return (0, 0, 0), None
+
+        with patch.object(Runner, 'check') as runner_check:
+            runner_check.side_effect = check
+
+            response = self.request({
+                'command': 'check',
+                'environ': {'GIT_INDEX_FILE': '/tmp/index'}})
+
+        self.assertEqual(['/tmp/index'], seen)
+        self.assertFalse(response['prompt'])
+        self.assertNotEqual('/tmp/index', environ.get('GIT_INDEX_FILE'))
+
+    def test_error(self):
+        """
+        Errors are sent to the hook with a non-zero exit code.
+        """
+        with patch('jig.client.sys') as sys, \
+                patch('jig.runner.repo_jiginitialized') as initialized:
+            initialized.return_value = False
+
+            fromhook(self.gitrepodir)
+
+        self.assertIn(
+            'This repository has not been initialized.',
+            self.written(sys.stderr))
+        sys.exit.assert_called_with(1)
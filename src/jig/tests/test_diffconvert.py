@@ -1,3 +1,4 @@
+import json
 from os import symlink
 from os.path import join, realpath
 from functools import wraps
@@ -5,11 +6,14 @@ from textwrap import dedent
 from pprint import PrettyPrinter
 from operator import itemgetter
 
-from mock import Mock
+from mock import Mock, patch
 from git import Repo
 
 from jig.tests.testcase import JigTestCase
-from jig.diffconvert import describe_diff, DiffType, GitDiffIndex
+from jig.diffconvert import (
+    describe_diff, describe_patch, limit_context, DiffType, GitDiffIndex,
+    _SharedIterator)
+from jig.gitutils.blobs import BlobReader
 from jig.tools import cwd_bounce
 
 
@@ -46,7 +50,7 @@ def assertDiff(func):
         a = dedent(a).strip()
         b = dedent(b).strip()
 
-        actual = [i for i in describe_diff(a, b)]
+        actual = [i for i in self.describe(a, b)]
         if not expected == actual:   # pragma: no cover
             self.fail('Diff does not match:\nexpected\n{}\nactual\n{}'.format(
                 pp(expected),
@@ -61,6 +65,9 @@ class TestDescribeDiff(JigTestCase):
     Test our diff description method.
 
     """
+    def describe(self, a, b):
+        return describe_diff(a, b)
+
     @assertDiff
     def test_all_addition(self):
         """
@@ -245,6 +252,136 @@ class TestDescribeDiff(JigTestCase):
             (6, ' ', 'four')]
 
 
+class TestDescribeGitDiff(TestDescribeDiff):
+
+    """
+    Git's own diff describes changes the same way.
+
+    """
+    diff_algorithm = 'myers'
+
+    def describe(self, a, b):
+        repo = Repo(self.gitrepodir)
+
+        blobs = []
+        for content in (a, b):
+            self.create_file(self.gitrepodir, 'blob.txt', content)
+            blobs.append(Mock(repo=repo, hexsha=repo.git.hash_object(
+                '-w', join(self.gitrepodir, 'blob.txt'))))
+
+        gdi = GitDiffIndex(self.gitrepodir, [], self.diff_algorithm)
+
+        patches = gdi._patches(BlobReader(repo.git_dir), [blobs])
+
+        return gdi._describe(blobs[0], blobs[1], a, b, patches)
+
+
+class TestDescribeGitDiffHistogram(TestDescribeGitDiff):
+
+    """
+    Other Git diff algorithms describe changes the same way.
+
+    """
+    diff_algorithm = 'histogram'
+
+
+class TestDescribePatch(JigTestCase):
+
+    """
+    Unified diffs from Git are converted to described lines.
+
+    """
+    def test_no_newline_at_end_of_file(self):
+        """
+        The Git marker for a missing newline is not a line.
+        """
+        patch = dedent("""
+            diff --git a/de98044 b/a3e1ab4
+            index de98044..a3e1ab4 100644
+            --- a/de98044
+            +++ b/a3e1ab4
+            @@ -2 +1,0 @@ a
+            -b
+            @@ -3,0 +3 @@ c
+            +d
+            \\ No newline at end of file""").strip()
+
+        self.assertEqual(
+            [(1, ' ', 'a'), (2, '-', 'b'), (2, ' ', 'c'), (3, '+', 'd')],
+            list(describe_patch(patch, 'a\nc\nd')))
+
+    def test_carriage_returns(self):
+        """
+        Windows line endings are not part of the line.
+        """
+        patch = dedent("""
+            @@ -1 +1 @@
+            -a\r
+            +b\r""").strip()
+
+        self.assertEqual(
+            [(1, '-', 'a'), (1, '+', 'b'), (2, ' ', 'c')],
+            list(describe_patch(patch, 'b\r\nc\r\n')))
+
+    def test_no_changes(self):
+        """
+        Without any hunks every line is unchanged.
+        """
+        self.assertEqual(
+            [(1, ' ', 'a'), (2, ' ', 'b')],
+            list(describe_patch('', 'a\nb\n')))
+
+
+class TestLimitContext(JigTestCase):
+
+    """
+    Described diffs can be limited to the lines around the changes.
+
+    """
+    a = '\n'.join(['one', 'two', 'three', 'four', 'five', 'six', 'seven'])
+
+    def test_one_change(self):
+        """
+        Only the lines within the context are kept.
+        """
+        b = self.a.replace('four', '4')
+
+        self.assertEqual(
+            ([(3, ' ', 'three'), (4, '-', 'four'), (4, '+', '4'),
+              (5, ' ', 'five')], [[3, 3, 3, 3]]),
+            limit_context(describe_diff(self.a, b), 1))
+
+    def test_no_context(self):
+        """
+        With a context of zero only the changes are kept.
+        """
+        b = self.a.replace('two', '2').replace('six\n', '')
+
+        self.assertEqual(
+            ([(2, '-', 'two'), (2, '+', '2'), (6, '-', 'six')],
+             [[2, 1, 2, 1], [6, 1, 5, 0]]),
+            limit_context(describe_diff(self.a, b), 0))
+
+    def test_overlapping_context(self):
+        """
+        Changes close to each other share one hunk.
+        """
+        b = 'zero\n' + self.a.replace('three', '3')
+
+        limited, hunks = limit_context(describe_diff(self.a, b), 2)
+
+        self.assertEqual([[1, 5, 1, 6]], hunks)
+        self.assertEqual((1, '+', 'zero'), limited[0])
+        self.assertEqual((6, ' ', 'five'), limited[-1])
+
+    def test_no_changes(self):
+        """
+        If nothing changed there is nothing to keep.
+        """
+        self.assertEqual(
+            ([], []), limit_context(describe_diff(self.a, self.a), 3))
+
+
 class TestDiffType(JigTestCase):
 
     """
@@ -308,6 +445,64 @@ class TestDiffType(JigTestCase):
         self.assertEqual(DiffType.U, DiffType.for_diff(diff))
 
 
+class TestSharedIterator(JigTestCase):
+
+    """
+    Test sharing an iterator between readers.
+
+    """
+    def test_kept_until_read(self):
+        """
+        Items are only kept until every expected reader has read them.
+        """
+        shared = _SharedIterator(iter(range(10)))
+
+        shared.expect('first')
+        shared.expect('second')
+
+        first = shared.read('first')
+        second = shared.read('second')
+
+        kept = []
+        for i in range(10):
+            self.assertEqual(i, first.next())
+            kept.append(len(shared._items))
+            self.assertEqual(i, second.next())
+
+        # The one the second reader is on and the next the first one read
+        self.assertEqual(2, max(kept))
+
+        self.assertEqual([], list(first))
+        self.assertEqual([], list(second))
+        self.assertEqual([], shared._items)
+
+    def test_kept_for_expected(self):
+        """
+        Nothing is let go until every expected reader has started.
+        """
+        shared = _SharedIterator(iter(range(10)))
+
+        shared.expect('first')
+        shared.expect('second')
+
+        self.assertEqual(range(10), list(shared.read('first')))
+        self.assertEqual(10, len(shared._items))
+
+        self.assertEqual(range(10), list(shared.read('second')))
+        self.assertEqual([], shared._items)
+        self.assertTrue(shared.closed)
+
+    def test_kept_without_expected(self):
+        """
+        Everything is kept if the readers aren't known.
+        """
+        shared = _SharedIterator(iter(range(10)))
+
+        self.assertEqual(range(10), list(shared))
+        self.assertEqual(range(10), list(shared))
+        self.assertEqual(10, len(shared._items))
+
+
 class TestGitDiffIndex(JigTestCase):
 
     """
@@ -431,6 +626,177 @@ class TestGitDiffIndex(JigTestCase):
             'scripts/italian-lesson.txt',
             files[3]['name'])
 
+    def test_limited_context(self):
+        """
+        Only the lines around the changes are included with a context.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[1])
+
+        file1 = gdi.files(context=0).next()
+
+        # No unchanged lines at all
+        self.assertNotIn(' ', [i[1] for i in file1['diff']])
+        self.assertTrue(file1['hunks'])
+
+        # And the whole file is still available
+        self.assertNotIn('hunks', gdi.files().next())
+
+    def test_files_json_context(self):
+        """
+        Encoded files are limited by the context too.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[1])
+
+        full = json.loads(gdi.files_json())
+        limited = json.loads(gdi.files_json(0))
+
+        self.assertEqual(47, len(full[0]['diff']))
+        self.assertLess(len(limited[0]['diff']), 47)
+        self.assertIn('hunks', limited[0])
+
+    def test_file_records(self):
+        """
+        In-process plugins get the same files without any JSON.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[1])
+
+        with patch.object(json, 'loads') as loads:
+            records = gdi.file_records(0)
+            again = gdi.file_records(0)
+
+        # Nothing is decoded, the records are built once
+        self.assertFalse(loads.called)
+        self.assertIs(records[0]['diff'][0], again[0]['diff'][0])
+
+        self.assertEqual(
+            json.loads(gdi.files_json(0)), json.loads(json.dumps(records)))
+
+        # Each call gets its own copy
+        records[0]['name'] = u'changed'
+        records[0]['diff'].pop()
+        self.assertNotEqual(u'changed', gdi.file_records(0)[0]['name'])
+        self.assertEqual(
+            len(records[0]['diff']) + 1, len(gdi.file_records(0)[0]['diff']))
+
+        # And only the selected files
+        self.assertEqual([], gdi.file_records(select=lambda name: False))
+
+    def test_iter_files_json(self):
+        """
+        Files are only described once they're about to be sent.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        with patch.object(GitDiffIndex, '_describe',
+                          wraps=gdi._describe) as describe:
+            chunks = gdi.iter_files_json()
+
+            self.assertEqual('[', chunks.next())
+            first = chunks.next()
+
+            # Only the first of the two files so far
+            self.assertEqual(1, describe.call_count)
+
+            encoded = '[' + first + ''.join(chunks)
+
+        self.assertEqual(2, describe.call_count)
+        self.assertEqual(
+            json.loads(gdi.files_json()), json.loads(encoded))
+        self.assertNotIn('\n', encoded)
+
+    def test_expected_readers(self):
+        """
+        Files are let go once every expected reader has read them.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        gdi.expect('first')
+        gdi.expect('second')
+
+        shared = gdi._shared_files(None)
+
+        first = gdi.iter_files_json(reader='first')
+        second = gdi.iter_files_json(reader='second')
+
+        encoded = []
+        for one in first:
+            self.assertEqual(one, second.next())
+            encoded.append(one)
+
+        self.assertEqual([], shared._items)
+
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+        self.assertEqual(
+            json.loads(gdi.files_json()), json.loads(''.join(encoded)))
+
+    def test_expected_context(self):
+        """
+        The whole files are let go once the limited ones are made.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        gdi.expect('whole')
+        gdi.expect('limited', 0)
+
+        wholes = gdi._shared_files(None)
+        limited = gdi._shared_files(0)
+
+        self.assertEqual(2, len(gdi.file_records(reader='whole')))
+        # Still needed to make the limited ones
+        self.assertEqual(2, len(wholes._items))
+
+        self.assertEqual(2, len(gdi.file_records(0, reader='limited')))
+
+        self.assertEqual([], wholes._items)
+        self.assertEqual([], limited._items)
+
+    def test_released_readers(self):
+        """
+        Readers that never start don't hold on to the files.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        gdi.expect('first')
+        gdi.expect('second', 0)
+        gdi.expect('third')
+
+        shared = gdi._shared_files(None)
+
+        self.assertEqual(2, len(gdi.file_records(reader='first')))
+        self.assertEqual(2, len(shared._items))
+
+        gdi.release('second')
+        gdi.release('third')
+
+        self.assertEqual([], shared._items)
+
+        # Nobody said they'd read them
+        with self.assertRaises(RuntimeError):
+            gdi.file_records()
+
+    def test_unexpected_readers(self):
+        """
+        Without any expected readers everything is kept.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[3])
+
+        self.assertEqual(2, len(gdi.file_records()))
+        self.assertEqual(2, len(gdi._shared_files(None)._items))
+        self.assertEqual(2, len(gdi.file_records()))
+
+    def test_difflib_fallback(self):
+        """
+        If Git can't describe the changes Python's difflib does.
+        """
+        gdi = GitDiffIndex(self.testrepodir, self.testdiffs[1], 'unknown')
+
+        with_fallback = list(gdi.files().next()['diff'])
+
+        gdi = GitDiffIndex(self.testrepodir, self.testdiffs[1], 'difflib')
+
+        self.assertEqual(list(gdi.files().next()['diff']), with_fallback)
+        self.assertEqual(47, len(with_fallback))
+
     def test_binary_diff(self):
         """
         Binary files are ignored.
@@ -443,6 +809,22 @@ class TestGitDiffIndex(JigTestCase):
         # But we don't include the diff since it's binary data
         self.assertEqual([], gdi.files().next()['diff'])
 
+    def test_max_blob_size(self):
+        """
+        Files that are too large are not read or described.
+        """
+        gdi = GitDiffIndex(self.testrepodir, self.testdiffs[1],
+                           max_blob_size=10)
+
+        with patch.object(BlobReader, 'read') as read:
+            read.return_value = (i for i in [])
+
+            files = list(gdi.files())
+
+        self.assertEqual(1, len(files))
+        self.assertEqual([], files[0]['diff'])
+        read.assert_called_once_with([])
+
     def test_ignores_jig_directory(self):
         """
         Does not include anything in the .jig directory.
@@ -474,3 +856,27 @@ class TestGitDiffIndex(JigTestCase):
 
         # If we ignored the symlink, which we should, there should be no files
         self.assertEqual(0, len(list(gdi.files())))
+
+    def test_one_git_diff(self):
+        """
+        All of the modified files are described by a single git diff.
+        """
+        self.commit(self.gitrepodir, 'a.txt', 'a\nb\nc\n')
+        self.commit(self.gitrepodir, 'b.txt', '1\n2\n3\n')
+        self.stage(self.gitrepodir, 'a.txt', 'a\nB\nc\n')
+        self.stage(self.gitrepodir, 'b.txt', '1\n2\n3\n4\n')
+
+        repo = Repo(self.gitrepodir)
+        gdi = GitDiffIndex(self.gitrepodir, repo.head.commit.diff())
+
+        with patch.object(BlobReader, 'diff',
+                          autospec=True, side_effect=BlobReader.diff) as diff:
+            files = dict([(i['name'], list(i['diff'])) for i in gdi.files()])
+
+        self.assertEqual(1, diff.call_count)
+        self.assertEqual(
+            [(1, ' ', u'a'), (2, '-', u'b'), (2, '+', u'B'), (3, ' ', u'c')],
+            files['a.txt'])
+        self.assertEqual(
+            [(1, ' ', u'1'), (2, ' ', u'2'), (3, ' ', u'3'), (4, '+', u'4')],
+            files['b.txt'])
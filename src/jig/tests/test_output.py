@@ -1,4 +1,5 @@
 # coding=utf-8
+import json
 from StringIO import StringIO
 
 from jig.tests import factory
@@ -6,7 +7,49 @@ from jig.tests.testcase import JigTestCase
 from jig.tests.mocks import MockPlugin
 from jig.formatters.utils import green_bold, yellow_bold, red_bold
 from jig.output import (
-    strip_paint, utf8_writer, Message, Error, ResultsCollator)
+    strip_paint, utf8_writer, Message, Error, ResultsCollator,
+    MessageRecords)
+from jig.plugins.ndjson import read_messages
+
+
+class TestMessageRecords(JigTestCase):
+
+    """
+    Messages written one per line are kept up to a limit.
+
+    """
+    def test_limit(self):
+        """
+        Messages past the limit are counted by type.
+        """
+        records = MessageRecords()
+
+        records.add([None, None, u'warn', u'W'], 1)
+        records.add([None, None, u'warn', u'W'], 1)
+        records.add([u'a.txt', 1, u'S', u'S'], 1)
+        records.add(u'not a message', 1)
+
+        self.assertEqual([[None, None, u'warn', u'W']], records)
+        self.assertEqual({u'warn': 1, u'stop': 1}, records.truncated)
+
+    def test_aggregate(self):
+        """
+        The same message is kept once, the limit is for different ones.
+        """
+        records = MessageRecords()
+
+        for line in (1, 2, 3, 7):
+            records.add([u'a.txt', line, u'warn', u'W'], 2, True)
+        records.add([u'a.txt', None, u'info', u'F'], 2, True)
+        records.add([u'a.txt', None, u'i', u'F'], 2, True)
+        records.add([None, 1, u'stop', u'S'], 2, True)
+
+        self.assertEqual(
+            [[u'a.txt', 1, u'warn', u'W'], [u'a.txt', None, u'info', u'F']],
+            records)
+        self.assertEqual(
+            {0: [4, [[1, 3], [7, 7]]], 1: [2, None]}, records.repeated)
+        self.assertEqual({u'stop': 1}, records.truncated)
 
 
 class TestStripPaint(JigTestCase):
@@ -84,6 +127,36 @@ class TestMessage(JigTestCase):
             "<Message type=\"stop\", body=True, file='a.txt', line=1>",
             repr(message))
 
+    def test_slots(self):
+        """
+        Messages don't have a ``__dict__``.
+        """
+        message = Message(None, type='warn', body='body', file='a.txt')
+
+        self.assertFalse(hasattr(message, '__dict__'))
+        self.assertFalse(hasattr(Error(None), '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            message.extra = True
+
+    def test_repeat(self):
+        """
+        Repeating a message counts it and records the ranges of lines.
+        """
+        message = Message(None, body='body', file='a.txt', line=1)
+
+        for line in (2, 3, 3, 7, 8, 5):
+            message.repeat(line)
+
+        self.assertEqual(7, message.count)
+        self.assertEqual([[1, 3], [7, 8], [5, 5]], message.lines)
+
+        message = Message(None, body='body')
+        message.repeat()
+
+        self.assertEqual(2, message.count)
+        self.assertIsNone(message.lines)
+
     def test_equality(self):
         """
         Messages with the same content are considered equal.
@@ -146,6 +219,60 @@ class TestResultsCollator(JigTestCase):
         # And we should have no errors
         self.assertEqual([], rc.errors)
 
+    def test_skipped(self):
+        """
+        Plugins without a result were skipped and aren't collated.
+        """
+        rc = ResultsCollator(factory.skipped_after_stop())
+
+        self.assertEqual(
+            [u'skipped1', u'skipped2'], [i.name for i in rc.skipped])
+        self.assertEqual([u'stopper'], [i.name for i in rc.plugins])
+        self.assertEqual(1, rc.counts[u'stop'])
+        self.assertEqual([], rc.errors)
+
+    def test_message_records(self):
+        """
+        Messages written one per line are collated by what they are about.
+        """
+        results = factory.message_records()
+        rc = ResultsCollator(results)
+
+        cm, fm, lm = rc.messages
+
+        self.assertEqual([Message(None, type='info', body=u'C')], cm)
+        self.assertEqual(
+            [Message(None, type='warn', body=u'F', file=u'a.txt')], fm)
+        self.assertEqual(
+            [Message(None, type='stop', body=u'L', file=u'a.txt', line=1)],
+            lm)
+
+        # The messages that weren't kept are still counted
+        self.assertEqual(
+            {u'info': 1, u'warn': 1, u'stop': 3}, rc.counts)
+        self.assertEqual({results.keys()[0]: 2}, rc.truncated)
+
+    def test_message_records_error(self):
+        """
+        Anything that isn't a message is an error.
+        """
+        rc = ResultsCollator({MockPlugin(): (0, MessageRecords(
+            [[None, None, u'info', u'C'], u'not a message']), '')})
+
+        self.assertEqual(u'not a message', rc.errors[0].body)
+
+    def test_usage(self):
+        """
+        What it cost to run each plugin is kept if it was measured.
+        """
+        results = factory.with_usage()
+        rc = ResultsCollator(results)
+
+        self.assertEqual(
+            [u'fast', u'inprocess', u'slow'],
+            sorted([i.name for i in rc.usage]))
+        self.assertEqual(1.5, rc.usage[results.keys()[1]].wall)
+
     def test_commit_specific_message(self):
         """
         Results that are commit specific are collated correctly.
@@ -283,6 +410,152 @@ class TestResultsCollator(JigTestCase):
             Message(None, type="info", body="L", file=u'a.txt', line=1),
             lm[0])
 
+    def test_indexes(self):
+        """
+        Messages are grouped by plugin, file and line.
+        """
+        results = factory.streamed()
+        first, second, skipped = results.keys()
+
+        rc = ResultsCollator(results)
+
+        warn = Message(None, type='warn', body=u'W', file=u'a.txt', line=1)
+        info = Message(None, type='info', body=u'F', file=u'a.txt')
+        stop = Message(None, type='stop', body=u'S', file=u'a.txt', line=2)
+
+        self.assertEqual([warn, info], rc.by_plugin[first])
+        self.assertEqual([stop], rc.by_plugin[second])
+        self.assertNotIn(skipped, rc.by_plugin)
+        self.assertEqual({u'a.txt': [warn, info, stop]}, rc.by_file)
+        self.assertEqual(
+            {(u'a.txt', 1): [warn], (u'a.txt', 2): [stop]}, rc.by_line)
+        self.assertEqual(
+            {first: {u'info': 1, u'warn': 1, u'stop': 0},
+             second: {u'info': 0, u'warn': 0, u'stop': 1}},
+            rc.plugin_counts)
+
+    def test_results_unchanged(self):
+        """
+        The results given to the collator are left as they were.
+        """
+        results = factory.skipped_after_stop()
+        results.update(factory.error())
+
+        ResultsCollator(results)
+
+        self.assertEqual(4, len(results))
+
+    def test_errors_keep_messages(self):
+        """
+        Messages a plugin got right are kept along with its errors.
+        """
+        rc = ResultsCollator({MockPlugin(): (0, {
+            u'a.txt': [[1, u'info', u'L'], [1, 2, 3, 4, 5]]}, '')})
+
+        self.assertEqual(1, len(rc.errors))
+        self.assertEqual(
+            [Message(None, type='info', body=u'L', file=u'a.txt', line=1)],
+            rc.messages[2])
+
+    def test_iter_messages(self):
+        """
+        All of the messages and then the errors can be iterated over.
+        """
+        rc = ResultsCollator(factory.one_of_each())
+        rc.errors.append(Error(None, body=u'E'))
+
+        cm, fm, lm = rc.messages
+
+        self.assertEqual(cm + fm + lm + rc.errors, list(rc.iter_messages()))
+        self.assertEqual(4, rc.message_count)
+
+    def test_aggregate_ndjson(self):
+        """
+        Messages written one per line are aggregated like the others.
+        """
+        plugin = MockPlugin(max_messages=1000)
+        warnings = [[line, u'warn', u'W'] for line in range(1, 5001)]
+
+        as_json = ResultsCollator(
+            {plugin: (0, {u'a.txt': warnings}, u'')}, aggregate=True)
+
+        stream = StringIO(u''.join([
+            u'{0}\n'.format(json.dumps([u'a.txt'] + i)) for i in warnings]))
+
+        as_ndjson = ResultsCollator(
+            {plugin: (0, read_messages(stream, 1000, True), u'')},
+            aggregate=True)
+
+        for rc in (as_json, as_ndjson):
+            message, = rc.messages[2]
+
+            self.assertEqual(5000, message.count)
+            self.assertEqual([[1, 5000]], message.lines)
+            self.assertEqual({}, rc.truncated)
+            self.assertEqual(5000, rc.counts[u'warn'])
+            self.assertEqual(5000, len(rc.by_line))
+
+    def test_shared_filenames(self):
+        """
+        Messages about the same file share the filename.
+        """
+        rc = ResultsCollator({MockPlugin(): (0, MessageRecords([
+            [u''.join([u'a', u'.txt']), 1, u'info', u'A'],
+            [u''.join([u'a', u'.txt']), 2, u'info', u'B']]), '')})
+
+        first, second = rc.messages[2]
+
+        self.assertIs(first.file, second.file)
+
+    def test_aggregate(self):
+        """
+        The same message from a plugin is kept once but counted each time.
+        """
+        results = factory.repeated()
+        plugin = results.keys()[0]
+
+        rc = ResultsCollator(results, aggregate=True)
+
+        cm, fm, lm = rc.messages
+
+        self.assertEqual(
+            [Message(None, type='info', body=u'F', file=u'a.txt')], fm)
+        self.assertEqual(2, fm[0].count)
+        self.assertEqual(
+            [Message(None, type='warn', body=u'W', file=u'a.txt', line=1)],
+            lm)
+        self.assertEqual([[1, 3], [7, 7]], lm[0].lines)
+        self.assertIs(lm[0], rc.by_line[(u'a.txt', 7)][0])
+
+        # Only 2 are kept for this plugin, the stop is still counted
+        self.assertEqual({u'info': 2, u'warn': 4, u'stop': 1}, rc.counts)
+        self.assertEqual({plugin: 1}, rc.truncated)
+
+    def test_plugin_limit(self):
+        """
+        Messages past a plugin's max_messages are counted but not kept.
+        """
+        rc = ResultsCollator(factory.repeated())
+
+        self.assertEqual(2, sum([len(i) for i in rc.messages]))
+        self.assertEqual({u'info': 2, u'warn': 4, u'stop': 1}, rc.counts)
+        self.assertEqual([5], rc.truncated.values())
+
+    def test_limit(self):
+        """
+        Messages past the limit for all of the plugins aren't kept.
+        """
+        results = factory.streamed()
+        first, second, skipped = results.keys()
+
+        rc = ResultsCollator(results, limit=1)
+
+        self.assertEqual(
+            [Message(None, type='warn', body=u'W', file=u'a.txt', line=1)],
+            list(rc.iter_messages()))
+        self.assertEqual({first: 1, second: 1}, rc.truncated)
+        self.assertEqual({u'info': 1, u'warn': 1, u'stop': 1}, rc.counts)
+
     def test_commit_specific_errors(self):
         """
         Exercise the errors related to commit specific messages.
@@ -1,9 +1,13 @@
-from shutil import rmtree
-from os.path import join
+import json
+from time import sleep
+from shutil import rmtree, copytree
+from tempfile import mkdtemp
+from os.path import join, dirname
 from contextlib import nested
 from datetime import datetime, timedelta
 
 from mock import patch
+from git import Repo
 
 from jig.tests.testcase import (
     RunnerTestCase, PluginTestCase, result_with_hint)
@@ -11,9 +15,178 @@ from jig.conf import PLUGIN_CHECK_FOR_UPDATES
 from jig.commands.hints import GIT_REPO_NOT_INITIALIZED
 from jig.tests.mocks import MockPlugin
 from jig.exc import ForcedExit
-from jig.plugins import set_jigconfig, Plugin
-from jig.runner import Runner
-from jig.gitutils.branches import parse_rev_range
+from jig.plugins import set_jigconfig, Plugin, PluginManager
+from jig.output import ResultsCollator, ConsoleView
+from jig.stats import PluginStats
+from jig.formatters.fancy import FancyFormatter
+from jig.runner import (
+    Runner, _jobs_for, _max_blob_size_for, _fail_fast_for, _stream_for,
+    _max_messages_for, _aggregate_for, _run_concurrently, _InstallOrder,
+    Preloaded)
+from jig.gitutils.branches import (
+    parse_rev_range, prepare_working_directory)
+
+
+class TestRunConcurrently(PluginTestCase):
+
+    """
+    Plugins can be ran with a bounded pool of threads.
+
+    """
+    def test_jobs_default(self):
+        """
+        Without any config the default number of jobs is used.
+        """
+        self.assertEqual(1, _jobs_for(self.jigconfig))
+
+    def test_jobs_from_config(self):
+        """
+        The number of jobs can be set in the jig section of the config.
+        """
+        self.jigconfig.set('jig', 'jobs', '4')
+
+        self.assertEqual(4, _jobs_for(self.jigconfig))
+
+    def test_jobs_explicit(self):
+        """
+        An explicit number of jobs overrides the config.
+        """
+        self.jigconfig.set('jig', 'jobs', '4')
+
+        self.assertEqual(2, _jobs_for(self.jigconfig, 2))
+
+    def test_jobs_invalid(self):
+        """
+        Bad values in the config or less than 1 job fall back to 1.
+        """
+        self.jigconfig.set('jig', 'jobs', 'many')
+
+        self.assertEqual(1, _jobs_for(self.jigconfig))
+        self.assertEqual(1, _jobs_for(self.jigconfig, 0))
+
+    def test_max_blob_size(self):
+        """
+        Files can be limited to a size, but aren't unless it's valid.
+        """
+        self.assertIsNone(_max_blob_size_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'max_blob_size', '1024')
+        self.assertEqual(1024, _max_blob_size_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'max_blob_size', 'huge')
+        self.assertIsNone(_max_blob_size_for(self.jigconfig))
+
+    def test_fail_fast(self):
+        """
+        Fail-fast is off unless it's turned on in the config or explicitly.
+        """
+        self.assertFalse(_fail_fast_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'fail_fast', 'yes')
+        self.assertTrue(_fail_fast_for(self.jigconfig))
+        self.assertFalse(_fail_fast_for(self.jigconfig, False))
+
+        self.jigconfig.set('jig', 'fail_fast', 'sometimes')
+        self.assertFalse(_fail_fast_for(self.jigconfig))
+        self.assertTrue(_fail_fast_for(self.jigconfig, True))
+
+    def test_stream(self):
+        """
+        Streaming is off unless it's turned on in the config or explicitly.
+        """
+        self.assertFalse(_stream_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'stream', 'yes')
+        self.assertTrue(_stream_for(self.jigconfig))
+        self.assertFalse(_stream_for(self.jigconfig, False))
+
+    def test_max_messages(self):
+        """
+        Messages are limited for all plugins, but not unless it's valid.
+        """
+        self.assertIsNone(_max_messages_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'max_messages', '500')
+        self.assertEqual(500, _max_messages_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'max_messages', '0')
+        self.assertIsNone(_max_messages_for(self.jigconfig))
+
+    def test_aggregate(self):
+        """
+        The same messages are aggregated unless it's turned off.
+        """
+        self.assertTrue(_aggregate_for(self.jigconfig))
+
+        self.jigconfig.set('jig', 'aggregate', 'no')
+        self.assertFalse(_aggregate_for(self.jigconfig))
+
+    def test_keeps_order(self):
+        """
+        Return values are in the same order as the items given.
+        """
+        def slow_first(item):
+            # The first item will be the last to finish
+            sleep(0.05 if item == 0 else 0)
+            return item * 10
+
+        self.assertEqual(
+            [0, 10, 20, 30],
+            _run_concurrently(slow_first, range(4), 4))
+
+    def test_start_order(self):
+        """
+        Calls can be started in a different order than they are returned.
+        """
+        started = []
+
+        def record(item):
+            started.append(item)
+            # Give the other thread time to start its first call
+            sleep(0.05)
+            return item * 10
+
+        self.assertEqual(
+            [0, 10, 20, 30],
+            _run_concurrently(record, range(4), 1, [3, 2, 1, 0]))
+        self.assertEqual([0, 1, 2, 3], started)
+
+        del started[:]
+
+        self.assertEqual(
+            [0, 10, 20, 30],
+            _run_concurrently(record, range(4), 2, [3, 2, 1, 0]))
+        self.assertEqual(set([3, 2]), set(started[:2]))
+
+    def test_install_order(self):
+        """
+        Results that finish early are held back for the ones before them.
+        """
+        passed = []
+
+        in_order = _InstallOrder(
+            lambda *args: passed.append(args), ['a', 'b', 'c', 'd'])
+
+        in_order('c', 30)
+        in_order('b', 20)
+        self.assertEqual([], passed)
+
+        in_order('a', 10)
+        self.assertEqual([('a', 10), ('b', 20), ('c', 30)], passed)
+
+        # Skipped ones aren't passed on
+        in_order('d', None)
+        self.assertEqual(3, len(passed))
+
+    def test_raises_exceptions(self):
+        """
+        An exception in one of the threads is raised in the caller.
+        """
+        def explode(item):
+            raise ValueError(item)
+
+        with self.assertRaises(ValueError):
+            _run_concurrently(explode, range(4), 2)
 
 
 class TestRunner(RunnerTestCase, PluginTestCase):
@@ -86,6 +259,230 @@ class TestRunner(RunnerTestCase, PluginTestCase):
         # And we exited with 0 because there is no reason to stop the commit
         r_sys.exit.assert_called_once_with(0)
 
+    def test_skips_if_nothing_changed(self):
+        """
+        The same staged changes that passed last time are not checked again.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        with nested(
+            patch('jig.runner.raw_input', create=True),
+            patch.object(Runner, 'results', wraps=self.runner.results)
+        ) as (ri, results):
+            ri.return_value = 'c'
+
+            for i in range(2):
+                with self.assertRaises(SystemExit) as ec:
+                    self.runner.main(self.gitrepodir)
+
+                self.assertSystemExitCode(ec.exception, 0)
+
+            self.assertEqual(1, results.call_count)
+            self.assertIn(
+                u'Jig already checked these changes, skipping.', self.output)
+
+            # Something else is staged, so it runs again. Git's own index is
+            # used, GitPython leaves a stale tree cache in it.
+            self.create_file(self.gitrepodir, 'c.txt', 'c')
+            Repo(self.gitrepodir).git.add('c.txt')
+
+            with self.assertRaises(SystemExit):
+                self.runner.main(self.gitrepodir)
+
+            self.assertEqual(2, results.call_count)
+
+    def test_profile(self):
+        """
+        What each plugin cost can be shown after the results.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        with self.assertRaises(SystemExit):
+            self.runner.main(
+                self.gitrepodir, interactive=False, profile=True)
+
+        self.assertResultsIn(u'Jig ran 1 plugin', self.output)
+        self.assertRegexpMatches(
+            self.output, r'\nPlugin +Wall +User +Sys +Max RSS +Input\n'
+            r'plugin01 +\d+\.\d\d s +\d+\.\d\d s')
+
+        # The same changes again, the results are cached
+        with self.assertRaises(SystemExit):
+            self.runner.main(
+                self.gitrepodir, interactive=False, profile=True)
+
+        self.assertIn(u'plugin01  cached', self.output)
+
+    def test_stream(self):
+        """
+        The results of each plugin can be printed as soon as it finishes.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin08')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        printed = []
+        original = FancyFormatter.print_plugin
+
+        def print_plugin(formatter, printer, collator):
+            printed.extend([i.name for i in collator.plugins])
+            return original(formatter, printer, collator)
+
+        with patch.object(FancyFormatter, 'print_plugin', autospec=True,
+                          side_effect=print_plugin):
+            with self.assertRaises(SystemExit):
+                self.runner.main(
+                    self.gitrepodir, interactive=False, stream=True)
+
+        self.assertEqual([u'plugin01', u'plugin08'], printed)
+        self.assertResultsIn(u'\u25be  plugin01', self.output)
+        self.assertResultsIn(u'\u25be  plugin08', self.output)
+        self.assertResultsIn(u'Jig ran 2 plugins', self.output)
+
+    def test_max_messages(self):
+        """
+        Messages past the limit for all plugins are counted but not shown.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin08')
+        self.jigconfig.set('jig', 'max_messages', '1')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        with self.assertRaises(SystemExit):
+            self.runner.main(self.gitrepodir, interactive=False, stream=True)
+
+        self.assertEqual(1, self.output.count(u'b is +'))
+        self.assertResultsIn(u'Info 0 Warn 2 Stop 0', self.output)
+        self.assertResultsIn(u'(1 more message not shown)', self.output)
+
+    def test_max_messages_install_order(self):
+        """
+        Streamed plugins share the limit in the order they were installed.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin08')
+        self.jigconfig.set('jig', 'max_messages', '1')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        printed = []
+        original_print = FancyFormatter.print_plugin
+        original_pre_commit = Plugin.pre_commit
+
+        def print_plugin(formatter, printer, collator):
+            printed.extend([(i.name, len(collator.by_plugin.get(i, [])))
+                            for i in collator.plugins])
+            return original_print(formatter, printer, collator)
+
+        def pre_commit(plugin, gdi, cancellation=None):
+            if plugin.name == u'plugin01':
+                # Finishes after plugin08
+                sleep(0.5)
+            return original_pre_commit(plugin, gdi, cancellation)
+
+        with nested(
+                patch.object(FancyFormatter, 'print_plugin', autospec=True,
+                             side_effect=print_plugin),
+                patch.object(Plugin, 'pre_commit', autospec=True,
+                             side_effect=pre_commit)):
+            with self.assertRaises(SystemExit):
+                self.runner.main(
+                    self.gitrepodir, interactive=False, stream=True, jobs=2)
+
+        # The same message is shown as in the summary
+        self.assertEqual([(u'plugin01', 1), (u'plugin08', 0)], printed)
+        self.assertResultsIn(u'(1 more message not shown)', self.output)
+
+    def test_trace(self):
+        """
+        Each phase of the run and each plugin can be traced.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+        self.modify_file(self.gitrepodir, 'b.txt', 'bb')
+
+        tracedir = mkdtemp()
+        filename = join(tracedir, 'trace.json')
+
+        try:
+            with self.assertRaises(SystemExit):
+                self.runner.main(
+                    self.gitrepodir, interactive=False, trace=filename)
+
+            with open(filename) as fh:
+                events = json.load(fh)['traceEvents']
+        finally:
+            rmtree(tracedir)
+
+        names = set([i['name'] for i in events if i['ph'] == 'X'])
+
+        for name in (u'jig', u'update check', u'repo_jiginitialized',
+                     u'prepare working directory', u'_diff_for',
+                     u'GitDiffIndex', u'encode_input', u'plugin01',
+                     u'restore working directory', u'ResultsCollator',
+                     u'format', u'git stash'):
+            self.assertIn(name, names)
+
+    def test_export_staged_files(self):
+        """
+        Plugins can be given a copy of the staged files instead.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self.jigconfig.set('jig', 'prepare', 'export')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+        self.modify_file(self.gitrepodir, 'b.txt', 'bb')
+
+        received = []
+
+        def pre_commit(plugin, gdi, cancellation=None):
+            for f in gdi.files():
+                with open(f['filename']) as fh:
+                    received.append((f['filename'], fh.read()))
+            return 0, '{}', ''
+
+        with nested(
+            patch.object(Plugin, 'pre_commit', autospec=True),
+            patch('jig.runner.prepare_working_directory',
+                  wraps=prepare_working_directory),
+            self.assertRaises(SystemExit)
+        ) as (p, prepare, ec):
+            p.side_effect = pre_commit
+
+            self.runner.main(self.gitrepodir)
+
+        self.assertTrue(prepare.call_args[1]['export'])
+
+        # The plugin read the staged version, from somewhere else
+        filename, content = received[0]
+        self.assertEqual('b', content)
+        self.assertFalse(filename.startswith(self.gitrepodir))
+
+        # The working directory was never stashed
+        with open(join(self.gitrepodir, 'b.txt')) as fh:
+            self.assertEqual('bb', fh.read())
+
     def test_will_prompt_user(self):
         """
         User sees a prompt if there are messages.
@@ -555,6 +952,252 @@ class TestRunnerResults(RunnerTestCase, PluginTestCase):
             len(self.runner.results(self.gitrepodir, plugin='notinstalled'))
         )
 
+    def test_concurrent_jobs(self):
+        """
+        Plugins ran concurrently still have their results in order.
+        """
+        for plugindir in ('plugin07/plugin02', 'plugin01',
+                          'plugin07/plugin01'):
+            self._add_plugin(self.jigconfig, plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(
+            self.gitrepodir,
+            name='a.txt',
+            content='a'
+        )
+
+        self.stage(
+            self.gitrepodir,
+            name='b.txt',
+            content='b'
+        )
+
+        results = self.runner.results(self.gitrepodir, jobs=3)
+
+        self.assertEqual(
+            ['plugin07/plugin02', 'plugin01', 'plugin07/plugin01'],
+            [i.name for i in results.keys()])
+
+        for retcode, stdout, stderr in results.values():
+            self.assertEqual(0, retcode)
+            self.assertEqual({u'b.txt': [[1, u'warn', u'b is +']]}, stdout)
+
+    def test_plugins_without_files(self):
+        """
+        Plugins are not ran if none of the files are ones they want.
+        """
+        for plugindir in ('plugin01', 'plugin09'):
+            self._add_plugin(self.jigconfig, plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.rst', content='b')
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            pre_commit.return_value = (0, '{}', '')
+
+            results = self.runner.results(self.gitrepodir)
+
+        self.assertEqual(['plugin01'], [i.name for i in results.keys()])
+        self.assertEqual(1, pre_commit.call_count)
+
+        self.stage(self.gitrepodir, name='c.txt', content='c')
+
+        results = self.runner.results(self.gitrepodir)
+
+        self.assertEqual(
+            ['plugin01', 'plugin09'], [i.name for i in results.keys()])
+        self.assertEqual(
+            {u'c.txt': [[1, u'warn', u'c is +']]}, results.values()[1][1])
+
+    def test_cached_results(self):
+        """
+        Plugins are not ran again on the same files.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        first = self.runner.results(self.gitrepodir)
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            second = self.runner.results(self.gitrepodir)
+
+        self.assertFalse(pre_commit.called)
+        self.assertEqual(first.values(), second.values())
+
+        # A different file, the plugin has to run
+        self.stage(self.gitrepodir, name='b.txt', content='bb')
+
+        third = self.runner.results(self.gitrepodir)
+
+        self.assertNotEqual(first.values(), third.values())
+
+    def test_records_stats(self):
+        """
+        How long plugins take is recorded, except when they are cached.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        self.runner.results(self.gitrepodir)
+        self.runner.results(self.gitrepodir)
+
+        runs = PluginStats(self.gitrepodir).runs[u'test01:plugin01']
+
+        self.assertEqual(1, len(runs))
+        self.assertGreater(runs[0]['wall'], 0)
+
+    def test_slowest_first(self):
+        """
+        Plugins that took the longest last time are started first.
+        """
+        for plugindir in ('plugin01', 'plugin07/plugin01'):
+            self._add_plugin(self.jigconfig, plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        with patch.object(PluginStats, 'schedule') as schedule:
+            schedule.return_value = [1, 0]
+
+            with patch('jig.runner._run_concurrently') as run:
+                run.return_value = [(0, '{}', ''), (0, '{}', '')]
+
+                self.runner.results(self.gitrepodir, jobs=2)
+
+        self.assertEqual(
+            [u'plugin01', u'plugin07/plugin01'],
+            [i.name for i in schedule.call_args[0][0]])
+        self.assertEqual([1, 0], run.call_args[0][3])
+
+    def test_timed_out_plugin(self):
+        """
+        Plugins that run too long are errors, the others are still reported.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin12')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        results = self.runner.results(self.gitrepodir)
+
+        collator = ResultsCollator(results)
+
+        self.assertEqual(
+            [u'plugin12'], [i.plugin.name for i in collator.errors])
+        self.assertIn(u'stopped after running for', collator.errors[0].body)
+        self.assertEqual(0, results.values()[0][0])
+
+    def _stopping_plugin01(self):
+        """
+        Make plugin01 report a stop message, the others run like normal.
+        """
+        original = Plugin.pre_commit
+
+        def pre_commit(plugin, gdi, cancellation=None):
+            if plugin.name == u'plugin01':
+                return 0, '{"b.txt": [[1, "stop", "b is +"]]}', ''
+            return original(plugin, gdi, cancellation)
+
+        return patch.object(
+            Plugin, 'pre_commit', autospec=True, side_effect=pre_commit)
+
+    def test_fail_fast_skips_plugins(self):
+        """
+        Once a plugin stops the commit the rest aren't ran.
+        """
+        for plugindir in ('plugin01', 'plugin09', 'plugin07/plugin01'):
+            self._add_plugin(self.jigconfig, plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        with self._stopping_plugin01() as pre_commit:
+            results = self.runner.results(self.gitrepodir, fail_fast=True)
+
+        self.assertEqual(1, pre_commit.call_count)
+        self.assertEqual(
+            [(0, {u'b.txt': [[1, u'stop', u'b is +']]}, ''), None, None],
+            results.values())
+
+        collator = ResultsCollator(results)
+
+        self.assertEqual(
+            [u'plugin09', u'plugin07/plugin01'],
+            [i.name for i in collator.skipped])
+
+    def test_fail_fast_stops_running_plugins(self):
+        """
+        Plugins that are still running when the commit is stopped are killed.
+        """
+        self._add_plugin(self.jigconfig, 'plugin12')
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self.jigconfig.set('jig', 'fail_fast', 'yes')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        with self._stopping_plugin01():
+            results = self.runner.results(self.gitrepodir, jobs=2)
+
+        # Killed before it could time out
+        self.assertIsNone(results.values()[0])
+        self.assertEqual(u'stop', results.values()[1][1][u'b.txt'][0][1])
+
+    def test_without_fail_fast(self):
+        """
+        All of the plugins run when fail-fast is off.
+        """
+        for plugindir in ('plugin01', 'plugin09'):
+            self._add_plugin(self.jigconfig, plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        with self._stopping_plugin01() as pre_commit:
+            results = self.runner.results(self.gitrepodir)
+
+        self.assertEqual(2, pre_commit.call_count)
+        self.assertNotIn(None, results.values())
+
+    def test_python_plugin(self):
+        """
+        In-process plugins are collated like any other plugin.
+        """
+        self._add_plugin(self.jigconfig, 'plugin11')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        results = self.runner.results(self.gitrepodir)
+
+        self.assertEqual(
+            (0, {u'b.txt': [[1, u'info', u'Checked in-process']]}, u''),
+            results.values()[0])
+
     def test_handles_non_json_stdout(self):
         """
         Supports non-JSON output from the plugin.
@@ -701,3 +1344,116 @@ class TestRunnerRevRange(RunnerTestCase, PluginTestCase):
         )
 
         self.assertEqual(2, len(self.file_changes(results)))
+
+    def test_export_rev_range(self):
+        """
+        Revision ranges can be checked without checking them out.
+        """
+        self.jigconfig.set('jig', 'prepare', 'export')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        # Checking out would refuse to work with this
+        self.modify_file(self.gitrepodir, 'c.txt', 'cc')
+
+        with nested(
+            patch('jig.runner.prepare_working_directory',
+                  wraps=prepare_working_directory),
+            self.assertRaises(SystemExit)
+        ) as (prepare, ec):
+            self.runner.main(
+                self.gitrepodir,
+                rev_range='HEAD~2..HEAD',
+                interactive=False
+            )
+
+        self.assertSystemExitCode(ec.exception, 0)
+        self.assertTrue(prepare.call_args[1]['export'])
+        self.assertIn(u'Jig ran 1 plugin', self.output)
+
+        with open(join(self.gitrepodir, 'c.txt')) as fh:
+            self.assertEqual('cc', fh.read())
+
+
+class TestPreloaded(PluginTestCase):
+
+    """
+    What a run loads is kept until the files it came from change.
+
+    """
+    def setUp(self):
+        super(TestPreloaded, self).setUp()
+
+        self.plugindir = join(mkdtemp(), 'plugin01')
+        copytree(join(self.fixturesdir, 'plugin01'), self.plugindir)
+
+        section = 'plugin:test01:plugin01'
+        self.jigconfig.add_section(section)
+        self.jigconfig.set(section, 'path', self.plugindir)
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.preloaded = Preloaded(self.gitrepodir)
+
+    def tearDown(self):
+        rmtree(dirname(self.plugindir))
+
+    def test_jigconfig(self):
+        """
+        The config is read again once it's changed.
+        """
+        config = self.preloaded.jigconfig()
+
+        self.assertIs(config, self.preloaded.jigconfig())
+
+        self.jigconfig.set('jig', 'jobs', '2')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        changed = self.preloaded.jigconfig()
+
+        self.assertIsNot(config, changed)
+        self.assertEqual('2', changed.get('jig', 'jobs'))
+
+    def test_plugin_manager(self):
+        """
+        The plugins are loaded again once one of their configs has changed.
+        """
+        config = self.preloaded.jigconfig()
+        pm = self.preloaded.plugin_manager(config)
+
+        self.assertIs(pm, self.preloaded.plugin_manager(config))
+
+        with open(join(self.plugindir, 'config.cfg'), 'a') as fh:
+            fh.write('\n[settings]\nchanged = yes\n')
+
+        self.assertIsNot(pm, self.preloaded.plugin_manager(config))
+
+    def test_repo(self):
+        """
+        The repository is opened again once its config has changed.
+        """
+        repo = self.preloaded.repo()
+
+        self.assertIs(repo, self.preloaded.repo())
+
+        with open(join(repo.git_dir, 'config'), 'a') as fh:
+            fh.write('[jig]\n\tchanged = yes\n')
+
+        self.assertIsNot(repo, self.preloaded.repo())
+
+    def test_runner(self):
+        """
+        The runner uses what was loaded by the runs before it.
+        """
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        runner = Runner(
+            view=ConsoleView(collect_output=True, exit_on_exception=False),
+            preloaded=self.preloaded)
+
+        with patch('jig.runner.PluginManager', wraps=PluginManager) as pm:
+            first = runner.results(self.gitrepodir)
+            second = runner.results(self.gitrepodir)
+
+        self.assertEqual(1, pm.call_count)
+        self.assertEqual(first.keys(), second.keys())
+        self.assertEqual(1, len(self.preloaded.blob_cache))
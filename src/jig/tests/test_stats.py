@@ -0,0 +1,101 @@
+from os.path import join
+
+from jig.tests.testcase import PluginTestCase
+from jig.tests.mocks import MockPlugin
+from jig.plugins.usage import Usage
+from jig.stats import PluginStats
+
+
+def _plugin(name):
+    plugin = MockPlugin(name=name)
+    plugin.bundle = u'test01'
+
+    return plugin
+
+
+class TestPluginStats(PluginTestCase):
+
+    """
+    How long plugins take is recorded and used to schedule them.
+
+    """
+    def setUp(self):
+        super(TestPluginStats, self).setUp()
+
+        self.stats = PluginStats(self.gitrepodir, history=3)
+
+    def test_nothing_recorded(self):
+        """
+        Without a history nothing is expected.
+        """
+        self.assertEqual({}, self.stats.runs)
+        self.assertIsNone(self.stats.expected(_plugin(u'plugin01')))
+
+    def test_expected(self):
+        """
+        The expected time is the average of the recorded runs.
+        """
+        plugin = _plugin(u'plugin01')
+
+        self.stats.record(plugin, Usage(1.0, 0.25, 0.25, 2048, 100))
+        self.stats.record(plugin, Usage(2.0, None, None, None, 100))
+
+        self.assertEqual(1.5, self.stats.expected(plugin))
+        self.assertEqual(
+            {'wall': 2.0, 'cpu': None, 'maxrss': None, 'payload': 100},
+            self.stats.runs[u'test01:plugin01'][1])
+
+    def test_history(self):
+        """
+        Only the last few runs are kept.
+        """
+        plugin = _plugin(u'plugin01')
+
+        for wall in (10.0, 1.0, 2.0, 3.0):
+            self.stats.record(plugin, Usage(wall, None, None, None, None))
+
+        self.assertEqual(
+            [1.0, 2.0, 3.0],
+            [i['wall'] for i in self.stats.runs[u'test01:plugin01']])
+        self.assertEqual(2.0, self.stats.expected(plugin))
+
+    def test_save(self):
+        """
+        The runs are saved in the jig directory and read back.
+        """
+        plugin = _plugin(u'plugin01')
+
+        self.stats.record(plugin, Usage(1.0, 0.25, 0.25, 2048, 100))
+        self.stats.save()
+
+        stats = PluginStats(self.gitrepodir)
+
+        self.assertEqual(1.0, stats.expected(plugin))
+
+    def test_corrupt(self):
+        """
+        A stats file that can't be read is started over.
+        """
+        with open(join(self.gitrepodir, '.jig', 'stats'), 'w') as fh:
+            fh.write('[1, 2')
+
+        self.assertEqual({}, self.stats.runs)
+
+        with open(join(self.gitrepodir, '.jig', 'stats'), 'w') as fh:
+            fh.write('{"test01:plugin01": [1, {"wall": "slow"}]}')
+
+        self.assertIsNone(PluginStats(self.gitrepodir).expected(
+            _plugin(u'plugin01')))
+
+    def test_schedule(self):
+        """
+        Plugins without a history start first, then the slowest.
+        """
+        plugins = [_plugin(u'fast'), _plugin(u'new1'), _plugin(u'slow'),
+                   _plugin(u'new2'), _plugin(u'medium')]
+
+        self.stats.record(plugins[0], Usage(0.1, None, None, None, None))
+        self.stats.record(plugins[2], Usage(5.0, None, None, None, None))
+        self.stats.record(plugins[4], Usage(1.0, None, None, None, None))
+
+        self.assertEqual([1, 3, 2, 4, 0], self.stats.schedule(plugins))
@@ -0,0 +1,113 @@
+import json
+from os import environ
+from os.path import join
+from tempfile import mkdtemp
+from shutil import rmtree
+
+from mock import patch
+from git import Repo
+from git.cmd import Git
+
+from jig.tests.testcase import JigTestCase
+from jig.trace import record, span, trace_filename, tracing
+
+
+class TestTracing(JigTestCase):
+
+    """
+    Where the time goes can be written to a trace file.
+
+    """
+    def setUp(self):
+        super(TestTracing, self).setUp()
+
+        self.tracedir = mkdtemp()
+        self.filename = join(self.tracedir, 'trace.json')
+
+    def tearDown(self):
+        rmtree(self.tracedir)
+
+        super(TestTracing, self).tearDown()
+
+    def events(self):
+        """
+        The complete events in the trace file by name.
+        """
+        with open(self.filename) as fh:
+            trace = json.load(fh)
+
+        return dict([(i['name'], i) for i in trace['traceEvents']
+                     if i['ph'] == 'X'])
+
+    def test_not_tracing(self):
+        """
+        Spans do nothing unless tracing was turned on.
+        """
+        with tracing(None):
+            with span(u'nothing'):
+                pass
+
+        with span(u'nothing'):
+            record(u'nothing', 'jig', 0)
+
+    def test_filename(self):
+        """
+        The file can be given or come from the environment.
+        """
+        with patch.dict(environ, {'JIG_TRACE': ''}):
+            self.assertIsNone(trace_filename())
+            self.assertEqual('a.json', trace_filename('a.json'))
+
+        with patch.dict(environ, {'JIG_TRACE': 'b.json'}):
+            self.assertEqual('b.json', trace_filename())
+            self.assertEqual('a.json', trace_filename('a.json'))
+
+    def test_spans(self):
+        """
+        Spans are nested inside the one covering everything.
+        """
+        with tracing(self.filename, u'run'):
+            with span(u'outer', files=2):
+                with span(u'inner', 'plugin'):
+                    pass
+
+        events = self.events()
+
+        self.assertEqual(
+            set([u'run', u'outer', u'inner']), set(events.keys()))
+        self.assertEqual(u'plugin', events[u'inner']['cat'])
+        self.assertEqual({u'files': 2}, events[u'outer']['args'])
+
+        for name in (u'outer', u'inner'):
+            self.assertGreaterEqual(events[name]['ts'], events[u'run']['ts'])
+            self.assertLessEqual(
+                events[name]['ts'] + events[name]['dur'],
+                events[u'run']['ts'] + events[u'run']['dur'])
+
+    def test_written_on_exit(self):
+        """
+        The trace is written even if the run exits.
+        """
+        with self.assertRaises(SystemExit):
+            with tracing(self.filename):
+                raise SystemExit(1)
+
+        self.assertIn(u'jig', self.events())
+
+    def test_git_commands(self):
+        """
+        Each Git command is a span while tracing.
+        """
+        execute = Git.__dict__['execute']
+
+        with tracing(self.filename):
+            Repo(self.gitrepodir).git.status('--short')
+
+        events = self.events()
+
+        self.assertEqual('git', events[u'git status']['cat'])
+        self.assertEqual(
+            u'git status --short', events[u'git status']['args']['command'])
+
+        # Put back the way it was
+        self.assertIs(execute, Git.__dict__['execute'])
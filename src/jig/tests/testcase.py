@@ -348,7 +348,7 @@ class FormatterTestCase(JigTestCase):
     Base test case for formatters.
 
     """
-    def run_formatter(self, results):
+    def run_formatter(self, results, **kwargs):
         """
         Creates a collator and returns formatted results.
 
@@ -356,11 +356,36 @@ class FormatterTestCase(JigTestCase):
         formatter.
 
         :param dict results: the results to collate and format
+        :param kwargs: passed on to the collator
         """
         collector = StringIO()
-        collator = ResultsCollator(results)
+        collator = ResultsCollator(results, **kwargs)
         printer = lambda line: collector.write(unicode(line) + u'\n')
 
         self.formatter().print_results(printer, collator)
 
         return collector.getvalue()
+
+    def stream_formatter(self, results):
+        """
+        Returns the results formatted one plugin at a time.
+
+        Each plugin is given to the formatter in the order of ``results``,
+        like they would be as each one finishes.
+
+        :param dict results: the results to collate and format
+        """
+        collector = StringIO()
+        printer = lambda line: collector.write(unicode(line) + u'\n')
+
+        formatter = self.formatter()
+        formatter.start_stream(printer)
+
+        for plugin, result in results.items():
+            if result is not None:
+                formatter.print_plugin(
+                    printer, ResultsCollator({plugin: result}))
+
+        formatter.end_stream(printer, ResultsCollator(results))
+
+        return collector.getvalue()
@@ -0,0 +1,205 @@
+"""
+Tracing
+=======
+
+Where a run of jig spends its time can be recorded with the ``JIG_TRACE``
+environment variable, or the ``--trace`` option of the commands that run
+plugins, set to the name of a file::
+
+    $ JIG_TRACE=/tmp/jig-trace.json git commit
+
+Each phase of the run, each plugin and each Git command is a span in the
+file. It uses the trace event format of Chrome's ``about:tracing`` and can be
+loaded into it or any other viewer that understands that format, like
+Perfetto.
+
+Nothing is recorded unless tracing was turned on, :py:func:`span` does
+nothing at all otherwise.
+"""
+import json
+from os import environ, getpid
+from time import time
+from functools import wraps
+from threading import Lock, current_thread
+from contextlib import contextmanager
+
+from git.cmd import Git
+
+# The environment variable that turns tracing on
+JIG_TRACE_VARIABLE = 'JIG_TRACE'
+
+# The tracer recording spans, None when tracing is off
+_tracer = None
+
+
+class Tracer(object):
+
+    """
+    Records spans as trace events.
+
+    """
+    def __init__(self):
+        self.started = time()
+        self.events = []
+        self._threads = {}
+        self._lock = Lock()
+
+    def _microseconds(self, seconds):
+        return int(round((seconds - self.started) * 1000000))
+
+    def add(self, name, category, start, end, args=None):
+        """
+        Record a span that ran from ``start`` to ``end``.
+
+        Can be called from more than one thread at the same time.
+
+        :param unicode name: what the span is
+        :param unicode category: the kind of span, like ``git`` or ``plugin``
+        :param float start: when it started, in seconds like
+            :py:func:`time.time`
+        :param float end: when it finished
+        :param dict args: anything else to show with the span
+        """
+        thread = current_thread()
+
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': self._microseconds(start),
+            'dur': self._microseconds(end) - self._microseconds(start),
+            'pid': getpid(),
+            'tid': thread.ident,
+            'args': args or {}}
+
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def trace_events(self):
+        """
+        All of the recorded events along with the names of the threads.
+
+        :rtype: list
+        """
+        with self._lock:
+            names = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': getpid(),
+                 'tid': tid, 'args': {'name': name}}
+                for tid, name in sorted(self._threads.items())]
+
+            return names + list(self.events)
+
+    def write(self, filename):
+        """
+        Write the trace event JSON to ``filename``.
+
+        :param string filename: where to write it
+        """
+        with open(filename, 'w') as fh:
+            # Anything in the args that isn't JSON is shown as text
+            json.dump(
+                {'traceEvents': self.trace_events(),
+                 'displayTimeUnit': 'ms'}, fh, default=unicode)
+
+
+@contextmanager
+def span(name, category='jig', **args):
+    """
+    Record how long everything inside of this context manager takes.
+
+    :param unicode name: what is being done
+    :param unicode category: the kind of span
+    """
+    tracer = _tracer
+
+    if tracer is None:
+        yield
+        return
+
+    start = time()
+
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time(), args)
+
+
+def record(name, category, start, **args):
+    """
+    Record a span that started at ``start`` and ends now.
+
+    For when the start and end are in different places and :py:func:`span`
+    can't wrap them.
+
+    :param unicode name: what was done
+    :param unicode category: the kind of span
+    :param float start: when it started, from :py:func:`time.time`
+    """
+    tracer = _tracer
+
+    if tracer is not None:
+        tracer.add(name, category, start, time(), args)
+
+
+def _traced_execute(execute):
+    """
+    Wrap :py:meth:`git.cmd.Git.execute` so each Git command is a span.
+    """
+    @wraps(execute)
+    def wrapper(self, command, *args, **kwargs):
+        if isinstance(command, basestring):
+            full = name = command
+        else:
+            full = u' '.join(command)
+            name = u' '.join(command[:2])
+
+        with span(name, 'git', command=full):
+            return execute(self, command, *args, **kwargs)
+
+    return wrapper
+
+
+def trace_filename(filename=None):
+    """
+    Where to write the trace, ``None`` if nothing should be traced.
+
+    :param string filename: explicitly requested, if not given the
+        ``JIG_TRACE`` environment variable is used
+    :rtype: string
+    """
+    return filename or environ.get(JIG_TRACE_VARIABLE) or None
+
+
+@contextmanager
+def tracing(filename, name=u'jig'):
+    """
+    Record spans while inside this context manager and write them out.
+
+    Does nothing if ``filename`` is ``None`` or something is already being
+    traced. The trace is written even if an exception, like
+    :py:exc:`SystemExit`, is raised.
+
+    :param string filename: where to write the trace
+    :param unicode name: the span covering everything
+    """
+    global _tracer
+
+    if not filename or _tracer is not None:
+        yield
+        return
+
+    tracer = _tracer = Tracer()
+
+    # The plain function, not an unbound method, so it can be put back as is
+    execute = Git.__dict__['execute']
+    Git.execute = _traced_execute(execute)
+
+    try:
+        with span(name):
+            yield
+    finally:
+        Git.execute = execute
+        _tracer = None
+
+        tracer.write(filename)